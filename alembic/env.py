@@ -28,8 +28,9 @@ config = context.config
 # Override sqlalchemy.url with our settings
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
-# Interpret the config file for Python logging
-if config.config_file_name is not None:
+# Interpret the config file for Python logging (skipped when the app runs
+# the migrations in-process and already configured logging)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -17,8 +17,8 @@ import sqlalchemy as sa
 from sqlalchemy import text
 from sqlalchemy.dialects import postgresql
 import uuid
+import secrets
 import bcrypt
-import json
 
 # revision identifiers, used by Alembic.
 revision = '002'
@@ -26,8 +26,52 @@ down_revision = '001'
 branch_labels = None
 depends_on = None
 
+# Pre-existing tables that receive a tenant_id column
+TENANT_SCOPED_TABLES = (
+    'users',
+    'plans',
+    'conversations',
+    'messages',
+    'leads',
+    'analysis_reports',
+)
+
+# Rows updated per committed batch during the tenant_id backfill
+BACKFILL_BATCH_SIZE = 10000
+
+# bcrypt cost for the auto-generated default tenant API key
+DEFAULT_API_KEY_BCRYPT_ROUNDS = 4
+
+# Session memory for the STEP 7 index builds (upper bound, not preallocated)
+INDEX_BUILD_MAINTENANCE_WORK_MEM = '1GB'
+
+
+def _backfill_tenant_id(table: str, tenant_id: uuid.UUID) -> None:
+    """Set tenant_id on every row of ``table`` in committed batches"""
+    conn = op.get_bind()
+    statement = sa.text(
+        f"""
+        UPDATE {table} SET tenant_id = :tenant_id
+        WHERE ctid IN (
+            SELECT ctid FROM {table} WHERE tenant_id IS NULL LIMIT :batch_size
+        )
+        """
+    )
+    while True:
+        updated = conn.execute(
+            statement, {"tenant_id": tenant_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).rowcount
+        if not updated:
+            break
+
 
 def upgrade() -> None:
+    # Every backfill batch commits on its own; don't wait for a WAL flush on
+    # each of those commits. Session-level (not SET LOCAL) so it also covers
+    # the autocommit blocks. A server crash can lose the most recent
+    # commits but never leaves the database inconsistent.
+    op.execute("SET synchronous_commit = off")
+
     # ========================================
     # STEP 1: Create new tenant tables
     # ========================================
@@ -65,7 +109,7 @@ def upgrade() -> None:
     document_type_enum = postgresql.ENUM('PRODUCT', 'FAQ', 'OBJECTIONS', 'SCRIPTS', name='documenttype', create_type=False)
 
     # Create tenants table
-    op.create_table('tenants',
+    tenants_table = op.create_table('tenants',
         sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
         sa.Column('slug', sa.String(), nullable=False),
         sa.Column('name', sa.String(), nullable=False),
@@ -97,7 +141,8 @@ def upgrade() -> None:
         sa.UniqueConstraint('tenant_id', 'prompt_type', 'version', name='uq_tenant_prompt_version')
     )
     op.create_index('ix_prompt_templates_tenant_id', 'prompt_templates', ['tenant_id'])
-    op.create_index('idx_tenant_prompt_type_active', 'prompt_templates', ['tenant_id', 'prompt_type', 'is_active'])
+    # Partial indexes: lookups always filter on is_active, so inactive rows stay out
+    op.create_index('idx_tenant_prompt_type_active', 'prompt_templates', ['tenant_id', 'prompt_type'], postgresql_where=sa.text('is_active'))
 
     # Create knowledge_documents table
     op.create_table('knowledge_documents',
@@ -116,34 +161,35 @@ def upgrade() -> None:
     )
     op.create_index('ix_knowledge_documents_tenant_id', 'knowledge_documents', ['tenant_id'])
     op.create_index('ix_knowledge_documents_slug', 'knowledge_documents', ['slug'])
-    op.create_index('idx_tenant_document_type', 'knowledge_documents', ['tenant_id', 'document_type'])
+    op.create_index('idx_tenant_document_type', 'knowledge_documents', ['tenant_id', 'document_type'], postgresql_where=sa.text('is_active'))
 
     # ========================================
     # STEP 2: Add tenant_id to existing tables (nullable)
     # ========================================
 
-    op.add_column('users', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-    op.add_column('plans', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-    op.add_column('conversations', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-    op.add_column('messages', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-    op.add_column('leads', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-    op.add_column('analysis_reports', sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True))
-
-    # Create indexes on tenant_id columns (before FK constraints)
-    op.create_index('ix_users_tenant_id', 'users', ['tenant_id'])
-    op.create_index('ix_plans_tenant_id', 'plans', ['tenant_id'])
-    op.create_index('ix_conversations_tenant_id', 'conversations', ['tenant_id'])
-    op.create_index('ix_messages_tenant_id', 'messages', ['tenant_id'])
-    op.create_index('ix_leads_tenant_id', 'leads', ['tenant_id'])
-    op.create_index('ix_analysis_reports_tenant_id', 'analysis_reports', ['tenant_id'])
+    # A nullable column without default is a metadata-only change (PG 11+);
+    # emit the ALTERs directly instead of six op.add_column dispatches
+    for table in TENANT_SCOPED_TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN tenant_id uuid")
+
+    # No standalone tenant_id indexes: every table gets a composite index
+    # (or unique constraint) leading with tenant_id in STEPS 6-7, which serves
+    # tenant_id-only lookups and FK cascades as a left-prefix scan. A
+    # single-column index would only add write amplification.
 
     # ========================================
     # STEP 3: Create default "workhub" tenant
     # ========================================
 
     # Generate a default API key for WorkHub
-    default_api_key = f"wh_{uuid.uuid4().hex[:32]}"
-    api_key_hash = bcrypt.hashpw(default_api_key.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    default_api_key = f"wh_{secrets.token_urlsafe(24)}"
+    # The key is random (192 bits of entropy), so a high bcrypt cost adds no
+    # protection here; the minimum cost keeps hashing off the migration's
+    # critical path. bcrypt.checkpw reads the cost from the hash itself.
+    api_key_hash = bcrypt.hashpw(
+        default_api_key.encode('utf-8'),
+        bcrypt.gensalt(rounds=DEFAULT_API_KEY_BCRYPT_ROUNDS),
+    ).decode('utf-8')
     api_key_prefix = default_api_key[:8]
 
     # Default tenant configuration for WorkHub
@@ -172,26 +218,23 @@ def upgrade() -> None:
         }
     }
 
-    # Insert default tenant
+    # Insert default tenant. Seed rows go through op.bulk_insert, which sends
+    # all rows of a table as one multi-row INSERT (and renders literals in
+    # offline mode), so further seed data can be appended to the same list
+    # without adding round-trips. Typed columns handle the JSONB/enum casts.
     workhub_id = uuid.uuid4()
-    config_json = json.dumps(workhub_config)
-    op.execute(
-        sa.text(
-            """
-            INSERT INTO tenants (id, slug, name, config, api_key_hash, api_key_prefix, status, is_active, created_at, updated_at)
-            VALUES (:id, :slug, :name, CAST(:config AS jsonb), :api_key_hash, :api_key_prefix, CAST(:status AS tenantstatus), :is_active, NOW(), NOW())
-            """
-        ).bindparams(
-            id=workhub_id,
-            slug='workhub',
-            name='WorkHub Coworking',
-            config=config_json,
-            api_key_hash=api_key_hash,
-            api_key_prefix=api_key_prefix,
-            status='ACTIVE',
-            is_active=True
-        )
-    )
+    op.bulk_insert(tenants_table, [
+        {
+            'id': workhub_id,
+            'slug': 'workhub',
+            'name': 'WorkHub Coworking',
+            'config': workhub_config,
+            'api_key_hash': api_key_hash,
+            'api_key_prefix': api_key_prefix,
+            'status': 'ACTIVE',
+            'is_active': True,
+        },
+    ])
 
     # Print API key for admin (will be shown only once)
     print("\n" + "="*80)
@@ -208,55 +251,60 @@ def upgrade() -> None:
     # STEP 4: Backfill tenant_id in existing data
     # ========================================
 
-    # Update all existing records to use the workhub tenant
-    op.execute(
-        sa.text("UPDATE users SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
-
-    op.execute(
-        sa.text("UPDATE plans SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
-
-    op.execute(
-        sa.text("UPDATE conversations SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
-
-    op.execute(
-        sa.text("UPDATE messages SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
-
-    op.execute(
-        sa.text("UPDATE leads SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
-
-    op.execute(
-        sa.text("UPDATE analysis_reports SET tenant_id = :tenant_id WHERE tenant_id IS NULL")
-        .bindparams(tenant_id=workhub_id)
-    )
+    # Autovacuum is suspended on the rewritten tables for the backfill
+    # window so it doesn't compete for I/O; stats are refreshed with a
+    # single ANALYZE once STEP 5 is done.
+    for table in TENANT_SCOPED_TABLES:
+        op.execute(f"ALTER TABLE {table} SET (autovacuum_enabled = false)")
+
+    # Update all existing records to use the workhub tenant.
+    # Rows are rewritten in fixed-size batches, each committed on its own
+    # (autocommit block), so large installations never hold row locks or
+    # WAL for a whole table inside the migration transaction. Batches are
+    # selected by ctid to avoid an index lookup, and the IS NULL predicate
+    # makes the backfill resumable after a failure.
+    with op.get_context().autocommit_block():
+        for table in TENANT_SCOPED_TABLES:
+            _backfill_tenant_id(table, workhub_id)
 
     # ========================================
     # STEP 5: Make tenant_id NOT NULL and add foreign keys
     # ========================================
 
-    op.alter_column('users', 'tenant_id', nullable=False)
-    op.alter_column('plans', 'tenant_id', nullable=False)
-    op.alter_column('conversations', 'tenant_id', nullable=False)
-    op.alter_column('messages', 'tenant_id', nullable=False)
-    op.alter_column('leads', 'tenant_id', nullable=False)
-    op.alter_column('analysis_reports', 'tenant_id', nullable=False)
-
-    # Add foreign key constraints
-    op.create_foreign_key('fk_users_tenant_id', 'users', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
-    op.create_foreign_key('fk_plans_tenant_id', 'plans', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
-    op.create_foreign_key('fk_conversations_tenant_id', 'conversations', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
-    op.create_foreign_key('fk_messages_tenant_id', 'messages', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
-    op.create_foreign_key('fk_leads_tenant_id', 'leads', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
-    op.create_foreign_key('fk_analysis_reports_tenant_id', 'analysis_reports', 'tenants', ['tenant_id'], ['id'], ondelete='CASCADE')
+    # SET NOT NULL alone scans the whole table under ACCESS EXCLUSIVE.
+    # Prove the invariant with a CHECK constraint first (added NOT VALID,
+    # validated without blocking writes); PostgreSQL 12+ then reuses the
+    # validated CHECK and flips the column to NOT NULL without a scan.
+    for table in TENANT_SCOPED_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_tenant_id_not_null "
+            f"CHECK (tenant_id IS NOT NULL) NOT VALID"
+        )
+
+    with op.get_context().autocommit_block():
+        for table in TENANT_SCOPED_TABLES:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_tenant_id_not_null")
+
+    for table in TENANT_SCOPED_TABLES:
+        op.alter_column(table, 'tenant_id', nullable=False)
+        op.drop_constraint(f'{table}_tenant_id_not_null', table, type_='check')
+
+    # Add foreign key constraints as NOT VALID (brief lock, no table scan),
+    # then validate them outside the migration transaction, where the check
+    # only takes SHARE UPDATE EXCLUSIVE and concurrent DML keeps running
+    for table in TENANT_SCOPED_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_tenant_id "
+            f"FOREIGN KEY (tenant_id) REFERENCES tenants (id) ON DELETE CASCADE NOT VALID"
+        )
+
+    with op.get_context().autocommit_block():
+        for table in TENANT_SCOPED_TABLES:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT fk_{table}_tenant_id")
+
+    for table in TENANT_SCOPED_TABLES:
+        op.execute(f"ALTER TABLE {table} RESET (autovacuum_enabled)")
+        op.execute(f"ANALYZE {table}")
 
     # ========================================
     # STEP 6: Update constraints (drop global unique, add tenant-scoped unique)
@@ -276,26 +324,45 @@ def upgrade() -> None:
     # STEP 7: Create performance indexes
     # ========================================
 
-    # User indexes
-    op.create_index('idx_user_tenant_key', 'users', ['tenant_id', 'user_key'])
+    # Built concurrently (outside the migration transaction) so writes
+    # continue while the indexes are populated
+    with op.get_context().autocommit_block():
+        op.execute(f"SET maintenance_work_mem = '{INDEX_BUILD_MAINTENANCE_WORK_MEM}'")
+
+        # User indexes
+        op.create_index('idx_user_tenant_key', 'users', ['tenant_id', 'user_key'], postgresql_concurrently=True)
 
-    # Plan indexes
-    op.create_index('idx_plan_tenant_active', 'plans', ['tenant_id', 'is_active'])
+        # Plan indexes (partial: plan listings only ever read active plans)
+        op.create_index('idx_plan_tenant_active', 'plans', ['tenant_id'], postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+
+        # Conversation indexes
+        # Covering index: conversation lookups by user also read status, funnel
+        # stage and updated_at, which INCLUDE serves without heap fetches
+        op.create_index(
+            'idx_conversation_tenant_user', 'conversations', ['tenant_id', 'user_id'],
+            postgresql_include=['status', 'funnel_stage', 'updated_at'],
+            postgresql_concurrently=True,
+        )
+        op.create_index('idx_conversation_tenant_status', 'conversations', ['tenant_id', 'status'], postgresql_concurrently=True)
+        op.create_index('idx_conversation_tenant_funnel', 'conversations', ['tenant_id', 'funnel_stage'], postgresql_concurrently=True)
 
-    # Conversation indexes
-    op.create_index('idx_conversation_tenant_user', 'conversations', ['tenant_id', 'user_id'])
-    op.create_index('idx_conversation_tenant_status', 'conversations', ['tenant_id', 'status'])
-    op.create_index('idx_conversation_tenant_funnel', 'conversations', ['tenant_id', 'funnel_stage'])
+        # Message indexes
+        op.create_index('idx_message_tenant_conversation', 'messages', ['tenant_id', 'conversation_id'], postgresql_concurrently=True)
 
-    # Message indexes
-    op.create_index('idx_message_tenant_conversation', 'messages', ['tenant_id', 'conversation_id'])
+        # Lead indexes
+        op.create_index('idx_lead_tenant_stage', 'leads', ['tenant_id', 'stage'], postgresql_concurrently=True)
+        op.create_index('idx_lead_tenant_user', 'leads', ['tenant_id', 'user_id'], postgresql_concurrently=True)
 
-    # Lead indexes
-    op.create_index('idx_lead_tenant_stage', 'leads', ['tenant_id', 'stage'])
-    op.create_index('idx_lead_tenant_user', 'leads', ['tenant_id', 'user_id'])
+        # Analysis Report indexes
+        op.create_index('idx_analysis_tenant_type', 'analysis_reports', ['tenant_id', 'analysis_type'], postgresql_concurrently=True)
 
-    # Analysis Report indexes
-    op.create_index('idx_analysis_tenant_type', 'analysis_reports', ['tenant_id', 'analysis_type'])
+        # Refresh the visibility map after the backfill so the covering
+        # conversation index can answer with index-only scans
+        op.execute("VACUUM conversations")
+
+        op.execute("RESET maintenance_work_mem")
+
+    op.execute("RESET synchronous_commit")
 
 
 def downgrade() -> None:
@@ -332,14 +399,6 @@ def downgrade() -> None:
     op.drop_constraint('fk_plans_tenant_id', 'plans', type_='foreignkey')
     op.drop_constraint('fk_users_tenant_id', 'users', type_='foreignkey')
 
-    # Drop tenant_id indexes
-    op.drop_index('ix_analysis_reports_tenant_id', table_name='analysis_reports')
-    op.drop_index('ix_leads_tenant_id', table_name='leads')
-    op.drop_index('ix_messages_tenant_id', table_name='messages')
-    op.drop_index('ix_conversations_tenant_id', table_name='conversations')
-    op.drop_index('ix_plans_tenant_id', table_name='plans')
-    op.drop_index('ix_users_tenant_id', table_name='users')
-
     # Drop tenant_id columns
     op.drop_column('analysis_reports', 'tenant_id')
     op.drop_column('leads', 'tenant_id')
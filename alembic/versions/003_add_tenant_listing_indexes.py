@@ -0,0 +1,46 @@
+"""Add indexes for tenant listing queries
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16
+
+Indexes matching the tenant endpoints' WHERE/ORDER BY clauses:
+1. Active prompts by (tenant_id, prompt_type, version), replacing the
+   (tenant_id, prompt_type) partial index it extends
+2. Knowledge documents and plans by (tenant_id, created_at) for the
+   newest-first listings
+
+(tenant_id, slug) lookups are already served by the unique constraints.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently (outside the migration transaction) so writes
+    # continue while the indexes are populated
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_tenant_prompt_type_version_active', 'prompt_templates',
+            ['tenant_id', 'prompt_type', 'version'],
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_tenant_prompt_type_active', table_name='prompt_templates', postgresql_concurrently=True)
+
+        op.create_index('idx_knowledge_tenant_created', 'knowledge_documents', ['tenant_id', 'created_at'], postgresql_concurrently=True)
+        op.create_index('idx_plan_tenant_created', 'plans', ['tenant_id', 'created_at'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_plan_tenant_created', table_name='plans')
+    op.drop_index('idx_knowledge_tenant_created', table_name='knowledge_documents')
+
+    op.create_index('idx_tenant_prompt_type_active', 'prompt_templates', ['tenant_id', 'prompt_type'], postgresql_where=sa.text('is_active'))
+    op.drop_index('idx_tenant_prompt_type_version_active', table_name='prompt_templates')
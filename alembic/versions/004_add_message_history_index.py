@@ -0,0 +1,29 @@
+"""Add index for conversation message history
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+Every chat turn loads the latest messages of a conversation
+(WHERE conversation_id = ? ORDER BY created_at DESC LIMIT n). An index on
+(conversation_id, created_at) serves it as a short backward index scan
+instead of sorting all of the conversation's messages.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently (outside the migration transaction) so writes
+    # continue while the index is populated
+    with op.get_context().autocommit_block():
+        op.create_index('idx_message_conversation_created', 'messages', ['conversation_id', 'created_at'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_message_conversation_created', table_name='messages')
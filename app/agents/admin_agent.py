@@ -1,22 +1,39 @@
 """Admin Agent implementation"""
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, AsyncIterator
 from uuid import UUID
-from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.exceptions import OutputParserException
+from langchain.agents import AgentExecutor
 from langchain_core.messages import BaseMessage
-from openai import RateLimitError, APIError, APITimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.base import get_llm
-from app.tools import create_admin_tools
+from app.agents.base import (
+    get_llm,
+    get_functions_agent,
+    build_agent_executor,
+    stream_agent_events,
+    run_executor,
+    agent_error_response,
+    AGENT_ERROR_RESPONSES,
+    RETURN_INTERMEDIATE_STEPS,
+    trim_history,
+)
+from app.tools import create_admin_tools, create_batch_tool
 from app.tools.tenant_tools import TenantToolRegistry
 from app.models.user import User
-from app.services.prompt_service import PromptService
+from app.services.prompt_service import prompt_service
 from app.services.tenant_prompt_service import tenant_prompt_service
 from app.services.auth_service import require_admin
 from app.utils.logger import logger
 
+# Agent errors plus the admin access check
+_ERROR_RESPONSES = MappingProxyType({
+    **AGENT_ERROR_RESPONSES,
+    PermissionError: (
+        "Acesso negado. Você precisa ter privilégios de administrador para usar este agente.",
+        "Permission error",
+    ),
+})
+
 
 class AdminAgent:
     """Admin Agent for administrative tasks and analytics (supports multi-tenant)"""
@@ -37,7 +54,11 @@ class AdminAgent:
         # Verify admin access
         require_admin(user)
 
-        self.llm = get_llm(temperature=0.3)  # Lower temperature for more factual responses
+        self.cache_scope = f"tenant:{tenant_id or 'default'}:agent:admin"
+        self.llm = get_llm(
+            temperature=0.3,  # Lower temperature for more factual responses
+            cache_key=self.cache_scope,
+        )
 
         # Use tenant-aware tools if tenant_id provided
         if tenant_id:
@@ -49,43 +70,85 @@ class AdminAgent:
             self.tools = create_admin_tools(db, user)
             self.tool_registry = None
 
-        self.agent_executor = None
+        self.agent_executors: Dict[bool, AgentExecutor] = {}
+        self._executor_system_prompt = None
     
-    async def _create_prompt(
+    async def _get_system_prompt(
         self,
         conversation_id: str = None,
-    ) -> ChatPromptTemplate:
+    ) -> str:
         """
-        Create prompt template for admin agent.
+        Get system prompt text for admin agent.
 
         Args:
             conversation_id: Current conversation ID
 
         Returns:
-            ChatPromptTemplate
+            System prompt with variables injected
         """
         # Get system prompt based on mode
         if self.tenant_id:
-            system_prompt = await tenant_prompt_service.get_admin_prompt(
+            return await tenant_prompt_service.get_admin_prompt(
                 db=self.db,
                 tenant_id=self.tenant_id,
                 conversation_id=conversation_id,
             )
-        else:
-            prompt_service = PromptService()
-            system_prompt = prompt_service.get_admin_prompt(
-                conversation_id=conversation_id,
-            )
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        return prompt_service.get_admin_prompt(
+            conversation_id=conversation_id,
+        )
+
+    def _get_dynamic_context(self, conversation_id: str = None) -> str:
+        """
+        Get per-turn context for admin agent.
+
+        Args:
+            conversation_id: Current conversation ID
+
+        Returns:
+            Context block sent after the system prompt
+        """
+        if self.tenant_id:
+            return tenant_prompt_service.get_admin_context(conversation_id=conversation_id)
+        return prompt_service.get_admin_context(conversation_id=conversation_id)
+
+    async def _get_agent_executor(self, conversation_id: str, return_intermediate_steps: bool) -> AgentExecutor:
+        """
+        Get the agent executor, building it only when the system prompt changes
+        (one executor per output mode).
+
+        The agent runnable (prompt + function schemas) is shared across
+        requests; only the executor, which holds this request's
+        session-bound tools, is built per agent.
+
+        Args:
+            conversation_id: Current conversation ID
+            return_intermediate_steps: Whether the executor returns the tool-call log
+
+        Returns:
+            AgentExecutor
+        """
+        system_prompt = await self._get_system_prompt(conversation_id)
+        if self._executor_system_prompt != system_prompt:
+            self.agent_executors.clear()
+            self._executor_system_prompt = system_prompt
+        elif return_intermediate_steps in self.agent_executors:
+            return self.agent_executors[return_intermediate_steps]
+
+        # Get tools (for tenant mode, create them once per agent)
+        if self.tools is None:
+            tenant_tools = await self.tool_registry.get_all_tools()
+            self.tools = [*tenant_tools, create_batch_tool(tenant_tools)]
+
+        agent = get_functions_agent(self.llm, self.tools, system_prompt, self.cache_scope)
+        self.agent_executors[return_intermediate_steps] = build_agent_executor(
+            agent,
+            self.tools,
+            return_intermediate_steps=return_intermediate_steps,
+        )
+
+        return self.agent_executors[return_intermediate_steps]
 
-        return prompt
-    
     async def invoke(
         self,
         message: str,
@@ -94,6 +157,7 @@ class AdminAgent:
         user_name: str = None,
         conversation_summary: str = None,
         chat_history: Optional[List[BaseMessage]] = None,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
     ) -> Dict[str, Any]:
         """
         Invoke admin agent with a message
@@ -105,99 +169,72 @@ class AdminAgent:
             user_name: User's name
             conversation_summary: Conversation summary
             chat_history: Previous messages
+            return_intermediate_steps: Include the tool-call log in the response
         
         Returns:
             Agent response
         """
         try:
-            # Get tools (for tenant mode, create them here)
-            if self.tenant_id:
-                tools = await self.tool_registry.get_all_tools()
-            else:
-                tools = self.tools
-
-            # Create prompt with current context
-            prompt = await self._create_prompt(
-                conversation_id=conversation_id,
-            )
-
-            # Create agent
-            agent = create_openai_functions_agent(
-                llm=self.llm,
-                tools=tools,
-                prompt=prompt,
-            )
-
-            # Create executor with optimized configuration
-            from app.core.config import settings
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=tools,
-                verbose=settings.APP_ENV == "development",  # Verbose apenas em desenvolvimento
-                max_iterations=15,  # Aumentar limite de iterações
-                max_execution_time=120,  # Timeout de 2 minutos
-                early_stopping_method="generate",  # Parar graciosamente
-                handle_parsing_errors=True,  # Tratar erros de parsing automaticamente
-                return_intermediate_steps=True,
-            )
+            agent_executor = await self._get_agent_executor(conversation_id, return_intermediate_steps)
             
             # Prepare input
             agent_input = {
                 "input": message,
-                "chat_history": chat_history or [],
+                "dynamic_context": self._get_dynamic_context(conversation_id),
+                "chat_history": trim_history(chat_history),
             }
             
-            # Invoke agent
-            logger.info(f"Invoking admin agent for conversation {conversation_id}")
-            result = await agent_executor.ainvoke(agent_input)
-            
-            logger.info(f"Admin agent response generated for conversation {conversation_id}")
-            
-            return {
-                "output": result.get("output", ""),
-                "intermediate_steps": result.get("intermediate_steps", []),
-            }
-        
-        except OutputParserException as e:
-            logger.error(f"Output parsing error in admin agent: {e}")
-            return {
-                "output": "Desculpe, tive dificuldade em processar a resposta. Pode reformular sua pergunta?",
-                "error": f"OutputParserException: {str(e)}"
-            }
-        
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded in admin agent: {e}")
-            return {
-                "output": "Estamos com muitas requisições no momento. Por favor, aguarde alguns segundos e tente novamente.",
-                "error": f"RateLimitError: {str(e)}"
-            }
+            return await run_executor(
+                agent_executor,
+                agent_input,
+                log_context=f"admin agent for conversation {conversation_id}",
+                return_intermediate_steps=return_intermediate_steps,
+            )
         
-        except APITimeoutError as e:
-            logger.error(f"API timeout in admin agent: {e}")
-            return {
-                "output": "A requisição demorou muito para processar. Por favor, tente novamente.",
-                "error": f"APITimeoutError: {str(e)}"
-            }
+        except Exception as e:
+            return agent_error_response(e, "admin agent", _ERROR_RESPONSES)
+
+    async def astream(
+        self,
+        message: str,
+        conversation_id: str,
+        user_id: str,
+        user_name: str = None,
+        conversation_summary: str = None,
+        chat_history: Optional[List[BaseMessage]] = None,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Invoke admin agent, streaming the answer as it is generated
         
-        except APIError as e:
-            logger.error(f"API error in admin agent: {e}")
-            return {
-                "output": "Ocorreu um erro temporário com nosso serviço de IA. Por favor, tente novamente em alguns instantes.",
-                "error": f"APIError: {str(e)}"
-            }
+        Args:
+            message: User message
+            conversation_id: Conversation ID
+            user_id: User ID
+            user_name: User's name
+            conversation_summary: Conversation summary
+            chat_history: Previous messages
+            return_intermediate_steps: Include the tool-call log in the final event
         
-        except PermissionError as e:
-            logger.error(f"Permission error in admin agent: {e}")
-            return {
-                "output": "Acesso negado. Você precisa ter privilégios de administrador para usar este agente.",
-                "error": str(e)
+        Yields:
+            Token events, then a final event with the same fields as invoke's result
+        """
+        try:
+            agent_executor = await self._get_agent_executor(conversation_id, return_intermediate_steps)
+            
+            agent_input = {
+                "input": message,
+                "dynamic_context": self._get_dynamic_context(conversation_id),
+                "chat_history": trim_history(chat_history),
             }
             
+            logger.info(f"Streaming admin agent for conversation {conversation_id}")
+            async for event in stream_agent_events(
+                agent_executor,
+                agent_input,
+                return_intermediate_steps=return_intermediate_steps,
+            ):
+                yield event
+        
         except Exception as e:
-            logger.error(f"Unexpected error invoking admin agent: {e}", exc_info=True)
-            return {
-                "output": "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente.",
-                "error": str(e)
-            }
-
-
+            yield {"type": "final", **agent_error_response(e, "admin agent", _ERROR_RESPONSES)}
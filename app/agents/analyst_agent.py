@@ -1,18 +1,45 @@
 """Analyst Agent implementation"""
-from typing import Dict, Any, Optional
-from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+import asyncio
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional
+from langchain.agents import AgentExecutor
 from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import Runnable
 from openai import RateLimitError, APIError, APITimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.base import get_llm
+from app.agents.base import (
+    get_llm,
+    get_functions_agent,
+    build_agent_executor,
+    parse_json_output,
+    run_executor,
+    agent_error_response,
+    RETURN_INTERMEDIATE_STEPS,
+)
+from app.core.database import AsyncSessionLocal
 from app.tools import create_analyst_tools
 from app.models.user import User
 from app.services.auth_service import require_admin
-from app.services.prompt_service import PromptService
+from app.services.prompt_service import prompt_service
 from app.utils.logger import logger
 
+# Analysis errors are returned as the "error" field of the result
+_ERROR_RESPONSES = MappingProxyType({
+    OutputParserException: ("Erro ao processar análise. Tente novamente.", "Output parsing error"),
+    RateLimitError: ("Limite de requisições excedido. Tente novamente em alguns instantes.", "Rate limit exceeded"),
+    APITimeoutError: ("Timeout ao processar análise. Tente novamente.", "API timeout"),
+    APIError: ("Erro temporário no serviço de IA. Tente novamente em alguns instantes.", "API error"),
+})
+_UNEXPECTED_ERROR_MESSAGE = "Erro inesperado ao processar análise. Tente novamente."
+
+# Analyses are single-shot JSON reports: cap the tool loop and stop without the
+# extra LLM call that early_stopping_method="generate" makes at the cap
+ANALYST_EXECUTOR_OPTIONS = dict(
+    max_iterations=6,
+    early_stopping_method="force",
+)
+
 
 class AnalystAgent:
     """Analyst Agent for sales analytics"""
@@ -22,66 +49,64 @@ class AnalystAgent:
         self.user = user
         # Verify admin access before creating tools
         require_admin(user)
-        self.llm = get_llm(temperature=0.3)  # Lower temperature for more factual analysis
+        self.cache_scope = "tenant:default:agent:analyst"
+        self.llm = get_llm(
+            temperature=0.3,  # Lower temperature for more factual analysis
+            json_mode=True,
+            cache_key=self.cache_scope,
+        )
         self.tools = create_analyst_tools(db, user)
-        self.agent_executor = None
+        self.agent_executors: Dict[bool, AgentExecutor] = {}
     
-    def _create_prompt(self) -> ChatPromptTemplate:
+    def _get_agent(self) -> Runnable:
         """
-        Create prompt template for analyst agent
+        Get agent runnable for analyst agent (shared across requests)
         
         Returns:
-            ChatPromptTemplate
+            Agent runnable
         """
-        prompt_service = PromptService()
         system_prompt = prompt_service.get_analyst_prompt()
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        return get_functions_agent(
+            self.llm,
+            self.tools,
+            system_prompt,
+            self.cache_scope,
+            dynamic_context=False,
+            chat_history=False,
+        )
+    
+    def _get_agent_executor(self, return_intermediate_steps: bool) -> AgentExecutor:
+        """
+        Get executor for analyses (built once per agent and output mode)
         
-        return prompt
+        Args:
+            return_intermediate_steps: Whether the executor returns the tool-call log
+        
+        Returns:
+            AgentExecutor
+        """
+        if return_intermediate_steps not in self.agent_executors:
+            self.agent_executors[return_intermediate_steps] = build_agent_executor(
+                self._get_agent(),
+                self.tools,
+                return_intermediate_steps=return_intermediate_steps,
+                **ANALYST_EXECUTOR_OPTIONS,
+            )
+        return self.agent_executors[return_intermediate_steps]
     
-    async def analyze_conversation(
-        self,
-        conversation_id: str
-    ) -> Dict[str, Any]:
+    @staticmethod
+    def _build_analysis_request(conversation_id: str) -> str:
         """
-        Analyze a specific conversation
+        Build the analysis instruction for a conversation
         
         Args:
             conversation_id: Conversation ID to analyze
         
         Returns:
-            Analysis results
+            Agent input text
         """
-        try:
-            prompt = self._create_prompt()
-            
-            # Create agent
-            agent = create_openai_functions_agent(
-                llm=self.llm,
-                tools=self.tools,
-                prompt=prompt,
-            )
-            
-            # Create executor with optimized configuration
-            from app.core.config import settings
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=self.tools,
-                verbose=settings.APP_ENV == "development",  # Verbose apenas em desenvolvimento
-                max_iterations=15,  # Aumentar limite de iterações
-                max_execution_time=120,  # Timeout de 2 minutos
-                early_stopping_method="generate",  # Parar graciosamente
-                handle_parsing_errors=True,  # Tratar erros de parsing automaticamente
-                return_intermediate_steps=True,
-            )
-            
-            # Prepare analysis request
-            analysis_request = f"""
+        return f"""
 Analise a conversa com ID {conversation_id}.
 
 Forneça:
@@ -94,53 +119,69 @@ Forneça:
 
 Retorne a análise em formato JSON estruturado.
 """
-            
-            # Invoke agent
-            logger.info(f"Analyzing conversation {conversation_id}")
-            result = await agent_executor.ainvoke({"input": analysis_request})
-            
-            logger.info(f"Analysis completed for conversation {conversation_id}")
-            
-            return {
-                "conversation_id": conversation_id,
-                "analysis": result.get("output", ""),
-                "intermediate_steps": result.get("intermediate_steps", []),
-            }
-        
-        except OutputParserException as e:
-            logger.error(f"Output parsing error in analyst agent: {e}")
-            return {
-                "conversation_id": conversation_id,
-                "error": f"Erro ao processar análise: {str(e)}"
-            }
-        
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded in analyst agent: {e}")
-            return {
-                "conversation_id": conversation_id,
-                "error": "Limite de requisições excedido. Tente novamente em alguns instantes."
-            }
-        
-        except APITimeoutError as e:
-            logger.error(f"API timeout in analyst agent: {e}")
-            return {
-                "conversation_id": conversation_id,
-                "error": "Timeout ao processar análise. Tente novamente."
-            }
-        
-        except APIError as e:
-            logger.error(f"OpenAI API error in analyst agent: {e}")
-            return {
-                "conversation_id": conversation_id,
-                "error": f"Erro na API OpenAI: {str(e)}"
-            }
-            
+    
+    async def analyze_conversations_batch(
+        self,
+        conversation_ids: List[str],
+        max_concurrency: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several conversations concurrently
+        
+        Each analysis runs on its own database session: an AsyncSession can't
+        serve concurrent queries, and the analyst tools query through the
+        session they are bound to. The agent runnable itself is shared.
+        
+        Args:
+            conversation_ids: Conversation IDs to analyze
+            max_concurrency: Maximum analyses in flight at once
+        
+        Returns:
+            Analysis results, in the same order as conversation_ids
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze(conversation_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                async with AsyncSessionLocal() as session:
+                    agent = AnalystAgent(session, self.user)
+                    return await agent.analyze_conversation(conversation_id)
+        
+        logger.info(f"Analyzing {len(conversation_ids)} conversations (max_concurrency={max_concurrency})")
+        return list(await asyncio.gather(*(analyze(cid) for cid in conversation_ids)))
+    
+    async def analyze_conversation(
+        self,
+        conversation_id: str,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
+    ) -> Dict[str, Any]:
+        """
+        Analyze a specific conversation
+        
+        Args:
+            conversation_id: Conversation ID to analyze
+            return_intermediate_steps: Include the tool-call log in the result
+        
+        Returns:
+            Analysis results
+        """
+        try:
+            result = await run_executor(
+                self._get_agent_executor(return_intermediate_steps),
+                {"input": self._build_analysis_request(conversation_id)},
+                log_context=f"analyst agent for conversation {conversation_id}",
+                return_intermediate_steps=return_intermediate_steps,
+            )
         except Exception as e:
-            logger.error(f"Unexpected error analyzing conversation: {e}", exc_info=True)
-            return {
-                "conversation_id": conversation_id,
-                "error": str(e)
-            }
+            response = agent_error_response(e, "analyst agent", _ERROR_RESPONSES, _UNEXPECTED_ERROR_MESSAGE)
+            return {"conversation_id": conversation_id, "error": response["output"]}
+        
+        return {
+            "conversation_id": conversation_id,
+            "analysis": result["output"],
+            "analysis_data": parse_json_output(result["output"]),
+            "intermediate_steps": result["intermediate_steps"],
+        }
     
     async def get_funnel_analysis(
         self,
@@ -157,34 +198,11 @@ Retorne a análise em formato JSON estruturado.
         Returns:
             Funnel analysis
         """
-        try:
-            prompt = self._create_prompt()
-            
-            # Create agent
-            agent = create_openai_functions_agent(
-                llm=self.llm,
-                tools=self.tools,
-                prompt=prompt,
-            )
-            
-            # Create executor with optimized configuration
-            from app.core.config import settings
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=self.tools,
-                verbose=settings.APP_ENV == "development",  # Verbose apenas em desenvolvimento
-                max_iterations=15,  # Aumentar limite de iterações
-                max_execution_time=120,  # Timeout de 2 minutos
-                early_stopping_method="generate",  # Parar graciosamente
-                handle_parsing_errors=True,  # Tratar erros de parsing automaticamente
-            )
-            
-            # Prepare analysis request
-            date_filter = ""
-            if start_date and end_date:
-                date_filter = f" entre {start_date} e {end_date}"
-            
-            analysis_request = f"""
+        date_filter = ""
+        if start_date and end_date:
+            date_filter = f" entre {start_date} e {end_date}"
+        
+        analysis_request = f"""
 Analise as métricas do funil de vendas{date_filter}.
 
 Forneça:
@@ -195,39 +213,22 @@ Forneça:
 5. Comparação de performance entre planos
 
 Use as tools disponíveis para obter os dados necessários.
-Retorne a análise em formato estruturado.
+Retorne a análise em formato JSON estruturado.
 """
-            
-            # Invoke agent
-            logger.info("Analyzing funnel metrics")
-            result = await agent_executor.ainvoke({"input": analysis_request})
-            
-            logger.info("Funnel analysis completed")
-            
-            return {
-                "analysis": result.get("output", ""),
-                "period": {"start": start_date, "end": end_date}
-            }
-        
-        except OutputParserException as e:
-            logger.error(f"Output parsing error in funnel analysis: {e}")
-            return {"error": f"Erro ao processar análise do funil: {str(e)}"}
-        
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded in funnel analysis: {e}")
-            return {"error": "Limite de requisições excedido. Tente novamente em alguns instantes."}
-        
-        except APITimeoutError as e:
-            logger.error(f"API timeout in funnel analysis: {e}")
-            return {"error": "Timeout ao processar análise do funil. Tente novamente."}
-        
-        except APIError as e:
-            logger.error(f"OpenAI API error in funnel analysis: {e}")
-            return {"error": f"Erro na API OpenAI: {str(e)}"}
-            
+        
+        try:
+            result = await run_executor(
+                self._get_agent_executor(return_intermediate_steps=False),
+                {"input": analysis_request},
+                log_context="analyst agent for funnel analysis",
+                return_intermediate_steps=False,
+            )
         except Exception as e:
-            logger.error(f"Unexpected error analyzing funnel: {e}", exc_info=True)
-            return {"error": str(e)}
-
-
-
+            response = agent_error_response(e, "funnel analysis", _ERROR_RESPONSES, _UNEXPECTED_ERROR_MESSAGE)
+            return {"error": response["output"]}
+        
+        return {
+            "analysis": result["output"],
+            "analysis_data": parse_json_output(result["output"]),
+            "period": {"start": start_date, "end": end_date}
+        }
@@ -1,43 +1,530 @@
 """Base agent configuration"""
+import asyncio
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence
+import tiktoken
+from langchain.agents import AgentExecutor, create_openai_functions_agent
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.tools import BaseTool, StructuredTool
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnablePassthrough
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
+from openai import RateLimitError, APIError, APITimeoutError, APIConnectionError, InternalServerError
 from app.core.config import settings
 from app.utils.logger import logger
 
+# Placeholder structure is identical for every tenant; only the system text varies
+_CHAT_HISTORY_PLACEHOLDER = MessagesPlaceholder(variable_name="chat_history", optional=True)
+_AGENT_SCRATCHPAD_PLACEHOLDER = MessagesPlaceholder(variable_name="agent_scratchpad")
 
-def get_llm(temperature: float = 0.7):
+# Compiled prompt templates keyed by (system prompt text, layout), so template
+# parsing runs once per distinct text
+_PROMPT_CACHE: Dict[tuple, ChatPromptTemplate] = {}
+
+# Agent runnables (prompt + LLM bound to the tool function schemas) keyed by
+# (scope, system prompt text, layout, tool names). They hold no database
+# session, unlike the tools themselves, so they can be shared across requests.
+_AGENT_CACHE: Dict[tuple, Runnable] = {}
+
+_CACHE_MAX_ENTRIES = 256
+
+# HTTP-level retries done by the provider SDK (exponential backoff with jitter;
+# the OpenAI SDK waits for the server's Retry-After header when it sends one)
+LLM_SDK_MAX_RETRIES = 5
+
+# Transient errors that still surface after the SDK gives up are retried once
+# more per LLM step, so a burst of 429s doesn't fail the whole turn. Only the
+# model call is retried, never tools (which may have side effects).
+LLM_STEP_RETRY_EXCEPTIONS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+LLM_STEP_MAX_ATTEMPTS = 2
+
+# Shared AgentExecutor configuration (read-only: it backs every executor)
+AGENT_EXECUTOR_DEFAULTS: Mapping[str, Any] = MappingProxyType(dict(
+    verbose=settings.APP_ENV == "development",  # Verbose apenas em desenvolvimento
+    max_iterations=15,  # Aumentar limite de iterações
+    max_execution_time=120,  # Timeout de 2 minutos
+    early_stopping_method="generate",  # Parar graciosamente
+    handle_parsing_errors=True,  # Tratar erros de parsing automaticamente
+))
+
+# Whether agents return the tool-call log to callers by default (callers that
+# persist or display it opt in explicitly; executors are built per setting)
+RETURN_INTERMEDIATE_STEPS = settings.APP_ENV == "development"
+
+# User-facing message and log label per exception class raised by an agent turn
+AGENT_ERROR_RESPONSES: Mapping[type, tuple] = MappingProxyType({
+    OutputParserException: (
+        "Desculpe, tive dificuldade em processar a resposta. Pode reformular sua pergunta?",
+        "Output parsing error",
+    ),
+    RateLimitError: (
+        "Estamos com muitas requisições no momento. Por favor, aguarde alguns segundos e tente novamente.",
+        "Rate limit exceeded",
+    ),
+    APITimeoutError: (
+        "A requisição demorou muito para processar. Por favor, tente novamente.",
+        "API timeout",
+    ),
+    APIError: (
+        "Ocorreu um erro temporário com nosso serviço de IA. Por favor, tente novamente em alguns instantes.",
+        "API error",
+    ),
+})
+UNEXPECTED_ERROR_MESSAGE = "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente."
+
+# Token budget for the chat history sent with each turn
+HISTORY_MAX_TOKENS = 6000
+
+# Encoding used to count history tokens. Loaded off the event loop at startup
+# (tiktoken may download its BPE file); until then trim_history estimates.
+_token_encoding: Optional[tiktoken.Encoding] = None
+
+
+def get_llm(temperature: float = 0.7, json_mode: bool = False, cache_key: Optional[str] = None):
     """
     Get configured LLM instance with retry and timeout.
     Supports both OpenAI and Google Gemini providers.
     
+    Instances are shared per (provider, model, temperature, json_mode), so
+    agents reuse one client and its warm HTTP connection pool.
+    
     Args:
         temperature: Temperature for generation (0-1)
+        json_mode: Constrain final answers to a JSON object (OpenAI only)
+        cache_key: Prompt-cache routing key (see with_prompt_cache_key)
     
     Returns:
-        LLM instance (ChatOpenAI or ChatGoogleGenerativeAI)
+        LLM instance (ChatOpenAI or ChatGoogleGenerativeAI), bound to the
+        cache key when one is given
     """
-    provider = settings.LLM_PROVIDER.lower()
-    
+    llm = _build_llm(
+        settings.LLM_PROVIDER.lower(),
+        settings.OPENAI_MODEL,
+        settings.GOOGLE_MODEL,
+        round(temperature, 2),
+        json_mode,
+    )
+    if cache_key:
+        return with_prompt_cache_key(llm, cache_key)
+    return llm
+
+
+@lru_cache(maxsize=8)
+def _build_llm(provider: str, openai_model: str, google_model: str, temperature: float, json_mode: bool = False):
+    """Create the LLM client for get_llm (memoized)"""
     if provider == "google":
         if not settings.GOOGLE_API_KEY:
             logger.warning("Google API Key not found, checking OpenAI...")
         else:
-            logger.info(f"Using Google Gemini model: {settings.GOOGLE_MODEL}")
+            logger.info(f"Using Google Gemini model: {google_model}")
             return ChatGoogleGenerativeAI(
-                model=settings.GOOGLE_MODEL,
+                model=google_model,
                 temperature=temperature,
                 google_api_key=settings.GOOGLE_API_KEY,
-                max_retries=3,
+                max_retries=LLM_SDK_MAX_RETRIES,
             )
             
     # Default to OpenAI
-    logger.info(f"Using OpenAI model: {settings.OPENAI_MODEL}")
+    logger.info(f"Using OpenAI model: {openai_model}")
     return ChatOpenAI(
-        model=settings.OPENAI_MODEL,
+        model=openai_model,
         temperature=temperature,
         openai_api_key=settings.OPENAI_API_KEY,
-        max_retries=3,
+        max_retries=LLM_SDK_MAX_RETRIES,
         request_timeout=60,
         max_tokens=2000,
+        model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {},
     )
 
+
+def parse_json_output(text: str) -> Optional[Any]:
+    """
+    Parse a JSON answer from an agent, tolerating markdown fences and
+    surrounding prose.
+
+    Args:
+        text: Agent output
+
+    Returns:
+        Parsed JSON value, or None if no JSON object could be parsed
+    """
+    if not text:
+        return None
+    candidate = text.strip()
+    if candidate.startswith("```"):
+        candidate = candidate.strip("`")
+        if candidate.startswith("json"):
+            candidate = candidate[4:]
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        pass
+
+    start, end = candidate.find("{"), candidate.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(candidate[start:end + 1])
+    except ValueError:
+        return None
+
+
+def with_prompt_cache_key(llm, cache_key: str):
+    """
+    Pin OpenAI prompt-cache routing for an LLM.
+
+    Requests sharing a cache key are routed together, so a stable system
+    prompt prefix keeps hitting the provider's prompt cache. Keys should be
+    as coarse as the shared prefix: per-turn data (funnel stage, user info)
+    lives after the system prompt, so splitting keys by it would only spread
+    one prefix across more machines. Other providers are returned unchanged.
+    
+    Args:
+        llm: LLM instance from get_llm
+        cache_key: Routing key (e.g. "tenant:<id>:agent:sales")
+    
+    Returns:
+        LLM runnable
+    """
+    if isinstance(llm, ChatOpenAI):
+        return llm.bind(extra_body={"prompt_cache_key": cache_key})
+    return llm
+
+
+def _bounded_put(cache: Dict, key: Any, value: Any) -> None:
+    """Store value, evicting the oldest entry once the cache is full"""
+    if len(cache) >= _CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+def build_agent_prompt(
+    system_prompt: str,
+    dynamic_context: bool = True,
+    chat_history: bool = True,
+) -> ChatPromptTemplate:
+    """
+    Build (or reuse) the ChatPromptTemplate for an agent.
+
+    Messages are ordered from most to least stable so the provider's prompt
+    cache (which matches on prefixes) covers as much as possible: the static
+    system prompt, then the append-only chat history, then the per-turn
+    dynamic_context message, the new input and the scratchpad. Putting the
+    dynamic context before the history would cut the cached prefix at the
+    system prompt every turn.
+    
+    Args:
+        system_prompt: Static system prompt
+        dynamic_context: Include a {dynamic_context} system message
+        chat_history: Include the optional chat_history placeholder
+    
+    Returns:
+        ChatPromptTemplate
+    """
+    key = (system_prompt, dynamic_context, chat_history)
+    prompt = _PROMPT_CACHE.get(key)
+    if prompt is None:
+        messages = [("system", system_prompt)]
+        if chat_history:
+            messages.append(_CHAT_HISTORY_PLACEHOLDER)
+        if dynamic_context:
+            messages.append(("system", "{dynamic_context}"))
+        messages.extend([
+            ("human", "{input}"),
+            _AGENT_SCRATCHPAD_PLACEHOLDER,
+        ])
+        prompt = ChatPromptTemplate.from_messages(messages)
+        _bounded_put(_PROMPT_CACHE, key, prompt)
+    return prompt
+
+
+def get_functions_agent(
+    llm,
+    tools: Sequence[BaseTool],
+    system_prompt: str,
+    scope: str,
+    dynamic_context: bool = True,
+    chat_history: bool = True,
+) -> Runnable:
+    """
+    Get (or create) an OpenAI functions agent runnable.
+
+    With PARALLEL_TOOL_CALLS_ENABLED the agent uses the OpenAI tools API
+    instead, so the model can request several independent tools in one step
+    (one LLM round-trip instead of one per tool).
+
+    Args:
+        llm: LLM runnable
+        tools: Agent tools (only their schemas are captured)
+        system_prompt: Static system prompt
+        scope: Cache scope, e.g. "tenant:<id>:agent:sales"
+        dynamic_context: Include a {dynamic_context} system message
+        chat_history: Include the optional chat_history placeholder
+    
+    Returns:
+        Agent runnable
+    """
+    key = (scope, system_prompt, dynamic_context, chat_history, tuple(tool.name for tool in tools))
+    agent = _AGENT_CACHE.get(key)
+    if agent is None:
+        llm = llm.with_retry(
+            retry_if_exception_type=LLM_STEP_RETRY_EXCEPTIONS,
+            wait_exponential_jitter=True,
+            stop_after_attempt=LLM_STEP_MAX_ATTEMPTS,
+        )
+        prompt = build_agent_prompt(system_prompt, dynamic_context, chat_history)
+        if settings.PARALLEL_TOOL_CALLS_ENABLED:
+            agent = _create_tools_agent(llm, tools, prompt)
+        else:
+            agent = create_openai_functions_agent(llm=llm, tools=tools, prompt=prompt)
+        _bounded_put(_AGENT_CACHE, key, agent)
+    return agent
+
+
+def _create_tools_agent(llm: Runnable, tools: Sequence[BaseTool], prompt: ChatPromptTemplate) -> Runnable:
+    """
+    Build an OpenAI tools agent (several tool calls per step).
+
+    Same pipeline as langchain's create_openai_tools_agent, but binds the tool
+    schemas with bind() so it works on the retry-wrapped LLM.
+    """
+    llm_with_tools = llm.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+    return (
+        RunnablePassthrough.assign(
+            agent_scratchpad=lambda x: format_to_openai_tool_messages(x["intermediate_steps"])
+        )
+        | prompt
+        | llm_with_tools
+        | OpenAIToolsAgentOutputParser()
+    )
+
+
+def serialize_session_tools(tools: Sequence[BaseTool]) -> List[BaseTool]:
+    """
+    Make tools that share a database session safe to run concurrently.
+
+    AgentExecutor runs the tool calls of one step with asyncio.gather, but an
+    AsyncSession can't serve concurrent operations. Tools are wrapped so only
+    one session-bound call runs at a time; tools marked
+    ``metadata={"parallel_safe": True}`` (no session access) run freely.
+
+    Args:
+        tools: Tools bound to the current request's session
+
+    Returns:
+        Tools safe for concurrent tool calls
+    """
+    lock = asyncio.Lock()
+
+    def locked(coroutine):
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            async with lock:
+                return await coroutine(*args, **kwargs)
+        return run
+
+    guarded = []
+    for tool in tools:
+        if (tool.metadata or {}).get("parallel_safe") or not isinstance(tool, StructuredTool) or tool.coroutine is None:
+            guarded.append(tool)
+            continue
+        guarded.append(StructuredTool.from_function(
+            coroutine=locked(tool.coroutine),
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            metadata=tool.metadata,
+        ))
+    return guarded
+
+
+def build_agent_executor(agent: Runnable, tools: List[BaseTool], **overrides: Any) -> AgentExecutor:
+    """
+    Create an AgentExecutor with the shared agent configuration.
+
+    Args:
+        agent: Agent runnable
+        tools: Tools bound to the current request's session
+        **overrides: AgentExecutor options to override
+    
+    Returns:
+        AgentExecutor
+    """
+    if settings.PARALLEL_TOOL_CALLS_ENABLED:
+        tools = serialize_session_tools(tools)
+    if overrides:
+        return AgentExecutor(agent=agent, tools=tools, **{**AGENT_EXECUTOR_DEFAULTS, **overrides})
+    return AgentExecutor(agent=agent, tools=tools, **AGENT_EXECUTOR_DEFAULTS)
+
+
+async def run_executor(
+    agent_executor: AgentExecutor,
+    agent_input: Dict[str, Any],
+    *,
+    log_context: str,
+    return_intermediate_steps: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run one agent turn and shape the result.
+
+    Args:
+        agent_executor: Agent executor
+        agent_input: Executor input
+        log_context: What is being run, for logs (e.g. "sales agent for conversation <id>")
+        return_intermediate_steps: Include the tool-call log in the result
+    
+    Returns:
+        Dict with output and intermediate_steps (empty tuple when not requested)
+    """
+    logger.info(f"Invoking {log_context}")
+    result = await agent_executor.ainvoke(agent_input)
+    logger.info(f"Response generated: {log_context}")
+
+    return {
+        "output": result.get("output", ""),
+        "intermediate_steps": result.get("intermediate_steps", []) if return_intermediate_steps else (),
+    }
+
+
+def agent_error_response(
+    error: Exception,
+    agent_name: str,
+    error_responses: Mapping[type, tuple] = AGENT_ERROR_RESPONSES,
+    unexpected_message: str = UNEXPECTED_ERROR_MESSAGE,
+) -> Dict[str, Any]:
+    """
+    Build the agent response for an exception raised during a turn.
+
+    Walks the exception's MRO so subclasses (e.g. RateLimitError is an
+    APIError) resolve to the most specific registered handler.
+
+    Args:
+        error: Exception raised while running the agent
+        agent_name: Agent name for logs (e.g. "sales agent")
+        error_responses: User-facing message and log label per exception class
+        unexpected_message: User-facing message for unregistered exceptions
+
+    Returns:
+        Response dict with user-facing output and error detail
+    """
+    for error_type in type(error).__mro__:
+        if error_type in error_responses:
+            output, label = error_responses[error_type]
+            logger.error(f"{label} in {agent_name}: {error}")
+            # Built-in errors (e.g. PermissionError) carry a readable message as-is
+            if error_type.__module__ == "builtins":
+                error_detail = str(error)
+            else:
+                error_detail = f"{error_type.__name__}: {str(error)}"
+            return {"output": output, "error": error_detail}
+
+    logger.error(f"Unexpected error in {agent_name}: {error}", exc_info=True)
+    return {"output": unexpected_message, "error": str(error)}
+
+
+async def stream_agent_events(
+    agent_executor: AgentExecutor,
+    agent_input: Dict[str, Any],
+    *,
+    return_intermediate_steps: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run an agent executor, yielding answer tokens as the LLM produces them.
+
+    Yields ``{"type": "token", "content": ...}`` for each streamed text chunk
+    (function-call chunks carry no content and are skipped), then one
+    ``{"type": "final", "output": ..., "intermediate_steps": ...}`` with the
+    executor result.
+
+    Args:
+        agent_executor: Agent executor
+        agent_input: Executor input
+        return_intermediate_steps: Include the tool-call log in the final event
+    
+    Yields:
+        Stream events
+    """
+    result: Dict[str, Any] = {}
+    async for event in agent_executor.astream_events(agent_input, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if content:
+                yield {"type": "token", "content": content}
+        elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+            result = event["data"].get("output") or {}
+
+    yield {
+        "type": "final",
+        "output": result.get("output", ""),
+        "intermediate_steps": result.get("intermediate_steps", []) if return_intermediate_steps else (),
+    }
+
+
+def _get_token_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Non-OpenAI model names (e.g. Gemini): close enough for budgeting
+        return tiktoken.get_encoding("cl100k_base")
+
+
+async def load_token_encoding() -> None:
+    """Load the history token encoding in a worker thread (call once at startup)"""
+    global _token_encoding
+    _token_encoding = await asyncio.to_thread(_get_token_encoding, settings.OPENAI_MODEL)
+
+
+def _count_tokens(message: BaseMessage, encoding) -> int:
+    """Approximate tokens used by a message (content plus per-message overhead)"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if encoding is None:
+        return len(content) // 4 + 4
+    return len(encoding.encode(content)) + 4
+
+
+def trim_history(
+    messages: Optional[List[BaseMessage]],
+    max_tokens: int = HISTORY_MAX_TOKENS,
+) -> List[BaseMessage]:
+    """
+    Keep the most recent chat history that fits the token budget.
+
+    Drops the oldest messages and never rewrites the ones kept, so the history
+    stays append-only between turns (prefix friendly for provider caching).
+    The kept history always starts at a user message.
+
+    Args:
+        messages: Chat history, oldest first
+        max_tokens: Token budget for the history
+    
+    Returns:
+        Trimmed history, oldest first
+    """
+    if not messages:
+        return []
+
+    encoding = _token_encoding
+    kept: List[BaseMessage] = []
+    total = 0
+    for message in reversed(messages):
+        total += _count_tokens(message, encoding)
+        if total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+
+    # Don't open the history with an orphaned assistant reply
+    while kept and not isinstance(kept[0], HumanMessage):
+        kept.pop(0)
+
+    if len(kept) < len(messages):
+        logger.debug(f"Trimmed chat history from {len(messages)} to {len(kept)} messages")
+    return kept
@@ -1,26 +1,32 @@
 """Sales Agent implementation"""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from uuid import UUID
-from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.tools import BaseTool
-from langchain_core.exceptions import OutputParserException
+from langchain.agents import AgentExecutor
 from langchain_core.messages import BaseMessage
-from openai import RateLimitError, APIError, APITimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.base import get_llm
+from app.agents.base import (
+    get_llm,
+    get_functions_agent,
+    build_agent_executor,
+    stream_agent_events,
+    run_executor,
+    agent_error_response,
+    RETURN_INTERMEDIATE_STEPS,
+    trim_history,
+)
 from app.tools import create_sales_tools
 from app.tools.tenant_tools import TenantToolRegistry
-from app.services.prompt_service import PromptService
+from app.services.prompt_service import prompt_service
 from app.services.tenant_prompt_service import tenant_prompt_service
 from app.core.knowledge import PLANS_SUMMARY
 from app.utils.logger import logger
 
-
 class SalesAgent:
     """Sales Agent for coworking sales (supports multi-tenant)"""
 
+    LLM_TEMPERATURE = 0.7
+
     def __init__(self, db: AsyncSession, tenant_id: Optional[UUID] = None):
         """
         Initialize Sales Agent.
@@ -31,7 +37,8 @@ class SalesAgent:
         """
         self.db = db
         self.tenant_id = tenant_id
-        self.llm = get_llm(temperature=0.7)
+        self.cache_scope = f"tenant:{tenant_id or 'default'}:agent:sales"
+        self.llm = get_llm(temperature=self.LLM_TEMPERATURE, cache_key=self.cache_scope)
 
         # Use tenant-aware tools if tenant_id provided, else use legacy tools
         if tenant_id:
@@ -43,18 +50,19 @@ class SalesAgent:
             self.tools = create_sales_tools(db)
             self.tool_registry = None
 
-        self.agent_executor = None
+        self.agent_executors: Dict[bool, AgentExecutor] = {}
+        self._executor_system_prompt = None
     
-    async def _create_prompt(
+    async def _get_system_prompt(
         self,
         user_name: str = None,
         work_type: str = None,
         conversation_summary: str = None,
         funnel_stage: str = "awareness",
         conversation_id: str = None,
-    ) -> ChatPromptTemplate:
+    ) -> str:
         """
-        Create prompt template for sales agent.
+        Get system prompt text for sales agent.
 
         Args:
             user_name: User's name
@@ -64,12 +72,12 @@ class SalesAgent:
             conversation_id: Conversation ID
 
         Returns:
-            ChatPromptTemplate
+            System prompt with variables injected
         """
         # Get system prompt based on mode (tenant or legacy)
         if self.tenant_id:
             # Multi-tenant mode: use tenant-specific prompts
-            plans_summary = "Carregando planos..."  # TODO: Get from tenant plans
+            plans_summary = await tenant_prompt_service.get_plans_summary(self.db, self.tenant_id)
             system_prompt = await tenant_prompt_service.get_sales_prompt(
                 db=self.db,
                 tenant_id=self.tenant_id,
@@ -83,7 +91,6 @@ class SalesAgent:
         else:
             # Single-tenant mode: use legacy prompts
             plans_summary = PLANS_SUMMARY
-            prompt_service = PromptService()
             system_prompt = prompt_service.get_sales_prompt(
                 user_name=user_name,
                 work_type=work_type,
@@ -93,14 +100,135 @@ class SalesAgent:
                 conversation_id=conversation_id,
             )
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        return system_prompt
+
+    async def prewarm(self) -> None:
+        """
+        Build this agent's shared runnable ahead of the first request.
+
+        Uses the base (per-turn-free) system prompt, so the runnable lands in
+        the same agent cache that invoke/astream read from.
+        """
+        system_prompt = await self._get_system_prompt()
+        # Chat turns persist tool calls, so they use this executor
+        await self._get_agent_executor(system_prompt, return_intermediate_steps=True)
+
+    async def _get_agent_executor(self, system_prompt: str, return_intermediate_steps: bool) -> AgentExecutor:
+        """
+        Get the agent executor, building it only when the system prompt changes
+        (one executor per output mode).
+
+        The agent runnable (prompt + function schemas) is shared across
+        requests; only the executor, which holds this request's
+        session-bound tools, is built per agent.
+
+        Args:
+            system_prompt: Current system prompt
+            return_intermediate_steps: Whether the executor returns the tool-call log
+
+        Returns:
+            AgentExecutor
+        """
+        if self._executor_system_prompt != system_prompt:
+            self.agent_executors.clear()
+            self._executor_system_prompt = system_prompt
+        elif return_intermediate_steps in self.agent_executors:
+            return self.agent_executors[return_intermediate_steps]
+
+        # Get tools (for tenant mode, create them once per agent)
+        if self.tools is None:
+            self.tools = await self.tool_registry.get_all_tools()
+
+        agent = get_functions_agent(self.llm, self.tools, system_prompt, self.cache_scope)
+        self.agent_executors[return_intermediate_steps] = build_agent_executor(
+            agent,
+            self.tools,
+            return_intermediate_steps=return_intermediate_steps,
+        )
+
+        return self.agent_executors[return_intermediate_steps]
+
+    def _get_dynamic_context(
+        self,
+        user_name: str = None,
+        work_type: str = None,
+        conversation_summary: str = None,
+        funnel_stage: str = "awareness",
+        conversation_id: str = None,
+    ) -> str:
+        """
+        Get per-turn context for sales agent.
+
+        Args:
+            user_name: User's name
+            work_type: Type of work
+            conversation_summary: Conversation summary
+            funnel_stage: Current funnel stage
+            conversation_id: Conversation ID
+
+        Returns:
+            Context block sent after the system prompt
+        """
+        service = tenant_prompt_service if self.tenant_id else prompt_service
+        return service.get_sales_context(
+            user_name=user_name,
+            work_type=work_type,
+            conversation_summary=conversation_summary,
+            funnel_stage=funnel_stage,
+            conversation_id=conversation_id,
+        )
+    
+    async def _prepare_turn(
+        self,
+        message: str,
+        conversation_id: str,
+        user_name: str = None,
+        work_type: str = None,
+        conversation_summary: str = None,
+        funnel_stage: str = "awareness",
+        chat_history: Optional[List[BaseMessage]] = None,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
+    ) -> Tuple[AgentExecutor, Dict[str, Any]]:
+        """
+        Get the executor and input for one conversation turn.
+
+        Args:
+            message: User message
+            conversation_id: Conversation ID
+            user_name: User's name
+            work_type: Type of work
+            conversation_summary: Conversation summary
+            funnel_stage: Current funnel stage
+            chat_history: Previous messages
+            return_intermediate_steps: Whether the executor returns the tool-call log
+
+        Returns:
+            (agent executor, agent input)
+        """
+        # Get system prompt with current context
+        system_prompt = await self._get_system_prompt(
+            user_name=user_name,
+            work_type=work_type,
+            conversation_summary=conversation_summary,
+            funnel_stage=funnel_stage,
+            conversation_id=conversation_id,
+        )
+        agent_executor = await self._get_agent_executor(system_prompt, return_intermediate_steps)
 
-        return prompt
+        # Prepare input
+        agent_input = {
+            "input": message,
+            "dynamic_context": self._get_dynamic_context(
+                user_name=user_name,
+                work_type=work_type,
+                conversation_summary=conversation_summary,
+                funnel_stage=funnel_stage,
+                conversation_id=conversation_id,
+            ),
+            "chat_history": trim_history(chat_history),
+        }
+
+        return agent_executor, agent_input
     
     async def invoke(
         self,
@@ -112,6 +240,7 @@ class SalesAgent:
         conversation_summary: str = None,
         funnel_stage: str = "awareness",
         chat_history: Optional[List[BaseMessage]] = None,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
     ) -> Dict[str, Any]:
         """
         Invoke sales agent with a message
@@ -125,96 +254,81 @@ class SalesAgent:
             conversation_summary: Conversation summary
             funnel_stage: Current funnel stage
             chat_history: Previous messages
+            return_intermediate_steps: Include the tool-call log in the response
         
         Returns:
             Agent response
         """
         try:
-            # Get tools (for tenant mode, create them here)
-            if self.tenant_id:
-                tools = await self.tool_registry.get_all_tools()
-            else:
-                tools = self.tools
-
-            # Create prompt with current context
-            prompt = await self._create_prompt(
+            agent_executor, agent_input = await self._prepare_turn(
+                message=message,
+                conversation_id=conversation_id,
                 user_name=user_name,
                 work_type=work_type,
                 conversation_summary=conversation_summary,
                 funnel_stage=funnel_stage,
-                conversation_id=conversation_id,
-            )
-
-            # Create agent
-            agent = create_openai_functions_agent(
-                llm=self.llm,
-                tools=tools,
-                prompt=prompt,
+                chat_history=chat_history,
+                return_intermediate_steps=return_intermediate_steps,
             )
             
-            # Create executor with optimized configuration
-            from app.core.config import settings
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=tools,
-                verbose=settings.APP_ENV == "development",  # Verbose apenas em desenvolvimento
-                max_iterations=15,  # Aumentar limite de iterações
-                max_execution_time=120,  # Timeout de 2 minutos
-                early_stopping_method="generate",  # Parar graciosamente
-                handle_parsing_errors=True,  # Tratar erros de parsing automaticamente
-                return_intermediate_steps=True,
+            return await run_executor(
+                agent_executor,
+                agent_input,
+                log_context=f"sales agent for conversation {conversation_id}",
+                return_intermediate_steps=return_intermediate_steps,
             )
-            
-            # Prepare input
-            agent_input = {
-                "input": message,
-                "chat_history": chat_history or [],
-            }
-            
-            # Invoke agent
-            logger.info(f"Invoking sales agent for conversation {conversation_id}")
-            result = await agent_executor.ainvoke(agent_input)
-            
-            logger.info(f"Sales agent response generated for conversation {conversation_id}")
-            
-            return {
-                "output": result.get("output", ""),
-                "intermediate_steps": result.get("intermediate_steps", []),
-            }
-        
-        except OutputParserException as e:
-            logger.error(f"Output parsing error in sales agent: {e}")
-            return {
-                "output": "Desculpe, tive dificuldade em processar a resposta. Pode reformular sua pergunta?",
-                "error": f"OutputParserException: {str(e)}"
-            }
         
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded in sales agent: {e}")
-            return {
-                "output": "Estamos com muitas requisições no momento. Por favor, aguarde alguns segundos e tente novamente.",
-                "error": f"RateLimitError: {str(e)}"
-            }
+        except Exception as e:
+            return agent_error_response(e, "sales agent")
+
+    async def astream(
+        self,
+        message: str,
+        conversation_id: str,
+        user_id: str,
+        user_name: str = None,
+        work_type: str = None,
+        conversation_summary: str = None,
+        funnel_stage: str = "awareness",
+        chat_history: Optional[List[BaseMessage]] = None,
+        return_intermediate_steps: bool = RETURN_INTERMEDIATE_STEPS,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Invoke sales agent, streaming the answer as it is generated
         
-        except APITimeoutError as e:
-            logger.error(f"API timeout in sales agent: {e}")
-            return {
-                "output": "A requisição demorou muito para processar. Por favor, tente novamente.",
-                "error": f"APITimeoutError: {str(e)}"
-            }
+        Args:
+            message: User message
+            conversation_id: Conversation ID
+            user_id: User ID
+            user_name: User's name
+            work_type: Type of work
+            conversation_summary: Conversation summary
+            funnel_stage: Current funnel stage
+            chat_history: Previous messages
+            return_intermediate_steps: Include the tool-call log in the final event
         
-        except APIError as e:
-            logger.error(f"OpenAI API error in sales agent: {e}")
-            return {
-                "output": "Ocorreu um erro temporário com nosso serviço de IA. Por favor, tente novamente em alguns instantes.",
-                "error": f"APIError: {str(e)}"
-            }
+        Yields:
+            Token events, then a final event with the same fields as invoke's result
+        """
+        try:
+            agent_executor, agent_input = await self._prepare_turn(
+                message=message,
+                conversation_id=conversation_id,
+                user_name=user_name,
+                work_type=work_type,
+                conversation_summary=conversation_summary,
+                funnel_stage=funnel_stage,
+                chat_history=chat_history,
+                return_intermediate_steps=return_intermediate_steps,
+            )
             
+            logger.info(f"Streaming sales agent for conversation {conversation_id}")
+            async for event in stream_agent_events(
+                agent_executor,
+                agent_input,
+                return_intermediate_steps=return_intermediate_steps,
+            ):
+                yield event
+        
         except Exception as e:
-            logger.error(f"Unexpected error invoking sales agent: {e}", exc_info=True)
-            return {
-                "output": "Desculpe, ocorreu um erro ao processar sua mensagem. Por favor, tente novamente.",
-                "error": str(e)
-            }
-
-
+            yield {"type": "final", **agent_error_response(e, "sales agent")}
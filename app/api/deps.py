@@ -1,10 +1,12 @@
 """API dependencies"""
 from typing import AsyncGenerator
 from uuid import UUID
-from fastapi import Request, HTTPException
+from fastapi import Depends, Query, Request, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import AsyncSessionLocal
+from app.core.database import AsyncSessionLocal, AsyncReadSessionLocal
 from app.models import Tenant
+from app.models.user import User
+from app.services.auth_service import get_admin_user_by_key
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -20,12 +22,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def get_current_tenant(request: Request) -> Tenant:
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting a database session for read-only endpoints.
+
+    Statements run in autocommit mode, so there is no transaction to commit
+    or roll back when the request ends.
+    """
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def get_current_tenant(request: Request) -> Tenant:
     """
     Dependency to get current tenant from request state.
 
-    The tenant is injected by TenantMiddleware.
-    This dependency makes the tenant available to route handlers.
+    The tenant is injected by TenantMiddleware, which loads it once per
+    request. This is a plain attribute read, so it is synchronous.
     """
     if not hasattr(request.state, "tenant"):
         raise HTTPException(
@@ -36,7 +49,7 @@ async def get_current_tenant(request: Request) -> Tenant:
     return request.state.tenant
 
 
-async def get_tenant_id(request: Request) -> UUID:
+def get_tenant_id(request: Request) -> UUID:
     """
     Dependency to get current tenant ID from request state.
 
@@ -50,3 +63,29 @@ async def get_tenant_id(request: Request) -> UUID:
 
     return request.state.tenant_id
 
+
+
+async def get_admin_user(
+    request: Request,
+    user_key: str = Query(..., description="User key for admin verification"),
+    db: AsyncSession = Depends(get_db_readonly),
+) -> User:
+    """
+    Dependency to get the admin user identified by the user_key query parameter.
+
+    The lookup is scoped to the request's tenant (when TenantMiddleware set
+    one); the admin decision is cached by the auth service.
+
+    Raises:
+        HTTPException: 404 if the user doesn't exist, 403 if not an admin
+    """
+    tenant_id = getattr(request.state, "tenant_id", None)
+    try:
+        user = await get_admin_user_by_key(db, user_key, tenant_id)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user
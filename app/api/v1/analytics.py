@@ -1,15 +1,13 @@
 """Analytics API endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from typing import Optional
 
-from app.api.deps import get_db
-from app.schemas.analytics import AnalyzeRequest, FunnelMetrics, PlanPerformanceResponse
+from app.api.deps import get_db, get_db_readonly, get_admin_user
+from app.schemas.analytics import AnalyzeRequest, AnalyzeBatchRequest, FunnelMetrics, PlanPerformanceResponse
 from app.agents.analyst_agent import AnalystAgent
 from app.tools.analytics_tools import get_funnel_metrics, get_plan_performance
 from app.models.user import User
-from app.services.auth_service import is_admin_user
 from app.utils.logger import logger
 
 router = APIRouter()
@@ -18,7 +16,7 @@ router = APIRouter()
 @router.post("/analytics/analyze")
 async def analyze_conversation(
     request: AnalyzeRequest,
-    user_key: str = Query(..., description="User key for admin verification"),
+    user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -30,16 +28,6 @@ async def analyze_conversation(
     Returns detailed analysis with insights and recommendations
     """
     try:
-        # Get user and verify admin access
-        result = await db.execute(select(User).where(User.user_key == user_key))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if not is_admin_user(user):
-            raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
-        
         analyst_agent = AnalystAgent(db, user)
         
         result = await analyst_agent.analyze_conversation(
@@ -57,9 +45,43 @@ async def analyze_conversation(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analytics/analyze/batch")
+async def analyze_conversations_batch(
+    request: AnalyzeBatchRequest,
+    user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Analyze several conversations concurrently using AI (Admin only)
+    
+    - **conversation_ids**: Conversation IDs to analyze
+    - **max_concurrency**: Maximum analyses running at once
+    - **user_key**: User key for admin verification
+    
+    Returns one analysis per conversation, in request order
+    """
+    try:
+        analyst_agent = AnalystAgent(db, user)
+        
+        results = await analyst_agent.analyze_conversations_batch(
+            conversation_ids=[str(cid) for cid in request.conversation_ids],
+            max_concurrency=request.max_concurrency
+        )
+        
+        return {"results": results}
+        
+    except HTTPException:
+        raise
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in batch analyze endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/analytics/funnel")
 async def get_funnel_analytics(
-    user_key: str = Query(..., description="User key for admin verification"),
+    user: User = Depends(get_admin_user),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     db: AsyncSession = Depends(get_db)
@@ -74,16 +96,6 @@ async def get_funnel_analytics(
     Returns funnel metrics with conversion rates and AI insights
     """
     try:
-        # Get user and verify admin access
-        result = await db.execute(select(User).where(User.user_key == user_key))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if not is_admin_user(user):
-            raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
-        
         # Get raw metrics
         metrics = await get_funnel_metrics(db, start_date, end_date, user)
         
@@ -107,8 +119,8 @@ async def get_funnel_analytics(
 
 @router.get("/analytics/plans-performance")
 async def get_plans_performance(
-    user_key: str = Query(..., description="User key for admin verification"),
-    db: AsyncSession = Depends(get_db)
+    user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Get performance metrics for each plan (Admin only)
@@ -118,16 +130,6 @@ async def get_plans_performance(
     Returns interest counts, conversion counts, and conversion rates per plan
     """
     try:
-        # Get user and verify admin access
-        result = await db.execute(select(User).where(User.user_key == user_key))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if not is_admin_user(user):
-            raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
-        
         result = await get_plan_performance(db, user)
         return result
         
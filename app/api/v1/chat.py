@@ -1,16 +1,39 @@
 """Chat API endpoints"""
+import asyncio
+import json
+import traceback
+from typing import AsyncIterator, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.api.deps import get_db, get_tenant_id
 from app.core.config import settings
-from app.schemas.chat import ChatRequest, ChatResponse
+from app.core.database import AsyncSessionLocal
+from app.schemas.chat import ChatRequest, ChatResponse, ChatBatchRequest, ChatBatchResponse, ChatBatchError
 from app.services.chat_service import ChatService
 from app.utils.logger import logger
 
 router = APIRouter()
 
+# Include tracebacks in error responses only in development
+_IS_DEV = settings.APP_ENV == "development"
+
+
+def _request_tenant_id(http_request: Request) -> Optional[UUID]:
+    """
+    Get the tenant for ChatService: the middleware's tenant in multi-tenant
+    mode, None (single-tenant, backward compatible) otherwise.
+    """
+    if settings.MULTI_TENANT_ENABLED:
+        tenant_id = get_tenant_id(http_request)
+        logger.info(f"Using ChatService (multi-tenant mode) for tenant: {tenant_id}")
+        return tenant_id
+    
+    logger.info("Using ChatService (single-tenant mode)")
+    return None
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
@@ -31,16 +54,7 @@ async def chat(
     When enabled, requires X-Tenant-ID and X-API-Key headers.
     """
     try:
-        # Choose service based on multi-tenant mode
-        if settings.MULTI_TENANT_ENABLED:
-            # Multi-tenant mode: use ChatService with tenant_id from middleware
-            tenant_id = await get_tenant_id(http_request)
-            logger.info(f"Using ChatService (multi-tenant mode) for tenant: {tenant_id}")
-            chat_service = ChatService(db, tenant_id=tenant_id)
-        else:
-            # Single-tenant mode: use ChatService without tenant_id (backward compatibility)
-            logger.info("Using ChatService (single-tenant mode)")
-            chat_service = ChatService(db, tenant_id=None)
+        chat_service = ChatService(db, tenant_id=_request_tenant_id(http_request))
 
         result = await chat_service.process_message(
             message=chat_request.message,
@@ -53,9 +67,90 @@ async def chat(
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}", exc_info=True)
-        import traceback
-        error_detail = str(e)
-        if settings.APP_ENV == "development":
-            error_detail += f"\n\nTraceback:\n{traceback.format_exc()}"
+        if _IS_DEV:
+            error_detail = f"{e}\n\nTraceback:\n{traceback.format_exc()}"
+        else:
+            error_detail = str(e)
         raise HTTPException(status_code=500, detail=error_detail)
 
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(
+    batch_request: ChatBatchRequest,
+    http_request: Request,
+):
+    """
+    Send several messages to the sales agent at once
+    
+    - **requests**: Chat requests, each with the same fields as `POST /chat`
+    
+    Requests run concurrently (up to CHAT_BATCH_CONCURRENCY at a time), so they
+    should belong to different conversations. Returns one result per request, in
+    request order; a failed request yields an `error` entry instead of failing
+    the whole batch.
+    
+    Note: Multi-tenant mode is controlled by MULTI_TENANT_ENABLED setting.
+    When enabled, requires X-Tenant-ID and X-API-Key headers.
+    """
+    tenant_id = _request_tenant_id(http_request)
+    semaphore = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+
+    async def process(chat_request: ChatRequest) -> Union[ChatResponse, ChatBatchError]:
+        async with semaphore:
+            # Each request gets its own session: one AsyncSession can't serve concurrent queries
+            async with AsyncSessionLocal() as db:
+                try:
+                    chat_service = ChatService(db, tenant_id=tenant_id)
+                    result = await chat_service.process_message(
+                        message=chat_request.message,
+                        user_key=chat_request.user_key,
+                        conversation_id=str(chat_request.conversation_id) if chat_request.conversation_id else None,
+                        user_name=chat_request.user_name
+                    )
+                    await db.commit()
+                    return ChatResponse(**result)
+                except Exception as e:
+                    logger.error(f"Error in chat batch item for user {chat_request.user_key}: {e}", exc_info=True)
+                    await db.rollback()
+                    return ChatBatchError(error=str(e))
+
+    logger.info(f"Processing chat batch of {len(batch_request.requests)} requests")
+    results = await asyncio.gather(*(process(r) for r in batch_request.requests))
+    return ChatBatchResponse(results=list(results))
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    chat_request: ChatRequest,
+    http_request: Request,
+):
+    """
+    Send a message to the sales agent, streaming the answer (Server-Sent Events)
+
+    Emits `token` events with answer fragments as they are generated, then one
+    `done` event carrying the same fields as `POST /chat`, or an `error` event.
+
+    Note: Multi-tenant mode is controlled by MULTI_TENANT_ENABLED setting.
+    When enabled, requires X-Tenant-ID and X-API-Key headers.
+    """
+    tenant_id = _request_tenant_id(http_request)
+
+    async def event_stream() -> AsyncIterator[str]:
+        # The session must live as long as the stream, not the request handler
+        async with AsyncSessionLocal() as db:
+            chat_service = ChatService(db, tenant_id=tenant_id)
+            try:
+                async for event in chat_service.stream_message(
+                    message=chat_request.message,
+                    user_key=chat_request.user_key,
+                    conversation_id=str(chat_request.conversation_id) if chat_request.conversation_id else None,
+                    user_name=chat_request.user_name
+                ):
+                    event_type = event.pop("type")
+                    yield f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+            except Exception as e:
+                logger.error(f"Error in chat stream endpoint: {e}", exc_info=True)
+                await db.rollback()
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
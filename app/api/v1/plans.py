@@ -1,33 +1,72 @@
 """Plan API endpoints"""
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic.json import pydantic_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import bindparam, lambda_stmt, select
+from typing import Dict, List, Optional, Tuple
 
-from app.api.deps import get_db
+from app.api.deps import get_db_readonly
 from app.schemas.plan import PlanResponse
 from app.models.plan import Plan
 from app.utils.logger import logger
 
 router = APIRouter()
 
+# Serialized responses: cache key -> (JSON body, timestamp). Plans change rarely.
+_plans_response_cache: Dict[str, Tuple[str, float]] = {}
+PLANS_CACHE_TTL = 300  # 5 minutes
+
+# Plan lookup by slug, built and compiled once (only the slug parameter varies)
+_plan_by_slug = lambda_stmt(lambda: select(Plan).where(Plan.slug == bindparam("slug")))
+
+
+def _get_cached_response(key: str) -> Optional[Response]:
+    """Get a cached JSON response if it is still fresh"""
+    cached = _plans_response_cache.get(key)
+    if cached is not None and time.time() - cached[1] < PLANS_CACHE_TTL:
+        return Response(content=cached[0], media_type="application/json")
+    return None
+
+
+def _cache_response(key: str, payload) -> Response:
+    """Serialize a response payload once and cache the JSON body"""
+    body = json.dumps(payload, default=pydantic_encoder)
+    _plans_response_cache[key] = (body, time.time())
+    return Response(content=body, media_type="application/json")
+
+
+def _plan_payload(plan: Plan) -> dict:
+    """Validate a plan against PlanResponse and return it as a dict"""
+    return PlanResponse(**{name: getattr(plan, name) for name in PlanResponse.__fields__}).dict()
+
+
+def invalidate_plans_cache() -> None:
+    """Drop cached plan responses (call after plans are created or changed)"""
+    _plans_response_cache.clear()
+
 
 @router.get("/plans", response_model=List[PlanResponse])
 async def get_plans(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Get all available plans
     
     Returns list of all active coworking plans with details
     """
+    cached = _get_cached_response("active_plans")
+    if cached is not None:
+        return cached
+    
     try:
         result = await db.execute(
             select(Plan).where(Plan.is_active == True)
         )
         plans = result.scalars().all()
         
-        return plans
+        return _cache_response("active_plans", [_plan_payload(plan) for plan in plans])
         
     except Exception as e:
         logger.error(f"Error getting plans: {e}")
@@ -37,27 +76,28 @@ async def get_plans(
 @router.get("/plans/{slug}", response_model=PlanResponse)
 async def get_plan(
     slug: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Get plan details by slug
     
     - **slug**: Plan slug (day-pass, flex, or dedicado)
     """
+    cached = _get_cached_response(f"plan:{slug}")
+    if cached is not None:
+        return cached
+    
     try:
-        result = await db.execute(
-            select(Plan).where(Plan.slug == slug)
-        )
+        result = await db.execute(_plan_by_slug, {"slug": slug})
         plan = result.scalar_one_or_none()
         
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
         
-        return plan
+        return _cache_response(f"plan:{slug}", _plan_payload(plan))
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting plan: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -1,16 +1,24 @@
 """Tenant management API endpoints"""
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic.json import pydantic_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
-import bcrypt
+import json
+import secrets
 import uuid
 
-from app.api.deps import get_db, get_current_tenant, get_tenant_id
+from app.api.deps import get_db, get_db_readonly, get_current_tenant, get_tenant_id
+from app.api.v1.plans import invalidate_plans_cache
+from app.core import cache as response_cache
+from app.core.security import hash_api_key
+from app.middleware.tenant import invalidate_tenant_cache
 from app.models import (
     Tenant, TenantStatus, PromptTemplate, PromptType,
     KnowledgeDocument, DocumentType, Plan, BillingCycle
 )
+from app.models.tenant import tenant_by_slug
 from app.schemas.tenant import (
     TenantCreate, TenantUpdate, TenantResponse, TenantWithApiKey,
     PromptTemplateCreate, PromptTemplateResponse,
@@ -24,6 +32,42 @@ from app.utils.logger import logger
 router = APIRouter()
 
 
+def _response_columns(model, schema) -> list:
+    """Model columns matching a response schema's fields (skips ORM hydration)"""
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def _rows_json(rows) -> str:
+    """
+    Serialize column rows straight to a JSON list.
+
+    Rows come from _response_columns, so they already have the response
+    model's shape; Pydantic validation is skipped.
+    """
+    return json.dumps([dict(row) for row in rows], default=pydantic_encoder)
+
+
+# Tenant list queries, built once; executed with {"tenant_id": ...}
+_list_prompts = (
+    select(*_response_columns(PromptTemplate, PromptTemplateResponse))
+    .where(
+        PromptTemplate.tenant_id == bindparam("tenant_id"),
+        PromptTemplate.is_active == True
+    )
+    .order_by(PromptTemplate.prompt_type, PromptTemplate.version.desc())
+)
+_list_knowledge_documents = (
+    select(*_response_columns(KnowledgeDocument, KnowledgeDocumentResponse))
+    .where(KnowledgeDocument.tenant_id == bindparam("tenant_id"))
+    .order_by(KnowledgeDocument.created_at.desc())
+)
+_list_plans = (
+    select(*_response_columns(Plan, TenantPlanResponse))
+    .where(Plan.tenant_id == bindparam("tenant_id"))
+    .order_by(Plan.created_at.desc())
+)
+
+
 # ========================================
 # TENANT CRUD ENDPOINTS
 # ========================================
@@ -42,9 +86,7 @@ async def create_tenant(
     """
     try:
         # Check if slug already exists
-        result = await db.execute(
-            select(Tenant).where(Tenant.slug == tenant_data.slug)
-        )
+        result = await db.execute(tenant_by_slug, {"slug": tenant_data.slug})
         existing = result.scalar_one_or_none()
 
         if existing:
@@ -54,8 +96,8 @@ async def create_tenant(
             )
 
         # Generate API key
-        api_key = f"{tenant_data.slug[:2]}_{uuid.uuid4().hex[:32]}"
-        api_key_hash = bcrypt.hashpw(api_key.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        api_key = f"{tenant_data.slug[:2]}_{secrets.token_urlsafe(24)}"
+        api_key_hash = hash_api_key(api_key)
         api_key_prefix = api_key[:8]
 
         # Create tenant
@@ -72,15 +114,11 @@ async def create_tenant(
 
         db.add(tenant)
         await db.commit()
-        await db.refresh(tenant)
 
         logger.info(f"Created tenant: {tenant.slug} (ID: {tenant.id})")
 
         # Return with full API key
-        return TenantWithApiKey(
-            **tenant.__dict__,
-            api_key=api_key
-        )
+        return TenantWithApiKey.from_tenant(tenant, api_key)
 
     except HTTPException:
         raise
@@ -92,7 +130,7 @@ async def create_tenant(
 
 @router.get("/admin/tenants", response_model=list[TenantResponse])
 async def list_tenants(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_readonly),
     skip: int = 0,
     limit: int = 100
 ):
@@ -101,14 +139,13 @@ async def list_tenants(
     """
     try:
         result = await db.execute(
-            select(Tenant)
+            select(*_response_columns(Tenant, TenantResponse))
             .offset(skip)
             .limit(limit)
             .order_by(Tenant.created_at.desc())
         )
-        tenants = result.scalars().all()
 
-        return [TenantResponse.from_orm(tenant) for tenant in tenants]
+        return Response(content=_rows_json(result.mappings()), media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error listing tenants: {e}", exc_info=True)
@@ -118,15 +155,13 @@ async def list_tenants(
 @router.get("/admin/tenants/{tenant_slug}", response_model=TenantResponse)
 async def get_tenant(
     tenant_slug: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     Get tenant by slug (platform admin only).
     """
     try:
-        result = await db.execute(
-            select(Tenant).where(Tenant.slug == tenant_slug)
-        )
+        result = await db.execute(tenant_by_slug, {"slug": tenant_slug})
         tenant = result.scalar_one_or_none()
 
         if not tenant:
@@ -151,9 +186,7 @@ async def update_tenant(
     Update tenant (platform admin only).
     """
     try:
-        result = await db.execute(
-            select(Tenant).where(Tenant.slug == tenant_slug)
-        )
+        result = await db.execute(tenant_by_slug, {"slug": tenant_slug})
         tenant = result.scalar_one_or_none()
 
         if not tenant:
@@ -172,7 +205,11 @@ async def update_tenant(
             tenant.expires_at = tenant_data.expires_at
 
         await db.commit()
-        await db.refresh(tenant)
+
+        # Status changes must reach the middleware; name/config are injected
+        # into cached prompts
+        invalidate_tenant_cache(tenant.slug)
+        tenant_prompt_service.invalidate_cache(tenant.id)
 
         logger.info(f"Updated tenant: {tenant.slug}")
 
@@ -197,9 +234,7 @@ async def delete_tenant(
     **Warning:** This does NOT delete data - it only deactivates the tenant.
     """
     try:
-        result = await db.execute(
-            select(Tenant).where(Tenant.slug == tenant_slug)
-        )
+        result = await db.execute(tenant_by_slug, {"slug": tenant_slug})
         tenant = result.scalar_one_or_none()
 
         if not tenant:
@@ -211,6 +246,8 @@ async def delete_tenant(
 
         await db.commit()
 
+        invalidate_tenant_cache(tenant.slug)
+
         logger.info(f"Soft deleted tenant: {tenant.slug}")
 
         return {"message": f"Tenant '{tenant_slug}' deactivated successfully"}
@@ -241,37 +278,30 @@ async def update_tenant_prompt(
     """
     try:
         # Get tenant from middleware
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
         # Get max version
         result = await db.execute(
-            select(PromptTemplate.version)
+            select(func.coalesce(func.max(PromptTemplate.version), 0))
             .where(
                 PromptTemplate.tenant_id == tenant_id,
                 PromptTemplate.prompt_type == prompt_type
             )
-            .order_by(PromptTemplate.version.desc())
         )
-        max_version = result.scalar_one_or_none() or 0
+        max_version = result.scalar_one()
         new_version = max_version + 1
 
-        # Deactivate previous versions
+        # Deactivate previous versions (one UPDATE for all of them)
         await db.execute(
-            select(PromptTemplate)
+            update(PromptTemplate)
             .where(
                 PromptTemplate.tenant_id == tenant_id,
-                PromptTemplate.prompt_type == prompt_type
-            )
-        )
-        # Update is_active for all matching prompts
-        prompts_to_deactivate = await db.execute(
-            select(PromptTemplate).where(
-                PromptTemplate.tenant_id == tenant_id,
-                PromptTemplate.prompt_type == prompt_type
+                PromptTemplate.prompt_type == prompt_type,
+                PromptTemplate.is_active == True
             )
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
         )
-        for prompt in prompts_to_deactivate.scalars():
-            prompt.is_active = False
 
         # Create new version
         new_prompt = PromptTemplate(
@@ -287,10 +317,10 @@ async def update_tenant_prompt(
 
         db.add(new_prompt)
         await db.commit()
-        await db.refresh(new_prompt)
 
         # Invalidate cache
         tenant_prompt_service.invalidate_cache(tenant_id, prompt_type)
+        response_cache.bump(tenant_id, "prompts")
 
         logger.info(f"Updated prompt for tenant {tenant_id}: {prompt_type.value} v{new_version}")
 
@@ -307,25 +337,20 @@ async def update_tenant_prompt(
 @router.get("/tenants/prompts", response_model=list[PromptTemplateResponse])
 async def list_tenant_prompts(
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     List all prompts for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
-        result = await db.execute(
-            select(PromptTemplate)
-            .where(
-                PromptTemplate.tenant_id == tenant_id,
-                PromptTemplate.is_active == True
-            )
-            .order_by(PromptTemplate.prompt_type, PromptTemplate.version.desc())
-        )
-        prompts = result.scalars().all()
+        async def load() -> str:
+            result = await db.execute(_list_prompts, {"tenant_id": tenant_id})
+            return _rows_json(result.mappings())
 
-        return [PromptTemplateResponse.from_orm(prompt) for prompt in prompts]
+        body = await response_cache.get_or_set(tenant_id, "prompts", load)
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error listing prompts: {e}", exc_info=True)
@@ -346,37 +371,35 @@ async def create_knowledge_document(
     Create knowledge document for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
-        # Check if slug exists
+        # Create document; the (tenant_id, slug) unique constraint rejects duplicates
         result = await db.execute(
-            select(KnowledgeDocument).where(
-                KnowledgeDocument.tenant_id == tenant_id,
-                KnowledgeDocument.slug == doc_data.slug
+            pg_insert(KnowledgeDocument)
+            .values(
+                id=uuid.uuid4(),
+                tenant_id=tenant_id,
+                title=doc_data.title,
+                slug=doc_data.slug,
+                content=doc_data.content,
+                document_type=doc_data.document_type,
+                is_active=doc_data.is_active
             )
+            .on_conflict_do_nothing(index_elements=["tenant_id", "slug"])
+            .returning(KnowledgeDocument)
         )
-        existing = result.scalar_one_or_none()
+        document = result.scalar_one_or_none()
 
-        if existing:
+        if document is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Knowledge document with slug '{doc_data.slug}' already exists"
             )
 
-        # Create document
-        document = KnowledgeDocument(
-            id=uuid.uuid4(),
-            tenant_id=tenant_id,
-            title=doc_data.title,
-            slug=doc_data.slug,
-            content=doc_data.content,
-            document_type=doc_data.document_type,
-            is_active=doc_data.is_active
-        )
-
-        db.add(document)
         await db.commit()
-        await db.refresh(document)
+
+        tenant_prompt_service.invalidate_knowledge(tenant_id)
+        response_cache.bump(tenant_id, "knowledge")
 
         logger.info(f"Created knowledge document for tenant {tenant_id}: {doc_data.slug}")
 
@@ -393,22 +416,20 @@ async def create_knowledge_document(
 @router.get("/tenants/knowledge", response_model=list[KnowledgeDocumentResponse])
 async def list_knowledge_documents(
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     List all knowledge documents for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
-        result = await db.execute(
-            select(KnowledgeDocument)
-            .where(KnowledgeDocument.tenant_id == tenant_id)
-            .order_by(KnowledgeDocument.created_at.desc())
-        )
-        documents = result.scalars().all()
+        async def load() -> str:
+            result = await db.execute(_list_knowledge_documents, {"tenant_id": tenant_id})
+            return _rows_json(result.mappings())
 
-        return [KnowledgeDocumentResponse.from_orm(doc) for doc in documents]
+        body = await response_cache.get_or_set(tenant_id, "knowledge", load)
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error listing knowledge documents: {e}", exc_info=True)
@@ -426,31 +447,36 @@ async def update_knowledge_document(
     Update knowledge document for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
-
-        result = await db.execute(
-            select(KnowledgeDocument).where(
+        tenant_id = get_tenant_id(request)
+
+        # Update the given fields and read the row back in one statement
+        changes = doc_data.dict(exclude_none=True)
+        if changes:
+            statement = (
+                update(KnowledgeDocument)
+                .where(
+                    KnowledgeDocument.tenant_id == tenant_id,
+                    KnowledgeDocument.slug == document_slug
+                )
+                .values(**changes)
+                .returning(KnowledgeDocument)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            statement = select(KnowledgeDocument).where(
                 KnowledgeDocument.tenant_id == tenant_id,
                 KnowledgeDocument.slug == document_slug
             )
-        )
+        result = await db.execute(statement)
         document = result.scalar_one_or_none()
 
         if not document:
             raise HTTPException(status_code=404, detail=f"Knowledge document '{document_slug}' not found")
 
-        # Update fields
-        if doc_data.title is not None:
-            document.title = doc_data.title
-        if doc_data.content is not None:
-            document.content = doc_data.content
-        if doc_data.document_type is not None:
-            document.document_type = doc_data.document_type
-        if doc_data.is_active is not None:
-            document.is_active = doc_data.is_active
-
         await db.commit()
-        await db.refresh(document)
+
+        tenant_prompt_service.invalidate_knowledge(tenant_id)
+        response_cache.bump(tenant_id, "knowledge")
 
         logger.info(f"Updated knowledge document for tenant {tenant_id}: {document_slug}")
 
@@ -478,39 +504,38 @@ async def create_tenant_plan(
     Create plan/product for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
-        # Check if slug exists
+        # Create plan; the (tenant_id, slug) unique constraint rejects duplicates
         result = await db.execute(
-            select(Plan).where(
-                Plan.tenant_id == tenant_id,
-                Plan.slug == plan_data.slug
+            pg_insert(Plan)
+            .values(
+                id=uuid.uuid4(),
+                tenant_id=tenant_id,
+                name=plan_data.name,
+                slug=plan_data.slug,
+                price=plan_data.price,
+                billing_cycle=BillingCycle(plan_data.billing_cycle.lower()),
+                features=plan_data.features,
+                description=plan_data.description,
+                is_active=plan_data.is_active
             )
+            .on_conflict_do_nothing(index_elements=["tenant_id", "slug"])
+            .returning(Plan)
         )
-        existing = result.scalar_one_or_none()
+        plan = result.scalar_one_or_none()
 
-        if existing:
+        if plan is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Plan with slug '{plan_data.slug}' already exists"
             )
 
-        # Create plan
-        plan = Plan(
-            id=uuid.uuid4(),
-            tenant_id=tenant_id,
-            name=plan_data.name,
-            slug=plan_data.slug,
-            price=plan_data.price,
-            billing_cycle=BillingCycle(plan_data.billing_cycle.lower()),
-            features=plan_data.features,
-            description=plan_data.description,
-            is_active=plan_data.is_active
-        )
-
-        db.add(plan)
         await db.commit()
-        await db.refresh(plan)
+
+        tenant_prompt_service.invalidate_plans_summary(tenant_id)
+        invalidate_plans_cache()
+        response_cache.bump(tenant_id, "plans")
 
         logger.info(f"Created plan for tenant {tenant_id}: {plan_data.slug}")
 
@@ -539,37 +564,21 @@ async def create_tenant_plan(
 @router.get("/tenants/plans", response_model=list[TenantPlanResponse])
 async def list_tenant_plans(
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """
     List all plans for current tenant.
     """
     try:
-        tenant_id = await get_tenant_id(request)
+        tenant_id = get_tenant_id(request)
 
-        result = await db.execute(
-            select(Plan)
-            .where(Plan.tenant_id == tenant_id)
-            .order_by(Plan.created_at.desc())
-        )
-        plans = result.scalars().all()
-
-        return [
-            TenantPlanResponse(
-                id=plan.id,
-                tenant_id=plan.tenant_id,
-                name=plan.name,
-                slug=plan.slug,
-                price=float(plan.price),
-                billing_cycle=plan.billing_cycle.value,
-                features=plan.features,
-                description=plan.description,
-                is_active=plan.is_active,
-                created_at=plan.created_at,
-                updated_at=plan.updated_at
-            )
-            for plan in plans
-        ]
+        async def load() -> str:
+            result = await db.execute(_list_plans, {"tenant_id": tenant_id})
+            # Decimal prices and enum billing cycles encode as float/value
+            return _rows_json(result.mappings())
+
+        body = await response_cache.get_or_set(tenant_id, "plans", load)
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error listing plans: {e}", exc_info=True)
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_db_readonly
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.models.user import User, WorkType
 from app.utils.logger import logger
@@ -53,7 +53,6 @@ async def create_user(
         
         db.add(user)
         await db.commit()
-        await db.refresh(user)
         
         logger.info(f"Created user: {user.user_key}")
         
@@ -70,7 +69,7 @@ async def create_user(
 @router.get("/users/{user_key}", response_model=UserResponse)
 async def get_user(
     user_key: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """Get user by user_key"""
     try:
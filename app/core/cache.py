@@ -0,0 +1,67 @@
+"""In-process response cache for tenant-scoped list endpoints"""
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+# (tenant_id, domain) -> revision; bumped by every write to that domain
+_revisions: Dict[Tuple[Optional[UUID], str], int] = {}
+
+# (tenant_id, domain) -> (revision, value, timestamp)
+_entries: Dict[Tuple[Optional[UUID], str], Tuple[int, Any, float]] = {}
+
+DEFAULT_TTL = 300  # 5 minutes
+
+
+async def get_or_set(
+    tenant_id: Optional[UUID],
+    domain: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int = DEFAULT_TTL,
+) -> Any:
+    """
+    Get a tenant's cached value for a domain, loading it on a miss.
+
+    A value is only served while its revision is current, so bump() drops a
+    whole domain in O(1) without tracking individual keys.
+
+    Args:
+        tenant_id: Tenant UUID (None for single-tenant data)
+        domain: Data domain, e.g. "plans" or "knowledge"
+        loader: Coroutine function producing the value
+        ttl: Seconds a value stays valid
+
+    Returns:
+        Cached or freshly loaded value
+    """
+    key = (tenant_id, domain)
+    revision = _revisions.get(key, 0)
+
+    entry = _entries.get(key)
+    if entry is not None:
+        cached_revision, value, timestamp = entry
+        if cached_revision == revision and time.time() - timestamp < ttl:
+            return value
+
+    value = await loader()
+    # Don't store a value loaded while a write bumped the revision
+    if _revisions.get(key, 0) == revision:
+        _entries[key] = (revision, value, time.time())
+    return value
+
+
+def bump(tenant_id: Optional[UUID], domain: str) -> None:
+    """
+    Invalidate a tenant's cached value for a domain (call after writes).
+
+    Args:
+        tenant_id: Tenant UUID
+        domain: Data domain
+    """
+    key = (tenant_id, domain)
+    _revisions[key] = _revisions.get(key, 0) + 1
+    _entries.pop(key, None)
+
+
+def clear() -> None:
+    """Drop every cached value"""
+    _entries.clear()
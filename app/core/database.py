@@ -1,6 +1,8 @@
 """Database configuration and session management"""
+import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
 # Create async engine
@@ -8,6 +10,19 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.APP_ENV == "development",
     future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args={
+        # Short OLTP queries only lose time to JIT compilation
+        "server_settings": {"jit": "off"},
+        # Prepared statements kept per connection by the asyncpg dialect
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
 )
 
 # Create async session factory
@@ -19,10 +34,37 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Session factory for read-only endpoints: autocommit mode skips the
+# BEGIN/COMMIT round-trips around plain SELECTs (shares the same pool)
+AsyncReadSessionLocal = async_sessionmaker(
+    engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
 
+async def warm_pool(size: int = None) -> None:
+    """
+    Open pooled connections ahead of the first requests.
+
+    Connections are checked out together (so each one is new) and returned to
+    the pool, where later sessions reuse them.
+
+    Args:
+        size: Number of connections to open (default: settings.DB_POOL_WARMUP)
+    """
+    size = min(settings.DB_POOL_WARMUP if size is None else size, settings.DB_POOL_SIZE)
+    if size <= 0:
+        return
+
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    await asyncio.gather(*(connection.close() for connection in connections))
+
+
 async def get_db() -> AsyncSession:
     """Dependency for getting async database session"""
     async with AsyncSessionLocal() as session:
@@ -1,9 +1,8 @@
 """Database migration utilities"""
 import asyncio
-import os
-import subprocess
-import sys
 from pathlib import Path
+from alembic import command
+from alembic.config import Config
 from app.core.config import settings
 from app.utils.logger import logger
 
@@ -26,31 +25,15 @@ async def run_migrations() -> bool:
             logger.error(f"alembic.ini not found at {alembic_ini}")
             return False
         
-        # Run alembic upgrade head
-        # Use asyncio to run subprocess in background
-        process = await asyncio.create_subprocess_exec(
-            sys.executable,
-            "-m", "alembic",
-            "upgrade", "head",
-            cwd=str(current_dir),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env={
-                **dict(os.environ),
-                "DATABASE_URL": settings.DATABASE_URL,
-            }
-        )
+        config = Config(str(alembic_ini))
+        config.set_main_option("script_location", str(current_dir / "alembic"))
+        config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+        # Keep the application's logging setup (env.py would apply alembic.ini's)
+        config.attributes["configure_logger"] = False
         
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "Unknown error"
-            logger.error(f"Migration failed: {error_msg}")
-            return False
-        
-        output = stdout.decode() if stdout else ""
-        if output:
-            logger.debug(f"Migration output: {output}")
+        # env.py drives its own event loop with asyncio.run, so the upgrade
+        # runs in a worker thread instead of a separate Python process
+        await asyncio.to_thread(command.upgrade, config, "head")
         
         logger.info("✅ Database migrations completed successfully")
         return True
@@ -0,0 +1,65 @@
+"""Startup pre-warming of agents and the LLM connection"""
+from sqlalchemy import select
+from langchain_core.messages import HumanMessage
+
+from app.agents.base import get_llm
+from app.agents.sales_agent import SalesAgent
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import Tenant, TenantStatus
+from app.utils.logger import logger
+
+
+async def prewarm_agents() -> int:
+    """
+    Build the shared sales agent runnables before the first chat request.
+
+    In multi-tenant mode one agent is built per active tenant; otherwise only
+    the single-tenant agent is built. The runnables land in the process-wide
+    agent cache that requests read from.
+
+    Returns:
+        Number of agents built
+    """
+    async with AsyncSessionLocal() as db:
+        if settings.MULTI_TENANT_ENABLED:
+            result = await db.execute(
+                select(Tenant.id).where(
+                    Tenant.is_active == True,
+                    Tenant.status == TenantStatus.ACTIVE,
+                )
+            )
+            tenant_ids = list(result.scalars().all())
+        else:
+            tenant_ids = [None]
+
+        built = 0
+        for tenant_id in tenant_ids:
+            try:
+                await SalesAgent(db, tenant_id=tenant_id).prewarm()
+                built += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-warm sales agent for tenant {tenant_id}: {e}")
+
+    return built
+
+
+async def prewarm_llm_connection() -> None:
+    """Send one tiny request so the sales agent's LLM client has its HTTPS connection open"""
+    # Clients are shared per temperature, so ping the one the sales agent uses
+    await get_llm(temperature=SalesAgent.LLM_TEMPERATURE).ainvoke([HumanMessage(content="ping")])
+
+
+async def run_prewarm() -> None:
+    """Pre-warm agents and the LLM connection (failures are logged, not raised)"""
+    try:
+        built = await prewarm_agents()
+        logger.info(f"Pre-warmed {built} sales agent(s)")
+    except Exception as e:
+        logger.warning(f"Agent pre-warm failed: {e}")
+
+    try:
+        await prewarm_llm_connection()
+        logger.info("Pre-warmed LLM connection")
+    except Exception as e:
+        logger.warning(f"LLM pre-warm failed: {e}")
@@ -1,6 +1,9 @@
 """Security utilities for API authentication"""
+import hashlib
+import hmac
 from fastapi import Header, HTTPException, status
-from typing import Optional
+from typing import Optional, Tuple
+import bcrypt
 from app.core.config import settings
 
 
@@ -15,3 +18,51 @@ async def verify_api_key(
     # This is a placeholder for future implementation
     return x_api_key or "anonymous"
 
+
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Hash a tenant API key for storage.
+
+    API keys are random with high entropy, so a slow KDF adds no brute-force
+    resistance; an HMAC with a server-side pepper is enough and costs
+    microseconds instead of ~100ms of CPU on every authenticated request.
+
+    Args:
+        api_key: Plain API key
+
+    Returns:
+        Hex digest of HMAC-SHA256(pepper, api_key)
+    """
+    return hmac.new(
+        settings.API_KEY_PEPPER.encode('utf-8'),
+        api_key.encode('utf-8'),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def is_legacy_api_key_hash(stored_hash: str) -> bool:
+    """Whether a stored API key hash uses the legacy (slow) bcrypt format"""
+    return stored_hash.startswith("$2")
+
+
+def verify_api_key_hash(api_key: str, stored_hash: str) -> Tuple[bool, bool]:
+    """
+    Verify an API key against its stored hash.
+
+    Accepts legacy bcrypt hashes so existing keys keep working; those should
+    be replaced with hash_api_key once verified. Checking a bcrypt hash is
+    CPU-bound (~100ms): async callers should run it in a worker thread.
+
+    Args:
+        api_key: Presented API key
+        stored_hash: Hash stored for the tenant
+
+    Returns:
+        Tuple of (key is valid, stored hash needs upgrading)
+    """
+    if is_legacy_api_key_hash(stored_hash):
+        valid = bcrypt.checkpw(api_key.encode('utf-8'), stored_hash.encode('utf-8'))
+        return valid, valid
+
+    return hmac.compare_digest(stored_hash, hash_api_key(api_key)), False
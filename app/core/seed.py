@@ -1,11 +1,15 @@
 """Database seed script for initial data"""
 import asyncio
+import uuid
 from decimal import Decimal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
 from app.models.plan import Plan, BillingCycle
 from app.utils.logger import logger
 
+UNDEFINED_TABLE_SQLSTATE = "42P01"
+
 
 async def check_if_seeded() -> bool:
     """
@@ -14,74 +18,55 @@ async def check_if_seeded() -> bool:
     Returns:
         True if database is already seeded, False otherwise
     """
-    from sqlalchemy import select
+    from sqlalchemy import exists, select
     from sqlalchemy.exc import ProgrammingError
     from asyncpg.exceptions import UndefinedTableError
+    from app.models.user import User
     
     try:
         async with AsyncSessionLocal() as session:
-            # Check if plans exist (plans are always created first)
+            # Probe plans (always created first) and users (analytics seed)
+            # in a single round-trip
             result = await session.execute(
-                select(Plan).limit(1)
+                select(exists().select_from(Plan), exists().select_from(User))
             )
-            plan = result.scalar_one_or_none()
+            plans_exist, users_exist = result.one()
             
             # If no plans exist, database is not seeded
-            if not plan:
+            if not plans_exist:
                 return False
             
-            # Check if analytics data exists (users count)
-            from app.models.user import User
-            result = await session.execute(
-                select(User).limit(1)
-            )
-            user = result.scalar_one_or_none()
-            
-            # If no users exist, only plans are seeded (partial seed)
             # Consider it seeded if plans exist (analytics seed is optional)
+            if not users_exist:
+                logger.debug("Plans found without users (analytics data not seeded)")
             return True
     except (ProgrammingError, UndefinedTableError) as e:
-        # Check if error is about table not existing (expected before migrations)
-        error_str = str(e).lower()
-        # Check for "does not exist" which indicates table/relation doesn't exist
-        if "does not exist" in error_str:
-            # Table doesn't exist yet - this is expected before migrations run
-            # Return False (needs seed) without logging as warning
+        # Tables don't exist yet - expected before migrations run
+        # Return False (needs seed) without logging as warning
+        if _is_undefined_table(e):
             return False
         # Other database errors should be logged
         logger.warning(f"Database error checking if seeded: {e}")
         return False
-    except Exception as e:
-        # Check if the underlying exception is about table not existing
-        error_str = str(e).lower()
-        if "does not exist" in error_str:
-            # Table doesn't exist yet - return False without warning
-            return False
-        logger.warning(f"Error checking if database is seeded: {e}")
-        # If we can't check, assume not seeded to be safe
-        return False
     except Exception as e:
         logger.warning(f"Error checking if database is seeded: {e}")
         # If we can't check, assume not seeded to be safe
         return False
 
 
+def _is_undefined_table(error: Exception) -> bool:
+    """Check for Postgres' undefined_table error (SQLSTATE 42P01)"""
+    # SQLAlchemy wraps the driver error; asyncpg's own errors carry sqlstate directly
+    driver_error = getattr(error, "orig", error)
+    return getattr(driver_error, "sqlstate", None) == UNDEFINED_TABLE_SQLSTATE
+
+
 async def seed_plans(session: AsyncSession):
     """Seed initial plans"""
-    from sqlalchemy import select
+    from sqlalchemy import cast, column, exists, select, values
     from app.models.tenant import Tenant
     from app.core.config import settings
     
-    # Get default tenant (workhub)
-    result = await session.execute(
-        select(Tenant).where(Tenant.slug == settings.DEFAULT_TENANT_SLUG)
-    )
-    default_tenant = result.scalar_one_or_none()
-    
-    if not default_tenant:
-        logger.error(f"Default tenant '{settings.DEFAULT_TENANT_SLUG}' not found. Cannot seed plans.")
-        raise ValueError(f"Default tenant '{settings.DEFAULT_TENANT_SLUG}' not found")
-    
     plans_data = [
         {
             "name": "Day Pass",
@@ -139,32 +124,45 @@ async def seed_plans(session: AsyncSession):
         }
     ]
 
-    created_count = 0
-    for plan_data in plans_data:
-        # Add tenant_id to plan data
-        plan_data["tenant_id"] = default_tenant.id
-        
-        # Verificar se o plano já existe (verificar por tenant_id + slug)
-        result = await session.execute(
-            select(Plan).where(
-                Plan.tenant_id == default_tenant.id,
-                Plan.slug == plan_data["slug"]
-            )
+    # One INSERT ... SELECT joining the plan rows with the default tenant
+    # (workhub), so no separate tenant lookup; plans already present
+    # (tenant_id + slug) are skipped
+    plan_columns = ["id", *plans_data[0]]
+    plan_rows = values(
+        *(column(name, Plan.__table__.c[name].type) for name in plan_columns),
+        name="plan_rows",
+    ).data([
+        (uuid.uuid4(), *plan_data.values())
+        for plan_data in plans_data
+    ])
+    result = await session.execute(
+        pg_insert(Plan)
+        .from_select(
+            ["tenant_id", *plan_columns],
+            # VALUES parameters may arrive untyped (e.g. the enum), so cast
+            # each column to the plans column type
+            select(Tenant.id, *(cast(row_column, row_column.type) for row_column in plan_rows.c))
+            .where(Tenant.slug == settings.DEFAULT_TENANT_SLUG)
         )
-        existing_plan = result.scalar_one_or_none()
-        
-        if not existing_plan:
-            plan = Plan(**plan_data)
-            session.add(plan)
-            created_count += 1
-        else:
-            logger.debug(f"Plan {plan_data['slug']} already exists for tenant {default_tenant.slug}, skipping")
+        .on_conflict_do_nothing(index_elements=["tenant_id", "slug"])
+        .returning(Plan.slug)
+    )
+    created_slugs = result.scalars().all()
     
-    if created_count > 0:
+    if created_slugs:
         await session.commit()
-        logger.info(f"Seeded {created_count} new plans")
-    else:
-        logger.info("All plans already exist, nothing to seed")
+        logger.info(f"Seeded {len(created_slugs)} new plans: {', '.join(created_slugs)}")
+        return
+    
+    # Nothing inserted: either every plan exists or the tenant is missing
+    tenant_exists = await session.scalar(
+        select(exists().where(Tenant.slug == settings.DEFAULT_TENANT_SLUG))
+    )
+    if not tenant_exists:
+        logger.error(f"Default tenant '{settings.DEFAULT_TENANT_SLUG}' not found. Cannot seed plans.")
+        raise ValueError(f"Default tenant '{settings.DEFAULT_TENANT_SLUG}' not found")
+    
+    logger.info("All plans already exist, nothing to seed")
 
 
 async def run_seed():
@@ -1,9 +1,10 @@
 """Analytics seed script for test data"""
 import asyncio
+import uuid
 from datetime import datetime, timedelta
-from random import choice, randint, sample
+from random import choice, choices, randint, sample
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from app.core.database import AsyncSessionLocal
 from app.models.user import User, WorkType
@@ -170,123 +171,122 @@ async def seed_analytics_data(session: AsyncSession):
         
         for plan_data in plans_data:
             plan_data["tenant_id"] = default_tenant.id
-            plan = Plan(**plan_data)
-            session.add(plan)
         
-        await session.flush()
-        
-        # Buscar novamente (filtrar por tenant_id)
-        result = await session.execute(
-            select(Plan).where(Plan.tenant_id == default_tenant.id)
-        )
-        plans = result.scalars().all()
+        # Insert and read the new plans back in one statement (no flush + SELECT)
+        result = await session.scalars(insert(Plan).returning(Plan), plans_data)
+        plans = result.all()
         logger.info(f"Created {len(plans)} plans")
     
     day_pass = next((p for p in plans if p.slug == "day-pass"), None)
     flex = next((p for p in plans if p.slug == "flex"), None)
     dedicado = next((p for p in plans if p.slug == "dedicado"), None)
     
+    # Rows are built in memory with client-side UUIDs, so foreign keys are
+    # wired up without flushing, then inserted with one executemany per table
     users_created = []
     conversations_created = []
     leads_created = []
     messages_created = []
     
+    # Loop invariants, resolved once
+    plan_choices = [flex, dedicado]
+    user_messages_by_stage = {
+        stage: MESSAGES_TEMPLATES.get(stage.value, MESSAGES_TEMPLATES["awareness"])
+        for stage in FunnelStage
+    }
+    agent_responses_by_stage = {
+        stage: AGENT_RESPONSES.get(stage.value, AGENT_RESPONSES["awareness"])
+        for stage in FunnelStage
+    }
+    
+    # Distribuir estágios do funil de forma realista
+    # 30% awareness, 25% interest, 20% consideration, 10% negotiation, 10% closed_won, 5% closed_lost
+    stage_weights = {
+        FunnelStage.AWARENESS: 0.30,
+        FunnelStage.INTEREST: 0.25,
+        FunnelStage.CONSIDERATION: 0.20,
+        FunnelStage.NEGOTIATION: 0.10,
+        FunnelStage.CLOSED_WON: 0.10,
+        FunnelStage.CLOSED_LOST: 0.05
+    }
+    
+    funnel_stages = choices(list(stage_weights), weights=list(stage_weights.values()), k=25)
+    status_by_stage = {
+        FunnelStage.CLOSED_WON: ConversationStatus.CONVERTED,
+        FunnelStage.CLOSED_LOST: ConversationStatus.LOST
+    }
+    
+    # Stage do lead
+    lead_stage_map = {
+        FunnelStage.INTEREST: LeadStage.WARM,
+        FunnelStage.CONSIDERATION: LeadStage.HOT,
+        FunnelStage.NEGOTIATION: LeadStage.QUALIFIED,
+        FunnelStage.CLOSED_WON: LeadStage.CONVERTED
+    }
+    
     # Criar 25 usuários com conversas
     for i in range(25):
         user_key = f"test_user_{i+1:03d}"
         work_type = choice(WORK_TYPES)
         
-        user = User(
-            user_key=user_key,
-            name=USER_NAMES[i % len(USER_NAMES)],
-            email=f"user{i+1}@example.com",
-            phone=f"+5511999{i+1:05d}",
-            work_type=work_type,
-            company=f"Company {i+1}" if work_type == WorkType.COMPANY else None,
-            tenant_id=default_tenant.id
-        )
-        session.add(user)
-        await session.flush()
-        users_created.append(user)
+        user_id = uuid.uuid4()
+        users_created.append({
+            "id": user_id,
+            "user_key": user_key,
+            "name": USER_NAMES[i % len(USER_NAMES)],
+            "email": f"user{i+1}@example.com",
+            "phone": f"+5511999{i+1:05d}",
+            "work_type": work_type,
+            "company": f"Company {i+1}" if work_type == WorkType.COMPANY else None,
+            "tenant_id": default_tenant.id
+        })
         
-        # Distribuir estágios do funil de forma realista
-        # 30% awareness, 25% interest, 20% consideration, 10% negotiation, 10% closed_won, 5% closed_lost
-        stage_weights = {
-            FunnelStage.AWARENESS: 0.30,
-            FunnelStage.INTEREST: 0.25,
-            FunnelStage.CONSIDERATION: 0.20,
-            FunnelStage.NEGOTIATION: 0.10,
-            FunnelStage.CLOSED_WON: 0.10,
-            FunnelStage.CLOSED_LOST: 0.05
-        }
-        
-        rand = randint(1, 100)
-        if rand <= 30:
-            funnel_stage = FunnelStage.AWARENESS
-            status = ConversationStatus.ACTIVE
+        funnel_stage = funnel_stages[i]
+        status = status_by_stage.get(funnel_stage, ConversationStatus.ACTIVE)
+        if funnel_stage in (FunnelStage.AWARENESS, FunnelStage.CLOSED_LOST):
             interested_plan = None
-        elif rand <= 55:
-            funnel_stage = FunnelStage.INTEREST
-            status = ConversationStatus.ACTIVE
-            interested_plan = choice([flex, dedicado])
-        elif rand <= 75:
-            funnel_stage = FunnelStage.CONSIDERATION
-            status = ConversationStatus.ACTIVE
-            interested_plan = choice([flex, dedicado])
-        elif rand <= 85:
-            funnel_stage = FunnelStage.NEGOTIATION
-            status = ConversationStatus.ACTIVE
+        elif funnel_stage == FunnelStage.NEGOTIATION:
             interested_plan = dedicado
-        elif rand <= 95:
-            funnel_stage = FunnelStage.CLOSED_WON
-            status = ConversationStatus.CONVERTED
-            interested_plan = choice([flex, dedicado])
         else:
-            funnel_stage = FunnelStage.CLOSED_LOST
-            status = ConversationStatus.LOST
-            interested_plan = None
+            interested_plan = choice(plan_choices)
         
         # Criar conversa
-        conversation = Conversation(
-            user_id=user.id,
-            tenant_id=default_tenant.id,
-            status=status,
-            funnel_stage=funnel_stage,
-            interested_plan_id=interested_plan.id if interested_plan else None,
-            context_summary=f"Lead interessado em {interested_plan.name if interested_plan else 'informações gerais'}. Estágio: {funnel_stage.value}",
-            created_at=datetime.utcnow() - timedelta(days=randint(1, 30))
-        )
-        session.add(conversation)
-        await session.flush()
-        conversations_created.append(conversation)
+        conversation_id = uuid.uuid4()
+        conversation_created_at = datetime.utcnow() - timedelta(days=randint(1, 30))
+        conversations_created.append({
+            "id": conversation_id,
+            "user_id": user_id,
+            "tenant_id": default_tenant.id,
+            "status": status,
+            "funnel_stage": funnel_stage,
+            "interested_plan_id": interested_plan.id if interested_plan else None,
+            "context_summary": f"Lead interessado em {interested_plan.name if interested_plan else 'informações gerais'}. Estágio: {funnel_stage.value}",
+            "created_at": conversation_created_at
+        })
         
         # Criar mensagens (3-10 mensagens por conversa)
         num_messages = randint(3, 10)
-        user_messages = MESSAGES_TEMPLATES.get(funnel_stage.value, MESSAGES_TEMPLATES["awareness"])
-        agent_responses = AGENT_RESPONSES.get(funnel_stage.value, AGENT_RESPONSES["awareness"])
+        user_messages = user_messages_by_stage[funnel_stage]
+        agent_responses = agent_responses_by_stage[funnel_stage]
         
         for msg_idx in range(num_messages):
             # Mensagem do usuário
-            user_msg = Message(
-                conversation_id=conversation.id,
-                tenant_id=default_tenant.id,
-                role=MessageRole.USER,
-                content=choice(user_messages) if msg_idx == 0 else f"Mensagem {msg_idx + 1} do usuário sobre o plano",
-                created_at=conversation.created_at + timedelta(minutes=msg_idx * 5)
-            )
-            session.add(user_msg)
-            messages_created.append(user_msg)
+            messages_created.append({
+                "conversation_id": conversation_id,
+                "tenant_id": default_tenant.id,
+                "role": MessageRole.USER,
+                "content": choice(user_messages) if msg_idx == 0 else f"Mensagem {msg_idx + 1} do usuário sobre o plano",
+                "created_at": conversation_created_at + timedelta(minutes=msg_idx * 5)
+            })
             
             # Resposta do agente
-            agent_msg = Message(
-                conversation_id=conversation.id,
-                tenant_id=default_tenant.id,
-                role=MessageRole.ASSISTANT,
-                content=choice(agent_responses) if msg_idx == 0 else f"Resposta {msg_idx + 1} do agente explicando os benefícios",
-                created_at=conversation.created_at + timedelta(minutes=msg_idx * 5 + 2)
-            )
-            session.add(agent_msg)
-            messages_created.append(agent_msg)
+            messages_created.append({
+                "conversation_id": conversation_id,
+                "tenant_id": default_tenant.id,
+                "role": MessageRole.ASSISTANT,
+                "content": choice(agent_responses) if msg_idx == 0 else f"Resposta {msg_idx + 1} do agente explicando os benefícios",
+                "created_at": conversation_created_at + timedelta(minutes=msg_idx * 5 + 2)
+            })
         
         # Criar lead se não for awareness ou closed_lost
         if funnel_stage not in [FunnelStage.AWARENESS, FunnelStage.CLOSED_LOST]:
@@ -299,13 +299,6 @@ async def seed_analytics_data(session: AsyncSession):
             }
             score = score_map.get(funnel_stage, 30)
             
-            # Stage do lead
-            lead_stage_map = {
-                FunnelStage.INTEREST: LeadStage.WARM,
-                FunnelStage.CONSIDERATION: LeadStage.HOT,
-                FunnelStage.NEGOTIATION: LeadStage.QUALIFIED,
-                FunnelStage.CLOSED_WON: LeadStage.CONVERTED
-            }
             lead_stage = lead_stage_map.get(funnel_stage, LeadStage.WARM)
             
             # Objeções (30% dos leads têm objeções)
@@ -313,18 +306,27 @@ async def seed_analytics_data(session: AsyncSession):
             if randint(1, 100) <= 30 and funnel_stage != FunnelStage.CLOSED_WON:
                 objections = sample(COMMON_OBJECTIONS, randint(1, 2))
             
-            lead = Lead(
-                conversation_id=conversation.id,
-                user_id=user.id,
-                tenant_id=default_tenant.id,
-                stage=lead_stage,
-                score=score,
-                objections=objections,
-                preferred_plan_id=interested_plan.id if interested_plan else None,
-                next_action="Follow-up em 3 dias" if funnel_stage == FunnelStage.INTEREST else "Agendar visita" if funnel_stage == FunnelStage.CONSIDERATION else None
-            )
-            session.add(lead)
-            leads_created.append(lead)
+            leads_created.append({
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "tenant_id": default_tenant.id,
+                "stage": lead_stage,
+                "score": score,
+                "objections": objections,
+                "preferred_plan_id": interested_plan.id if interested_plan else None,
+                "next_action": "Follow-up em 3 dias" if funnel_stage == FunnelStage.INTEREST else "Agendar visita" if funnel_stage == FunnelStage.CONSIDERATION else None
+            })
+    
+    # Parents first (foreign keys); each executemany is sent as batched
+    # multi-row INSERTs, with column defaults applied per row
+    for model, rows in (
+        (User, users_created),
+        (Conversation, conversations_created),
+        (Message, messages_created),
+        (Lead, leads_created),
+    ):
+        if rows:
+            await session.execute(insert(model), rows)
     
     await session.commit()
     
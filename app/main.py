@@ -41,6 +41,13 @@ async def startup_event():
     logger.info(f"Starting {settings.APP_NAME}")
     logger.info(f"Environment: {settings.APP_ENV}")
     
+    # Without a pepper, tenant API key hashes are an unkeyed HMAC
+    if settings.MULTI_TENANT_ENABLED and not settings.API_KEY_PEPPER and settings.APP_ENV != "development":
+        logger.warning(
+            "API_KEY_PEPPER is not set: tenant API key hashes are not keyed with a server secret. "
+            "Set API_KEY_PEPPER before issuing API keys."
+        )
+    
     # Run database migrations first
     try:
         from app.core.migrations import run_migrations
@@ -52,6 +59,22 @@ async def startup_event():
         logger.error(f"Error running migrations: {e}", exc_info=True)
         logger.warning("Application will continue without running migrations")
     
+    # Open database connections before the first requests need them
+    try:
+        from app.core.database import warm_pool
+        
+        await warm_pool()
+    except Exception as e:
+        logger.warning(f"Could not warm database pool: {e}")
+    
+    # Token counting for chat history; a failure only makes trimming approximate
+    try:
+        from app.agents.base import load_token_encoding
+        
+        await load_token_encoding()
+    except Exception as e:
+        logger.warning(f"Could not load token encoding: {e}")
+    
     # Auto-seed database if enabled and not already seeded
     if settings.AUTO_SEED:
         try:
@@ -71,12 +94,21 @@ async def startup_event():
             logger.warning("Application will continue without seed data")
     else:
         logger.info("Auto-seed is disabled (AUTO_SEED=false)")
+    
+    # Move first-request cold start (agent build, LLM connection) to startup
+    if settings.PREWARM_ENABLED:
+        from app.core.prewarm import run_prewarm
+        
+        await run_prewarm()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info(f"Shutting down {settings.APP_NAME}")
+    
+    from app.core.database import engine
+    await engine.dispose()
 
 
 @app.get("/")
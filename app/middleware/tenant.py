@@ -1,17 +1,61 @@
 """Tenant middleware for multi-tenant support"""
+import asyncio
+import re
+import time
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
-import bcrypt
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from app.core.config import settings
-from app.core.database import AsyncSessionLocal
+from app.core.database import AsyncReadSessionLocal, AsyncSessionLocal
+from app.core.security import hash_api_key, is_legacy_api_key_hash, verify_api_key_hash
 from app.models import Tenant, TenantStatus
+from app.models.tenant import tenant_by_slug
 from app.utils.logger import logger
 
+# tenant slug -> (tenant, loaded at); the API key is still checked on every
+# request, the TTL only bounds how long status changes from other workers take
+_tenant_cache: Dict[str, Tuple[Tenant, float]] = {}
+TENANT_CACHE_TTL = 60
+TENANT_CACHE_SIZE = 1024
+
+
+async def _load_tenant(slug: str) -> Optional[Tenant]:
+    """Load a tenant by slug, reusing the cached row while it is fresh"""
+    cached = _tenant_cache.get(slug)
+    if cached is not None and time.time() - cached[1] < TENANT_CACHE_TTL:
+        return cached[0]
+
+    # Read-only session: the single SELECT runs without BEGIN/ROLLBACK
+    async with AsyncReadSessionLocal() as db:
+        result = await db.execute(tenant_by_slug, {"slug": slug})
+        tenant = result.scalar_one_or_none()
+
+    # Unknown slugs are not cached, so they can't fill the cache
+    if tenant is not None:
+        if len(_tenant_cache) >= TENANT_CACHE_SIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            _tenant_cache.pop(next(iter(_tenant_cache)))
+        _tenant_cache[slug] = (tenant, time.time())
+
+    return tenant
+
+
+def invalidate_tenant_cache(slug: Optional[str] = None) -> None:
+    """
+    Drop cached tenants so the next request reloads them.
+
+    Args:
+        slug: Tenant to drop (default: all tenants)
+    """
+    if slug is None:
+        _tenant_cache.clear()
+    else:
+        _tenant_cache.pop(slug, None)
+
 
 class TenantMiddleware(BaseHTTPMiddleware):
     """
@@ -37,12 +81,14 @@ class TenantMiddleware(BaseHTTPMiddleware):
         "/openapi.json",
         "/static",
     ]
+    # Same prefix test as str.startswith over EXCLUDED_PATHS, in one C-level match
+    _excluded_paths_re = re.compile("|".join(re.escape(path) for path in EXCLUDED_PATHS))
 
     async def dispatch(self, request: Request, call_next):
         """Process request and inject tenant context"""
 
         # Skip tenant validation for excluded paths
-        if any(request.url.path.startswith(path) for path in self.EXCLUDED_PATHS):
+        if self._excluded_paths_re.match(request.url.path):
             return await call_next(request)
 
         # Skip tenant validation for OPTIONS requests (CORS preflight)
@@ -112,12 +158,8 @@ class TenantMiddleware(BaseHTTPMiddleware):
                 status_code=400
             )
 
-        # Load tenant from database
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(Tenant).where(Tenant.slug == tenant_slug)
-            )
-            tenant = result.scalar_one_or_none()
+        # Load tenant (cached for TENANT_CACHE_TTL seconds)
+        tenant = await _load_tenant(tenant_slug)
 
         if not tenant:
             raise TenantAuthenticationError(
@@ -145,11 +187,13 @@ class TenantMiddleware(BaseHTTPMiddleware):
                 status_code=403
             )
 
-        # Compare API key hash
-        api_key_valid = bcrypt.checkpw(
-            api_key.encode('utf-8'),
-            tenant.api_key_hash.encode('utf-8')
-        )
+        # Compare API key hash (legacy bcrypt hashes are checked off the event loop)
+        if is_legacy_api_key_hash(tenant.api_key_hash):
+            api_key_valid, needs_rehash = await asyncio.to_thread(
+                verify_api_key_hash, api_key, tenant.api_key_hash
+            )
+        else:
+            api_key_valid, needs_rehash = verify_api_key_hash(api_key, tenant.api_key_hash)
 
         if not api_key_valid:
             raise TenantAuthenticationError(
@@ -157,18 +201,31 @@ class TenantMiddleware(BaseHTTPMiddleware):
                 status_code=401
             )
 
+        if needs_rehash:
+            await self._upgrade_api_key_hash(tenant, api_key)
+
         return tenant
 
+    async def _upgrade_api_key_hash(self, tenant: Tenant, api_key: str) -> None:
+        """Replace a legacy bcrypt hash with the fast HMAC hash after a successful check"""
+        new_hash = hash_api_key(api_key)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Tenant)
+                    .where(Tenant.id == tenant.id, Tenant.api_key_hash == tenant.api_key_hash)
+                    .values(api_key_hash=new_hash)
+                )
+                await db.commit()
+            tenant.api_key_hash = new_hash
+            logger.info(f"Upgraded API key hash for tenant {tenant.slug}")
+        except Exception as e:
+            # The legacy hash keeps working; retry on the next request
+            logger.warning(f"Could not upgrade API key hash for tenant {tenant.slug}: {e}")
+
     async def _get_default_tenant(self) -> Optional[Tenant]:
         """Get default tenant for single-tenant mode"""
-
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(Tenant).where(Tenant.slug == settings.DEFAULT_TENANT_SLUG)
-            )
-            tenant = result.scalar_one_or_none()
-
-        return tenant
+        return await _load_tenant(settings.DEFAULT_TENANT_SLUG)
 
 
 class TenantAuthenticationError(Exception):
@@ -21,7 +21,7 @@ class AnalysisReport(Base):
     __tablename__ = "analysis_reports"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False)
     analysis_type = Column(SQLEnum(AnalysisType), nullable=False)
     result = Column(JSONB, nullable=False, default=dict)
@@ -29,8 +29,8 @@ class AnalysisReport(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="analysis_reports")
-    conversation = relationship("Conversation", back_populates="analysis_reports")
+    tenant = relationship("Tenant", back_populates="analysis_reports", lazy="raise_on_sql")
+    conversation = relationship("Conversation", back_populates="analysis_reports", lazy="raise_on_sql")
 
     # Indexes
     __table_args__ = (
@@ -32,7 +32,7 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     status = Column(SQLEnum(ConversationStatus), default=ConversationStatus.ACTIVE, nullable=False)
     funnel_stage = Column(SQLEnum(FunnelStage), default=FunnelStage.AWARENESS, nullable=False)
@@ -45,16 +45,16 @@ class Conversation(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="conversations")
-    user = relationship("User", back_populates="conversations")
-    interested_plan = relationship("Plan", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
-    leads = relationship("Lead", back_populates="conversation", cascade="all, delete-orphan")
-    analysis_reports = relationship("AnalysisReport", back_populates="conversation", cascade="all, delete-orphan")
+    tenant = relationship("Tenant", back_populates="conversations", lazy="raise_on_sql")
+    user = relationship("User", back_populates="conversations", lazy="raise_on_sql")
+    interested_plan = relationship("Plan", back_populates="conversations", lazy="raise_on_sql")
+    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan", lazy="raise_on_sql")
+    leads = relationship("Lead", back_populates="conversation", cascade="all, delete-orphan", lazy="raise_on_sql")
+    analysis_reports = relationship("AnalysisReport", back_populates="conversation", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     # Indexes
     __table_args__ = (
-        Index('idx_conversation_tenant_user', 'tenant_id', 'user_id'),
+        Index('idx_conversation_tenant_user', 'tenant_id', 'user_id', postgresql_include=['status', 'funnel_stage', 'updated_at']),
         Index('idx_conversation_tenant_status', 'tenant_id', 'status'),
         Index('idx_conversation_tenant_funnel', 'tenant_id', 'funnel_stage'),
     )
@@ -22,7 +22,7 @@ class Lead(Base):
     __tablename__ = "leads"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     stage = Column(SQLEnum(LeadStage), default=LeadStage.COLD, nullable=False)
@@ -34,10 +34,10 @@ class Lead(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="leads")
-    conversation = relationship("Conversation", back_populates="leads")
-    user = relationship("User", back_populates="leads")
-    preferred_plan = relationship("Plan", back_populates="leads")
+    tenant = relationship("Tenant", back_populates="leads", lazy="raise_on_sql")
+    conversation = relationship("Conversation", back_populates="leads", lazy="raise_on_sql")
+    user = relationship("User", back_populates="leads", lazy="raise_on_sql")
+    preferred_plan = relationship("Plan", back_populates="leads", lazy="raise_on_sql")
 
     # Indexes
     __table_args__ = (
@@ -20,7 +20,7 @@ class Message(Base):
     __tablename__ = "messages"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False)
     role = Column(SQLEnum(MessageRole), nullable=False)
     content = Column(Text, nullable=False)
@@ -29,12 +29,14 @@ class Message(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="messages")
-    conversation = relationship("Conversation", back_populates="messages")
+    tenant = relationship("Tenant", back_populates="messages", lazy="raise_on_sql")
+    conversation = relationship("Conversation", back_populates="messages", lazy="raise_on_sql")
 
     # Indexes
     __table_args__ = (
         Index('idx_message_tenant_conversation', 'tenant_id', 'conversation_id'),
+        # Chat history: latest messages of a conversation (ORDER BY created_at DESC LIMIT n)
+        Index('idx_message_conversation_created', 'conversation_id', 'created_at'),
     )
 
     def __repr__(self):
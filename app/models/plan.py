@@ -1,7 +1,7 @@
 """Plan model"""
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Numeric, Boolean, DateTime, Enum as SQLEnum, Text, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, String, Numeric, Boolean, DateTime, Enum as SQLEnum, Text, ForeignKey, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
@@ -20,7 +20,7 @@ class Plan(Base):
     __tablename__ = "plans"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     name = Column(String, nullable=False)
     slug = Column(String, nullable=False, index=True)  # No longer globally unique
     price = Column(Numeric(10, 2), nullable=False)
@@ -32,14 +32,16 @@ class Plan(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="plans")
-    conversations = relationship("Conversation", back_populates="interested_plan")
-    leads = relationship("Lead", back_populates="preferred_plan")
+    tenant = relationship("Tenant", back_populates="plans", lazy="raise_on_sql")
+    conversations = relationship("Conversation", back_populates="interested_plan", lazy="raise_on_sql")
+    leads = relationship("Lead", back_populates="preferred_plan", lazy="raise_on_sql")
 
     # Constraints
     __table_args__ = (
         UniqueConstraint('tenant_id', 'slug', name='uq_tenant_plan_slug'),
-        Index('idx_plan_tenant_active', 'tenant_id', 'is_active'),
+        Index('idx_plan_tenant_active', 'tenant_id', postgresql_where=text('is_active')),
+        # Tenant plan listing (newest first, includes inactive plans)
+        Index('idx_plan_tenant_created', 'tenant_id', 'created_at'),
     )
 
     def __repr__(self):
@@ -2,7 +2,7 @@
 import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Enum as SQLEnum, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Enum as SQLEnum, ForeignKey, UniqueConstraint, Index, bindparam, lambda_stmt, select, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -65,7 +65,7 @@ class Tenant(Base):
     # }
 
     # Authentication
-    api_key_hash = Column(String, nullable=True)  # bcrypt hash of API key
+    api_key_hash = Column(String, nullable=True)  # HMAC-SHA256 of API key (legacy rows: bcrypt)
     api_key_prefix = Column(String, nullable=True)  # First 8 chars for identification (e.g., "wh_abc12")
 
     # Status
@@ -78,19 +78,24 @@ class Tenant(Base):
     expires_at = Column(DateTime, nullable=True)  # For trial tenants
 
     # Relationships
-    users = relationship("User", back_populates="tenant", cascade="all, delete-orphan")
-    plans = relationship("Plan", back_populates="tenant", cascade="all, delete-orphan")
-    conversations = relationship("Conversation", back_populates="tenant")
-    messages = relationship("Message", back_populates="tenant")
-    leads = relationship("Lead", back_populates="tenant")
-    analysis_reports = relationship("AnalysisReport", back_populates="tenant")
-    prompt_templates = relationship("PromptTemplate", back_populates="tenant", cascade="all, delete-orphan")
-    knowledge_documents = relationship("KnowledgeDocument", back_populates="tenant", cascade="all, delete-orphan")
+    users = relationship("User", back_populates="tenant", cascade="all, delete-orphan", lazy="raise_on_sql")
+    plans = relationship("Plan", back_populates="tenant", cascade="all, delete-orphan", lazy="raise_on_sql")
+    conversations = relationship("Conversation", back_populates="tenant", lazy="raise_on_sql")
+    messages = relationship("Message", back_populates="tenant", lazy="raise_on_sql")
+    leads = relationship("Lead", back_populates="tenant", lazy="raise_on_sql")
+    analysis_reports = relationship("AnalysisReport", back_populates="tenant", lazy="raise_on_sql")
+    prompt_templates = relationship("PromptTemplate", back_populates="tenant", cascade="all, delete-orphan", lazy="raise_on_sql")
+    knowledge_documents = relationship("KnowledgeDocument", back_populates="tenant", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Tenant {self.slug} - {self.name} ({self.status.value})>"
 
 
+# Tenant lookup by slug, built and compiled once (only the slug parameter
+# varies); execute with {"slug": ...}. Shared by the admin API and TenantMiddleware
+tenant_by_slug = lambda_stmt(lambda: select(Tenant).where(Tenant.slug == bindparam("slug")))
+
+
 class PromptTemplate(Base):
     """Prompt template model for tenant-specific prompts with versioning"""
     __tablename__ = "prompt_templates"
@@ -111,12 +116,13 @@ class PromptTemplate(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="prompt_templates")
+    tenant = relationship("Tenant", back_populates="prompt_templates", lazy="raise_on_sql")
 
     # Constraints
     __table_args__ = (
         UniqueConstraint('tenant_id', 'prompt_type', 'version', name='uq_tenant_prompt_version'),
-        Index('idx_tenant_prompt_type_active', 'tenant_id', 'prompt_type', 'is_active'),
+        # Active prompt lookups read the newest version first
+        Index('idx_tenant_prompt_type_version_active', 'tenant_id', 'prompt_type', 'version', postgresql_where=text('is_active')),
     )
 
     def __repr__(self):
@@ -142,12 +148,14 @@ class KnowledgeDocument(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="knowledge_documents")
+    tenant = relationship("Tenant", back_populates="knowledge_documents", lazy="raise_on_sql")
 
     # Constraints
     __table_args__ = (
         UniqueConstraint('tenant_id', 'slug', name='uq_tenant_knowledge_slug'),
-        Index('idx_tenant_document_type', 'tenant_id', 'document_type'),
+        Index('idx_tenant_document_type', 'tenant_id', 'document_type', postgresql_where=text('is_active')),
+        # Tenant knowledge listing (newest first, includes inactive documents)
+        Index('idx_knowledge_tenant_created', 'tenant_id', 'created_at'),
     )
 
     def __repr__(self):
@@ -21,7 +21,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True, index=True)  # Nullable for migration
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)  # Nullable for migration; indexed via tenant-prefixed composites
     user_key = Column(String, nullable=False, index=True)  # No longer globally unique
     name = Column(String, nullable=True)
     email = Column(String, nullable=True)
@@ -32,9 +32,9 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tenant = relationship("Tenant", back_populates="users")
-    conversations = relationship("Conversation", back_populates="user", cascade="all, delete-orphan")
-    leads = relationship("Lead", back_populates="user", cascade="all, delete-orphan")
+    tenant = relationship("Tenant", back_populates="users", lazy="raise_on_sql")
+    conversations = relationship("Conversation", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql")
+    leads = relationship("Lead", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     # Constraints
     __table_args__ = (
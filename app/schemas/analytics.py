@@ -10,6 +10,12 @@ class AnalyzeRequest(BaseModel):
     conversation_id: UUID = Field(..., description="Conversation ID to analyze")
 
 
+class AnalyzeBatchRequest(BaseModel):
+    """Schema for batch analysis request"""
+    conversation_ids: List[UUID] = Field(..., min_items=1, max_items=100, description="Conversation IDs to analyze")
+    max_concurrency: int = Field(5, ge=1, le=20, description="Maximum analyses running at once")
+
+
 class AnalyzeResponse(BaseModel):
     """Schema for analysis response"""
     conversation_id: UUID
@@ -1,6 +1,6 @@
 """Chat schemas"""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from app.models.conversation import FunnelStage
 
@@ -24,6 +24,21 @@ class ChatResponse(BaseModel):
     handoff_reason: Optional[str] = Field(None, description="Reason for handoff")
 
 
+class ChatBatchRequest(BaseModel):
+    """Schema for batch chat request"""
+    requests: List[ChatRequest] = Field(..., min_items=1, max_items=50, description="Messages to process")
+
+
+class ChatBatchError(BaseModel):
+    """Schema for a batch item that failed"""
+    error: str = Field(..., description="Error message")
+
+
+class ChatBatchResponse(BaseModel):
+    """Schema for batch chat response"""
+    results: List[Union[ChatResponse, ChatBatchError]] = Field(..., description="One result per request, in request order")
+
+
 class MessageCreate(BaseModel):
     """Schema for creating a message"""
     conversation_id: UUID
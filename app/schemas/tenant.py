@@ -57,6 +57,7 @@ class TenantResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        orm_mode = True  # pydantic 1.x name; lets FastAPI validate ORM rows
         use_enum_values = True
 
 
@@ -64,6 +65,14 @@ class TenantWithApiKey(TenantResponse):
     """Schema for tenant response with API key (only shown once)"""
     api_key: str = Field(..., description="Full API key (SAVE THIS - shown only once!)")
 
+    @classmethod
+    def from_tenant(cls, tenant: Any, api_key: str) -> "TenantWithApiKey":
+        """Build the response from a Tenant row, reading only the declared fields"""
+        return cls(
+            **{name: getattr(tenant, name) for name in TenantResponse.__fields__},
+            api_key=api_key,
+        )
+
 
 # ========================================
 # PROMPT SCHEMAS
@@ -94,6 +103,7 @@ class PromptTemplateResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        orm_mode = True  # pydantic 1.x name; lets FastAPI validate ORM rows
         use_enum_values = True
 
 
@@ -146,6 +156,7 @@ class KnowledgeDocumentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        orm_mode = True  # pydantic 1.x name; lets FastAPI validate ORM rows
         use_enum_values = True
 
 
@@ -188,6 +199,7 @@ class TenantPlanResponse(BaseModel):
 
     class Config:
         from_attributes = True
+        orm_mode = True  # pydantic 1.x name; lets FastAPI validate ORM rows
 
 
 # ========================================
@@ -1,9 +1,22 @@
 """Authentication and authorization service for admin access"""
-from typing import Optional
+import re
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Pattern, Tuple
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.core.config import settings
 from app.utils.logger import logger
 
+# (tenant_id, user_key) -> (user id, is admin, checked at); user_key is only
+# unique per tenant. Only the decision is cached, callers load the user
+# through their own session
+_admin_user_cache: Dict[Tuple[Optional[UUID], str], Tuple[UUID, bool, float]] = {}
+ADMIN_USER_CACHE_TTL = 60
+ADMIN_USER_CACHE_SIZE = 1024
+
 
 def is_admin_user(user: Optional[User]) -> bool:
     """
@@ -18,17 +31,37 @@ def is_admin_user(user: Optional[User]) -> bool:
     if not user or not user.name:
         return False
     
+    # The check runs several times per request (chat service, agents, tools);
+    # reuse the result cached on the instance while the name is unchanged
+    cached = getattr(user, "_admin_check", None)
+    if cached is not None and cached[0] == user.name:
+        return cached[1]
+    
+    is_admin = _match_admin_keywords(user)
+    user._admin_check = (user.name, is_admin)
+    return is_admin
+
+
+@lru_cache(maxsize=8)
+def _admin_keywords_pattern(keywords: Tuple[str, ...]) -> Pattern[str]:
+    """Compile the admin keywords into one case-insensitive alternation"""
+    # Longest first so the reported match is the most specific keyword
+    alternatives = sorted({keyword.casefold() for keyword in keywords}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)), re.IGNORECASE)
+
+
+def _match_admin_keywords(user: User) -> bool:
+    """Scan the user's name for any configured admin keyword"""
     # Get admin keywords from config (default: ["admin", "ADMIN", "administrador"])
     admin_keywords = getattr(settings, 'ADMIN_KEYWORDS', ["admin", "ADMIN", "administrador"])
+    if not admin_keywords:
+        return False
     
-    user_name_lower = user.name.lower()
-    
-    # Check if any admin keyword is in the user's name
-    for keyword in admin_keywords:
-        keyword_lower = keyword.lower()
-        if keyword_lower in user_name_lower:
-            logger.info(f"✅ Admin detected! User {user.user_key} (name: '{user.name}') contains keyword: '{keyword}'")
-            return True
+    # Check if any admin keyword is in the user's name (single regex scan)
+    match = _admin_keywords_pattern(tuple(admin_keywords)).search(user.name)
+    if match:
+        logger.info(f"✅ Admin detected! User {user.user_key} (name: '{user.name}') contains keyword: '{match.group()}'")
+        return True
     
     logger.debug(f"❌ Not admin: User {user.user_key} (name: '{user.name}') - No admin keywords found in: {admin_keywords}")
     return False
@@ -48,3 +81,76 @@ def require_admin(user: Optional[User]) -> None:
         user_name = user.name if user and user.name else "Unknown"
         raise PermissionError(f"Access denied. Admin privileges required. User: {user_name}")
 
+
+async def get_admin_user_by_key(
+    db: AsyncSession,
+    user_key: str,
+    tenant_id: Optional[UUID] = None,
+) -> Optional[User]:
+    """
+    Load the admin user identified by user_key within a tenant.
+
+    The admin decision is cached for ADMIN_USER_CACHE_TTL seconds per
+    (tenant_id, user_key): non-admins are rejected without a query and admins
+    are loaded by primary key. Call invalidate_admin_user_cache when a user's
+    name changes.
+
+    Args:
+        db: Database session
+        user_key: User key
+        tenant_id: Tenant UUID (None when no tenant context is set)
+
+    Returns:
+        The admin user, or None if the user doesn't exist
+
+    Raises:
+        PermissionError: If the user is not an admin
+    """
+    key = (tenant_id, user_key)
+    cached = _admin_user_cache.get(key)
+    if cached is not None and time.time() - cached[2] < ADMIN_USER_CACHE_TTL:
+        user_id, is_admin, _ = cached
+        if not is_admin:
+            raise PermissionError("Access denied. Admin privileges required.")
+
+        user = await db.get(User, user_id)
+        if user is not None:
+            return user
+        # Deleted since it was cached
+        _admin_user_cache.pop(key, None)
+
+    query = select(User).where(User.user_key == user_key)
+    if tenant_id is not None:
+        query = query.where(User.tenant_id == tenant_id)
+    result = await db.execute(query)
+    user = result.scalar_one_or_none()
+
+    if not user:
+        return None
+
+    is_admin = is_admin_user(user)
+    if len(_admin_user_cache) >= ADMIN_USER_CACHE_SIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _admin_user_cache.pop(next(iter(_admin_user_cache)))
+    _admin_user_cache[key] = (user.id, is_admin, time.time())
+
+    if not is_admin:
+        raise PermissionError("Access denied. Admin privileges required.")
+
+    return user
+
+
+def invalidate_admin_user_cache(tenant_id: Optional[UUID], user_key: str) -> None:
+    """
+    Drop a cached admin decision so the next request checks the user again.
+
+    Args:
+        tenant_id: Tenant UUID the decision was cached under (None without tenant context)
+        user_key: User key
+    """
+    _admin_user_cache.pop((tenant_id, user_key), None)
+
+
+def clear_admin_user_cache() -> None:
+    """Drop every cached admin decision"""
+    _admin_user_cache.clear()
@@ -1,5 +1,5 @@
 """Chat service for orchestrating sales conversations"""
-from typing import Optional
+from typing import Optional, AsyncIterator
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -10,9 +10,32 @@ from app.models.conversation import Conversation
 from app.models.message import Message, MessageRole
 from app.agents.sales_agent import SalesAgent
 from app.agents.admin_agent import AdminAgent
-from app.services.auth_service import is_admin_user
+from app.services.auth_service import invalidate_admin_user_cache, is_admin_user
 from app.utils.logger import logger
 
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _is_json_serializable(value, _depth: int = 0) -> bool:
+    """
+    Check that a value only holds JSON types, without encoding it.
+
+    Tool payloads can be large; probing with json.dumps built the whole
+    string just to discard it (the JSONB column encodes it again on insert).
+    """
+    if isinstance(value, _JSON_SCALARS):
+        return True
+    if _depth > 32:
+        return False
+    if isinstance(value, (list, tuple)):
+        return all(_is_json_serializable(v, _depth + 1) for v in value)
+    if isinstance(value, dict):
+        return all(
+            isinstance(k, _JSON_SCALARS) and _is_json_serializable(v, _depth + 1)
+            for k, v in value.items()
+        )
+    return False
+
 
 class ChatService:
     """
@@ -20,6 +43,10 @@ class ChatService:
     
     Supports both single-tenant (tenant_id=None) and multi-tenant modes.
     When tenant_id is provided, all queries are filtered by tenant for isolation.
+    
+    Instances are per request: the service and its agents' tools are bound to
+    the request's database session. Construction is cheap (agents are created
+    lazily; LLM clients and agent runnables are shared process-wide).
     """
     
     def __init__(self, db: AsyncSession, tenant_id: Optional[UUID] = None):
@@ -123,6 +150,8 @@ class ChatService:
                 
                 tenant_log = f"[Tenant: {self.tenant_id}] " if self.tenant_id else ""
                 if old_name != user_name:
+                    # Admin access is derived from the name
+                    invalidate_admin_user_cache(self.tenant_id, user_key)
                     logger.info(f"{tenant_log}Updated user name: {user_key} - '{old_name}' -> '{user_name}'")
                 else:
                     logger.debug(f"{tenant_log}User name confirmed: {user_key} - '{user_name}'")
@@ -199,8 +228,6 @@ class ChatService:
         if not intermediate_steps:
             return None
         
-        import json
-        
         serialized = []
         for step in intermediate_steps:
             try:
@@ -213,10 +240,9 @@ class ChatService:
                         action_dict['tool'] = str(action.tool) if action.tool else None
                     if hasattr(action, 'tool_input'):
                         # Try to serialize tool_input
-                        try:
-                            json.dumps(action.tool_input)
+                        if _is_json_serializable(action.tool_input):
                             action_dict['tool_input'] = action.tool_input
-                        except (TypeError, ValueError):
+                        else:
                             action_dict['tool_input'] = str(action.tool_input)
                     if hasattr(action, 'log'):
                         action_dict['log'] = str(action.log) if action.log else None
@@ -224,11 +250,9 @@ class ChatService:
                     # Serialize observation
                     observation_dict = {}
                     if isinstance(observation, dict):
-                        # Try to serialize dict
-                        try:
-                            json.dumps(observation)
+                        if _is_json_serializable(observation):
                             observation_dict = observation
-                        except (TypeError, ValueError):
+                        else:
                             observation_dict = {'raw': str(observation)}
                     elif isinstance(observation, str):
                         observation_dict = {'value': observation}
@@ -245,10 +269,9 @@ class ChatService:
                     })
                 else:
                     # Fallback: convert to string representation
-                    try:
-                        json.dumps(step)
+                    if _is_json_serializable(step):
                         serialized.append({'step': step})
-                    except (TypeError, ValueError):
+                    else:
                         serialized.append({'step': str(step)})
             except Exception as e:
                 # If anything fails, just convert to string
@@ -268,28 +291,21 @@ class ChatService:
         # Serialize tool_calls if it contains non-serializable objects
         serialized_tool_calls = None
         if tool_calls:
-            import json
             # Always serialize intermediate_steps (they contain LangChain objects)
             if isinstance(tool_calls, list):
                 serialized_tool_calls = self._serialize_intermediate_steps(tool_calls)
             else:
-                # Try to serialize as-is
-                try:
-                    json.dumps(tool_calls)  # Test if serializable
+                # Store as-is when serializable
+                if _is_json_serializable(tool_calls):
                     serialized_tool_calls = tool_calls
-                except (TypeError, ValueError):
-                    # If not serializable, try to convert
-                    if isinstance(tool_calls, dict):
-                        # Try to serialize each value
-                        serialized_tool_calls = {}
-                        for k, v in tool_calls.items():
-                            try:
-                                json.dumps(v)
-                                serialized_tool_calls[k] = v
-                            except (TypeError, ValueError):
-                                serialized_tool_calls[k] = str(v)
-                    else:
-                        serialized_tool_calls = str(tool_calls)
+                elif isinstance(tool_calls, dict):
+                    # Convert values that aren't serializable
+                    serialized_tool_calls = {
+                        k: v if _is_json_serializable(v) else str(v)
+                        for k, v in tool_calls.items()
+                    }
+                else:
+                    serialized_tool_calls = str(tool_calls)
         
         message_kwargs = {
             "conversation_id": conversation_id,
@@ -307,7 +323,7 @@ class ChatService:
         
         return message
     
-    async def process_message(
+    async def _prepare_turn(
         self,
         message: str,
         user_key: str,
@@ -315,39 +331,41 @@ class ChatService:
         user_name: Optional[str] = None
     ) -> dict:
         """
-        Process a chat message through the sales agent
+        Persist the user message and resolve the agent call for one turn
         
         Args:
             message: User message
             user_key: User identification key
             conversation_id: Optional existing conversation ID
+            user_name: Optional user name
         
         Returns:
-            Response with agent message and metadata
+            Either {"blocked_response": ...} when the conversation awaits a human,
+            or the agent, its keyword arguments and the turn metadata
         """
-        try:
-            # Get or create user (with name-based linking)
-            user = await self.get_or_create_user(user_key, user_name)
-            
-            # Log user info for debugging
-            logger.info(f"Processing message for user: {user.user_key}, name: '{user.name}', is_admin: {is_admin_user(user)}")
+        # Get or create user (with name-based linking)
+        user = await self.get_or_create_user(user_key, user_name)
+        
+        # Log user info for debugging
+        logger.info(f"Processing message for user: {user.user_key}, name: '{user.name}', is_admin: {is_admin_user(user)}")
+        
+        # Get or create conversation
+        conv_uuid = UUID(conversation_id) if conversation_id else None
+        conversation = await self.get_or_create_conversation(user.id, conv_uuid)
+        
+        # VERIFICAR SE CONVERSA ESTÁ AGUARDANDO ATENDIMENTO HUMANO
+        if conversation.status.value == "awaiting_human":
+            logger.warning(f"Conversation {conversation.id} is awaiting human agent")
             
-            # Get or create conversation
-            conv_uuid = UUID(conversation_id) if conversation_id else None
-            conversation = await self.get_or_create_conversation(user.id, conv_uuid)
+            # Salvar mensagem do usuário mesmo bloqueada
+            await self.save_message(
+                conversation.id,
+                MessageRole.USER,
+                message
+            )
             
-            # VERIFICAR SE CONVERSA ESTÁ AGUARDANDO ATENDIMENTO HUMANO
-            if conversation.status.value == "awaiting_human":
-                logger.warning(f"Conversation {conversation.id} is awaiting human agent")
-                
-                # Salvar mensagem do usuário mesmo bloqueada
-                await self.save_message(
-                    conversation.id,
-                    MessageRole.USER,
-                    message
-                )
-                
-                return {
+            return {
+                "blocked_response": {
                     "response": (
                         "🔒 Esta conversa foi transferida para atendimento humano.\n\n"
                         f"Motivo: {conversation.handoff_reason}\n\n"
@@ -361,95 +379,176 @@ class ChatService:
                     "blocked": True,
                     "handoff_reason": conversation.handoff_reason,
                 }
+            }
+        
+        # Save user message
+        await self.save_message(
+            conversation.id,
+            MessageRole.USER,
+            message
+        )
+        
+        # Get chat history (excluir a mensagem atual que acabamos de salvar)
+        chat_history = await self.get_chat_history(conversation.id, limit=20)
+        
+        # Filtrar a última mensagem do usuário (que acabamos de salvar)
+        # para não duplicar no histórico
+        if chat_history and len(chat_history) > 0:
+            # Remover a última mensagem se for do usuário (já está sendo enviada como input)
+            last_msg = chat_history[-1]
+            if hasattr(last_msg, 'content') and last_msg.content == message:
+                chat_history = chat_history[:-1]
+        
+        # Armazenar IDs antes de chamar o agente (evita erro MissingGreenlet)
+        conversation_id_uuid = conversation.id
+        user_id_uuid = user.id
+        funnel_stage_value = conversation.funnel_stage.value
+        conversation_summary_value = conversation.context_summary
+        
+        # Get appropriate agent based on user type (verification happens inside _get_agent)
+        # Re-verify admin status after user update to ensure we have latest data
+        await self.db.refresh(user)
+        is_admin = is_admin_user(user)
+        logger.info(f"Final admin verification: user={user.user_key}, name='{user.name}', is_admin={is_admin}")
+        
+        agent = self._get_agent(user)
+        agent_type_name = "AdminAgent" if is_admin else "SalesAgent"
+        logger.info(f"Selected {agent_type_name} for conversation {conversation_id_uuid}")
+        
+        agent_kwargs = {
+            "message": message,
+            "conversation_id": str(conversation_id_uuid),
+            "user_id": str(user_id_uuid),
+            "user_name": user.name,
+            "conversation_summary": conversation_summary_value,
+            "chat_history": chat_history if chat_history else None,
+        }
+        if not is_admin:
+            # Sales agent takes the full signature; admin agent a simpler one
+            agent_kwargs["work_type"] = user.work_type.value if user.work_type else None
+            agent_kwargs["funnel_stage"] = funnel_stage_value
+        
+        return {
+            "agent": agent,
+            "agent_kwargs": agent_kwargs,
+            "conversation_id": conversation_id_uuid,
+            "user_id": user_id_uuid,
+            "funnel_stage": funnel_stage_value,
+        }
+    
+    async def _finish_turn(self, turn: dict, agent_response: dict) -> dict:
+        """
+        Persist the agent response and build the API response for one turn
+        
+        Args:
+            turn: Result of _prepare_turn
+            agent_response: Agent result with output and intermediate_steps
+        
+        Returns:
+            Response with agent message and metadata
+        """
+        conversation_id_uuid = turn["conversation_id"]
+        
+        # Save agent response
+        # Serialize intermediate_steps before saving
+        intermediate_steps = agent_response.get("intermediate_steps")
+        await self.save_message(
+            conversation_id_uuid,  # Usar valor armazenado
+            MessageRole.ASSISTANT,
+            agent_response["output"],
+            tool_calls=intermediate_steps  # Will be serialized in save_message
+        )
+        
+        # Buscar conversation atualizada para obter status atualizado
+        query = select(Conversation).where(Conversation.id == conversation_id_uuid)
+        if self.tenant_id is not None:
+            query = query.where(Conversation.tenant_id == self.tenant_id)
+        
+        result = await self.db.execute(query)
+        updated_conversation = result.scalar_one_or_none()
+        
+        return {
+            "response": agent_response["output"],
+            "conversation_id": conversation_id_uuid,  # Usar valor armazenado
+            "user_id": turn["user_id"],  # Usar valor armazenado
+            "funnel_stage": updated_conversation.funnel_stage.value if updated_conversation else turn["funnel_stage"],
+            "status": updated_conversation.status.value if updated_conversation else "active",
+        }
+    
+    async def process_message(
+        self,
+        message: str,
+        user_key: str,
+        conversation_id: Optional[str] = None,
+        user_name: Optional[str] = None
+    ) -> dict:
+        """
+        Process a chat message through the sales agent
+        
+        Args:
+            message: User message
+            user_key: User identification key
+            conversation_id: Optional existing conversation ID
+        
+        Returns:
+            Response with agent message and metadata
+        """
+        try:
+            turn = await self._prepare_turn(message, user_key, conversation_id, user_name)
+            if "blocked_response" in turn:
+                return turn["blocked_response"]
             
-            # Save user message
-            await self.save_message(
-                conversation.id,
-                MessageRole.USER,
-                message
+            # Tool calls are persisted with the assistant message
+            agent_response = await turn["agent"].invoke(
+                **turn["agent_kwargs"],
+                return_intermediate_steps=True,
             )
             
-            # Get chat history (excluir a mensagem atual que acabamos de salvar)
-            chat_history = await self.get_chat_history(conversation.id, limit=20)
-            
-            # Filtrar a última mensagem do usuário (que acabamos de salvar)
-            # para não duplicar no histórico
-            if chat_history and len(chat_history) > 0:
-                # Remover a última mensagem se for do usuário (já está sendo enviada como input)
-                last_msg = chat_history[-1]
-                if hasattr(last_msg, 'content') and last_msg.content == message:
-                    chat_history = chat_history[:-1]
-            
-            # Armazenar IDs antes de chamar o agente (evita erro MissingGreenlet)
-            conversation_id_uuid = conversation.id
-            user_id_uuid = user.id
-            funnel_stage_value = conversation.funnel_stage.value
-            conversation_summary_value = conversation.context_summary
-            
-            # Get appropriate agent based on user type (verification happens inside _get_agent)
-            # Re-verify admin status after user update to ensure we have latest data
-            await self.db.refresh(user)
-            is_admin = is_admin_user(user)
-            logger.info(f"Final admin verification: user={user.user_key}, name='{user.name}', is_admin={is_admin}")
-            
-            agent = self._get_agent(user)
-            agent_type_name = "AdminAgent" if is_admin else "SalesAgent"
-            logger.info(f"Selected {agent_type_name} for conversation {conversation_id_uuid}")
-            
-            if is_admin:
-                # Invoke admin agent (simpler signature)
-                agent_response = await agent.invoke(
-                    message=message,
-                    conversation_id=str(conversation_id_uuid),
-                    user_id=str(user_id_uuid),
-                    user_name=user.name,
-                    conversation_summary=conversation_summary_value,
-                    chat_history=chat_history if chat_history else None,
-                )
-            else:
-                # Invoke sales agent (full signature)
-                agent_response = await agent.invoke(
-                    message=message,
-                    conversation_id=str(conversation_id_uuid),
-                    user_id=str(user_id_uuid),
-                    user_name=user.name,
-                    work_type=user.work_type.value if user.work_type else None,
-                    conversation_summary=conversation_summary_value,
-                    funnel_stage=funnel_stage_value,
-                    chat_history=chat_history if chat_history else None,
-                )
-            
-            # Save agent response
-            # Serialize intermediate_steps before saving
-            intermediate_steps = agent_response.get("intermediate_steps")
-            await self.save_message(
-                conversation_id_uuid,  # Usar valor armazenado
-                MessageRole.ASSISTANT,
-                agent_response["output"],
-                tool_calls=intermediate_steps  # Will be serialized in save_message
-            )
+            return await self._finish_turn(turn, agent_response)
             
-            # Buscar conversation atualizada para obter status atualizado
-            query = select(Conversation).where(Conversation.id == conversation_id_uuid)
-            if self.tenant_id is not None:
-                query = query.where(Conversation.tenant_id == self.tenant_id)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+            raise
+    
+    async def stream_message(
+        self,
+        message: str,
+        user_key: str,
+        conversation_id: Optional[str] = None,
+        user_name: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Process a chat message, streaming the agent answer as it is generated
+        
+        Args:
+            message: User message
+            user_key: User identification key
+            conversation_id: Optional existing conversation ID
+            user_name: Optional user name
+        
+        Yields:
+            {"type": "token", "content": ...} events, then one
+            {"type": "done", ...} event with the same fields as process_message
+        """
+        try:
+            turn = await self._prepare_turn(message, user_key, conversation_id, user_name)
+            if "blocked_response" in turn:
+                yield {"type": "done", **turn["blocked_response"]}
+                return
             
-            result = await self.db.execute(query)
-            updated_conversation = result.scalar_one_or_none()
+            agent_response = {"output": ""}
+            # Tool calls are persisted with the assistant message
+            async for event in turn["agent"].astream(
+                **turn["agent_kwargs"],
+                return_intermediate_steps=True,
+            ):
+                if event["type"] == "final":
+                    agent_response = event
+                else:
+                    yield event
             
-            return {
-                "response": agent_response["output"],
-                "conversation_id": conversation_id_uuid,  # Usar valor armazenado
-                "user_id": user_id_uuid,  # Usar valor armazenado
-                "funnel_stage": updated_conversation.funnel_stage.value if updated_conversation else funnel_stage_value,
-                "status": updated_conversation.status.value if updated_conversation else "active",
-            }
+            yield {"type": "done", **await self._finish_turn(turn, agent_response)}
             
         except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error streaming message: {e}", exc_info=True)
             raise
-
-
-
@@ -1,8 +1,39 @@
 """Prompt service for loading and injecting templates"""
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from string import Formatter
+from typing import Dict, Any, FrozenSet
 from app.utils.logger import logger
 
+# Sales prompt variables that change every turn. Current templates keep them in
+# the per-turn context; older (tenant) templates may still reference them.
+SALES_TURN_VARIABLES = frozenset({
+    "user_name", "work_type", "conversation_summary", "funnel_stage", "conversation_id",
+})
+
+
+@lru_cache(maxsize=32)
+def _read_prompt_file(path: Path) -> str:
+    """Read a prompt/knowledge file once per process (files ship with the app)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=64)
+def template_fields(template: str) -> FrozenSet[str]:
+    """Names of the {variable} placeholders used by a template"""
+    return frozenset(field for _, field, _, _ in Formatter().parse(template) if field)
+
+
+@lru_cache(maxsize=8)
+def _render_static_sales_prompt(template: str, product_knowledge: str, available_plans: str) -> str:
+    """Render a sales template without per-turn variables (memoized)"""
+    return prompt_service.inject_variables(
+        template,
+        product_knowledge=product_knowledge,
+        available_plans=available_plans,
+    )
+
 
 class PromptService:
     """Service for managing prompt templates"""
@@ -24,9 +55,8 @@ class PromptService:
         template_path = self.prompts_dir / template_name
         
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            logger.info(f"Loaded template: {template_name}")
+            content = _read_prompt_file(template_path)
+            logger.debug(f"Loaded template: {template_name}")
             return content
         except FileNotFoundError:
             logger.error(f"Template not found: {template_name}")
@@ -48,9 +78,8 @@ class PromptService:
         knowledge_path = self.knowledge_dir / knowledge_file
         
         try:
-            with open(knowledge_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            logger.info(f"Loaded knowledge: {knowledge_file}")
+            content = _read_prompt_file(knowledge_path)
+            logger.debug(f"Loaded knowledge: {knowledge_file}")
             return content
         except FileNotFoundError:
             logger.error(f"Knowledge file not found: {knowledge_file}")
@@ -116,6 +145,14 @@ class PromptService:
         template = self.load_template("sales_agent.txt")
         product_knowledge = self.load_knowledge("workhub_product.txt")
         
+        # Static templates render identically every turn
+        if SALES_TURN_VARIABLES.isdisjoint(template_fields(template)):
+            return _render_static_sales_prompt(
+                template,
+                product_knowledge,
+                available_plans or "Carregando planos...",
+            )
+        
         return self.inject_variables(
             template,
             product_knowledge=product_knowledge,
@@ -127,6 +164,41 @@ class PromptService:
             conversation_id=conversation_id or "N/A",
         )
     
+    def get_sales_context(
+        self,
+        user_name: str = None,
+        work_type: str = None,
+        conversation_summary: str = None,
+        funnel_stage: str = "awareness",
+        conversation_id: str = None,
+    ) -> str:
+        """
+        Get per-turn context for the sales agent
+        
+        Kept out of the system prompt so the system prompt stays byte-identical
+        across turns and can be served from the LLM provider's prompt cache.
+        
+        Args:
+            user_name: User's name
+            work_type: Type of work (freelancer, startup, etc.)
+            conversation_summary: Summary of conversation so far
+            funnel_stage: Current funnel stage
+            conversation_id: Current conversation ID
+        
+        Returns:
+            Context block ready for LLM
+        """
+        template = self.load_template("sales_context.txt")
+        
+        return self.inject_variables(
+            template,
+            user_name=user_name or "Cliente",
+            work_type=work_type or "Não informado",
+            conversation_summary=conversation_summary or "Primeira interação",
+            funnel_stage=funnel_stage,
+            conversation_id=conversation_id or "N/A",
+        )
+    
     def get_analyst_prompt(self) -> str:
         """
         Get analyst agent prompt
@@ -155,6 +227,27 @@ class PromptService:
             template,
             conversation_id=conversation_id or "N/A",
         )
+    
+    def get_admin_context(
+        self,
+        conversation_id: str = None,
+    ) -> str:
+        """
+        Get per-turn context for the admin agent
+        
+        Args:
+            conversation_id: Current conversation ID
+        
+        Returns:
+            Context block ready for LLM
+        """
+        template = self.load_template("admin_context.txt")
+        
+        return self.inject_variables(
+            template,
+            conversation_id=conversation_id or "N/A",
+        )
 
 
-
+# Singleton instance (the service is stateless; files are cached by _read_prompt_file)
+prompt_service = PromptService()
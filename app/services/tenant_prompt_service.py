@@ -1,4 +1,5 @@
 """Tenant-aware prompt service for multi-tenant support"""
+import asyncio
 from pathlib import Path
 from typing import Dict, Any, Optional
 from uuid import UUID
@@ -6,17 +7,51 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import time
 
-from app.models import Tenant, PromptTemplate, PromptType, KnowledgeDocument, DocumentType
+from app.models import Tenant, Plan, BillingCycle, PromptTemplate, PromptType, KnowledgeDocument, DocumentType
+from app.services.prompt_service import SALES_TURN_VARIABLES, template_fields
 from app.utils.logger import logger
 
 
+_BILLING_CYCLE_LABELS = {
+    BillingCycle.DAILY: "dia",
+    BillingCycle.MONTHLY: "mês",
+    BillingCycle.YEARLY: "ano",
+}
+
+
+def _format_price(price) -> str:
+    """Format a price as BRL without trailing zero cents (e.g. 49, 49,90)"""
+    if price == int(price):
+        return str(int(price))
+    return f"{price:.2f}".replace(".", ",")
+
+
+def _format_plans_summary(plans) -> str:
+    """Render plan rows (name, price, billing_cycle, features, description) as prompt text"""
+    if not plans:
+        return "Nenhum plano disponível no momento."
+
+    lines = ["PLANOS:"]
+    for index, (name, price, billing_cycle, features, description) in enumerate(plans, start=1):
+        cycle = _BILLING_CYCLE_LABELS.get(billing_cycle, billing_cycle.value)
+        lines.append("")
+        lines.append(f"{index}. {name.strip().upper()} - R$ {_format_price(price)}/{cycle}")
+        if description:
+            lines.append(f"   {description.strip()}")
+        for feature in features or []:
+            lines.append(f"   - {str(feature).strip()}")
+    return "\n".join(lines)
+
+
 class TenantPromptService:
     """
     Service for managing tenant-specific prompts with caching.
 
     Features:
     - Database-backed prompts (TenantPrompt table)
-    - TTL-based caching (10 minutes for prompts, 30 minutes for knowledge)
+    - TTL-based caching (30 minutes for knowledge); prompts are revalidated
+      against their active version every 30 seconds, so updates made through
+      other workers are picked up without reloading unchanged prompts
     - Fallback to file-based templates for new tenants
     - Versioning support
     """
@@ -26,17 +61,32 @@ class TenantPromptService:
         self.knowledge_dir = self.prompts_dir / "knowledge"
 
         # Caches with TTL
-        self.prompt_cache: Dict[str, tuple[str, float]] = {}  # cache_key -> (content, timestamp)
+        self.prompt_cache: Dict[str, tuple[str, Optional[int], float]] = {}  # cache_key -> (content, version, timestamp)
+        self.prompt_locks: Dict[str, asyncio.Lock] = {}  # One reload at a time per prompt
         self.knowledge_cache: Dict[str, tuple[str, float]] = {}
+        self.plans_cache: Dict[UUID, tuple[str, float]] = {}  # tenant_id -> (plans summary, timestamp)
+        self.rendered_cache: Dict[str, tuple[str, float]] = {}  # Prompts with variables injected
+        self.rendered_generations: Dict[UUID, int] = {}  # tenant_id -> generation baked into rendered keys
+        self.context_templates: Dict[str, str] = {}  # Per-turn context templates (shared by all tenants)
+        self.tenant_cache: Dict[UUID, tuple[tuple[str, str], float]] = {}  # tenant_id -> ((name, business_type), timestamp)
 
         # Cache TTLs (in seconds)
-        self.prompt_ttl = 600  # 10 minutes
+        self.prompt_ttl = 30  # Then revalidated against the active version (cheap query)
         self.knowledge_ttl = 1800  # 30 minutes
+        self.tenant_ttl = 600  # 10 minutes
+        self.plans_ttl = 600  # 10 minutes
+        self.rendered_ttl = 60  # 1 minute
+        self.rendered_max_entries = 1024
 
     def _get_cache_key(self, tenant_id: UUID, key_type: str, identifier: str) -> str:
         """Generate cache key"""
         return f"{tenant_id}:{key_type}:{identifier}"
 
+    def _get_rendered_key(self, tenant_id: UUID, key_type: str, identifier: str) -> str:
+        """Generate a rendered prompt cache key for the tenant's current generation"""
+        generation = self.rendered_generations.get(tenant_id, 0)
+        return self._get_cache_key(tenant_id, f"{key_type}@{generation}", identifier)
+
     def _is_cache_valid(self, timestamp: float, ttl: int) -> bool:
         """Check if cached value is still valid"""
         return (time.time() - timestamp) < ttl
@@ -66,15 +116,60 @@ class TenantPromptService:
         cache_key = self._get_cache_key(tenant_id, "prompt", prompt_type.value)
 
         # Check cache
-        if cache_key in self.prompt_cache:
-            cached_content, timestamp = self.prompt_cache[cache_key]
-            if self._is_cache_valid(timestamp, self.prompt_ttl):
-                logger.debug(f"Prompt cache hit: {cache_key}")
-                return cached_content
-            else:
-                logger.debug(f"Prompt cache expired: {cache_key}")
+        cached = self.prompt_cache.get(cache_key)
+        if cached and self._is_cache_valid(cached[2], self.prompt_ttl):
+            logger.debug(f"Prompt cache hit: {cache_key}")
+            return cached[0]
+
+        # Concurrent turns wait for a single revalidation/reload
+        async with self.prompt_locks.setdefault(cache_key, asyncio.Lock()):
+            cached = self.prompt_cache.get(cache_key)
+            if cached and self._is_cache_valid(cached[2], self.prompt_ttl):
+                return cached[0]
+
+            if cached:
+                # Keep the cached text while the active version is unchanged
+                version = await self._get_active_prompt_version(db, tenant_id, prompt_type)
+                if version == cached[1]:
+                    logger.debug(f"Prompt cache revalidated: {cache_key}")
+                    self.prompt_cache[cache_key] = (cached[0], version, time.time())
+                    return cached[0]
+
+            content, version = await self._load_prompt(db, tenant_id, prompt_type)
+            self.prompt_cache[cache_key] = (content, version, time.time())
+            return content
 
-        # Try database
+    async def _get_active_prompt_version(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        prompt_type: PromptType
+    ) -> Optional[int]:
+        """Get the active prompt version number (None when the file fallback is used)"""
+        result = await db.execute(
+            select(PromptTemplate.version)
+            .where(
+                PromptTemplate.tenant_id == tenant_id,
+                PromptTemplate.prompt_type == prompt_type,
+                PromptTemplate.is_active == True
+            )
+            .order_by(PromptTemplate.version.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def _load_prompt(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        prompt_type: PromptType
+    ) -> tuple[str, Optional[int]]:
+        """
+        Load prompt content from the database, falling back to the default file.
+
+        Returns:
+            Tuple of content and active version (None for the file fallback)
+        """
         result = await db.execute(
             select(PromptTemplate)
             .where(
@@ -83,20 +178,17 @@ class TenantPromptService:
                 PromptTemplate.is_active == True
             )
             .order_by(PromptTemplate.version.desc())
+            .limit(1)
         )
         prompt_template = result.scalar_one_or_none()
 
         if prompt_template:
             logger.info(f"Loaded prompt from DB: tenant={tenant_id}, type={prompt_type.value}, version={prompt_template.version}")
-            content = prompt_template.system_prompt
-        else:
-            # Fallback to file
-            logger.info(f"No DB prompt found, using file fallback: tenant={tenant_id}, type={prompt_type.value}")
-            content = self._load_default_template(prompt_type)
+            return prompt_template.system_prompt, prompt_template.version
 
-        # Cache and return
-        self.prompt_cache[cache_key] = (content, time.time())
-        return content
+        # Fallback to file
+        logger.info(f"No DB prompt found, using file fallback: tenant={tenant_id}, type={prompt_type.value}")
+        return self._load_default_template(prompt_type), None
 
     async def get_knowledge_base(
         self,
@@ -151,6 +243,69 @@ class TenantPromptService:
         self.knowledge_cache[cache_key] = (content, time.time())
         return content
 
+    async def get_plans_summary(self, db: AsyncSession, tenant_id: UUID) -> str:
+        """
+        Get a summary of the tenant's active plans (with caching).
+
+        The summary is injected into the static system prompt, so it is
+        formatted deterministically (plans ordered by price then slug, fixed
+        price format) to keep the prompt bytes identical between turns.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID
+
+        Returns:
+            Plans summary text
+        """
+        if tenant_id in self.plans_cache:
+            cached_summary, timestamp = self.plans_cache[tenant_id]
+            if self._is_cache_valid(timestamp, self.plans_ttl):
+                logger.debug(f"Plans summary cache hit: tenant={tenant_id}")
+                return cached_summary
+
+        result = await db.execute(
+            select(Plan.name, Plan.price, Plan.billing_cycle, Plan.features, Plan.description)
+            .where(Plan.tenant_id == tenant_id, Plan.is_active == True)
+            .order_by(Plan.price, Plan.slug)
+        )
+        summary = _format_plans_summary(result.all())
+
+        self.plans_cache[tenant_id] = (summary, time.time())
+        return summary
+
+    def invalidate_plans_summary(self, tenant_id: UUID):
+        """
+        Invalidate cached plans summary for tenant (call after plans change).
+
+        Args:
+            tenant_id: Tenant UUID
+        """
+        self.plans_cache.pop(tenant_id, None)
+        self._invalidate_rendered(tenant_id)
+        logger.info(f"Invalidated plans summary cache for tenant {tenant_id}")
+
+    def invalidate_knowledge(self, tenant_id: UUID):
+        """
+        Invalidate cached knowledge documents for tenant (call after documents change).
+
+        Args:
+            tenant_id: Tenant UUID
+        """
+        for key in [k for k in self.knowledge_cache if k.startswith(f"{tenant_id}:")]:
+            self.knowledge_cache.pop(key, None)
+        self._invalidate_rendered(tenant_id)
+        logger.info(f"Invalidated knowledge cache for tenant {tenant_id}")
+
+    def _invalidate_rendered(self, tenant_id: UUID):
+        """
+        Drop rendered prompts built from stale tenant data.
+
+        Bumps the tenant's generation instead of scanning the cache: old keys
+        are never looked up again and age out of the bounded rendered cache.
+        """
+        self.rendered_generations[tenant_id] = self.rendered_generations.get(tenant_id, 0) + 1
+
     def _load_default_template(self, prompt_type: PromptType) -> str:
         """
         Load default prompt template from file.
@@ -192,6 +347,15 @@ class TenantPromptService:
         logger.info(f"Loaded knowledge file: {filename}")
         return content
 
+    def _load_context_template(self, filename: str) -> str:
+        """Load a per-turn context template from file (cached for the process lifetime)"""
+        if filename not in self.context_templates:
+            template_path = self.prompts_dir / filename
+            with open(template_path, 'r', encoding='utf-8') as f:
+                self.context_templates[filename] = f.read()
+            logger.info(f"Loaded context template: {filename}")
+        return self.context_templates[filename]
+
     def inject_variables(self, template: str, **kwargs: Any) -> str:
         """
         Inject variables into template.
@@ -251,6 +415,10 @@ class TenantPromptService:
         Returns:
             Complete prompt ready for LLM
         """
+        # Taken before loading, so a render from data invalidated meanwhile
+        # is stored under the old generation and never served
+        generation_key = self._get_rendered_key(tenant_id, "sales_prompt", "")
+
         # Load prompt template
         template = await self.get_prompt(db, tenant_id, PromptType.SALES_AGENT)
 
@@ -258,25 +426,119 @@ class TenantPromptService:
         product_knowledge = await self.get_knowledge_base(db, tenant_id)
 
         # Get tenant config for business-specific variables
+        tenant_name, business_domain = await self._get_tenant_variables(db, tenant_id)
+
+        # Templates without per-turn variables render once per set of inputs
+        static = SALES_TURN_VARIABLES.isdisjoint(template_fields(template))
+        if static:
+            inputs_hash = hash((template, product_knowledge, tenant_name, business_domain, available_plans))
+            cache_key = f"{generation_key}{inputs_hash}"
+            if cache_key in self.rendered_cache:
+                cached_content, timestamp = self.rendered_cache[cache_key]
+                if self._is_cache_valid(timestamp, self.rendered_ttl):
+                    logger.debug(f"Rendered prompt cache hit: {cache_key}")
+                    return cached_content
+
+        # Inject variables
+        content = self.inject_variables(
+            template,
+            product_knowledge=product_knowledge,
+            tenant_name=tenant_name,
+            business_domain=business_domain,
+            user_name=user_name or "Cliente",
+            work_type=work_type or "Não informado",
+            conversation_summary=conversation_summary or "Primeira interação",
+            funnel_stage=funnel_stage,
+            available_plans=available_plans or "Carregando planos...",
+            conversation_id=conversation_id or "N/A",
+        )
+
+        if static:
+            self._put_rendered(cache_key, content)
+        return content
+
+    def _put_rendered(self, cache_key: str, content: str):
+        """Store a rendered prompt, evicting the oldest entry (dicts keep insertion order) to bound memory"""
+        self.rendered_cache.pop(cache_key, None)
+        if len(self.rendered_cache) >= self.rendered_max_entries:
+            self.rendered_cache.pop(next(iter(self.rendered_cache)))
+        self.rendered_cache[cache_key] = (content, time.time())
+
+    async def _get_tenant_variables(self, db: AsyncSession, tenant_id: UUID) -> tuple[str, str]:
+        """
+        Get (tenant name, business domain) for prompt injection (with caching).
+
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID
+
+        Returns:
+            Tuple of tenant name and business domain
+        """
+        if tenant_id in self.tenant_cache:
+            cached_variables, timestamp = self.tenant_cache[tenant_id]
+            if self._is_cache_valid(timestamp, self.tenant_ttl):
+                return cached_variables
+
         result = await db.execute(
-            select(Tenant).where(Tenant.id == tenant_id)
+            select(Tenant.name, Tenant.config).where(Tenant.id == tenant_id)
         )
-        tenant = result.scalar_one_or_none()
+        row = result.one_or_none()
 
-        if not tenant:
+        if not row:
             logger.warning(f"Tenant {tenant_id} not found for prompt injection")
+            return "Empresa", "coworking"
 
-        # Inject variables
+        variables = (row.name, (row.config or {}).get("business_type", "coworking"))
+        self.tenant_cache[tenant_id] = (variables, time.time())
+        return variables
+
+    def get_sales_context(
+        self,
+        user_name: str = None,
+        work_type: str = None,
+        conversation_summary: str = None,
+        funnel_stage: str = "awareness",
+        conversation_id: str = None,
+    ) -> str:
+        """
+        Get per-turn context for the sales agent.
+
+        Sent as a separate system message after the tenant prompt, so the
+        tenant prompt stays byte-identical across turns and can be served
+        from the LLM provider's prompt cache.
+
+        Args:
+            user_name: User's name
+            work_type: Type of work
+            conversation_summary: Conversation summary
+            funnel_stage: Current funnel stage
+            conversation_id: Conversation ID
+
+        Returns:
+            Context block ready for LLM
+        """
         return self.inject_variables(
-            template,
-            product_knowledge=product_knowledge,
-            tenant_name=tenant.name if tenant else "Empresa",
-            business_domain=tenant.config.get("business_type", "coworking") if tenant else "coworking",
+            self._load_context_template("sales_context.txt"),
             user_name=user_name or "Cliente",
             work_type=work_type or "Não informado",
             conversation_summary=conversation_summary or "Primeira interação",
             funnel_stage=funnel_stage,
-            available_plans=available_plans or "Carregando planos...",
+            conversation_id=conversation_id or "N/A",
+        )
+
+    def get_admin_context(self, conversation_id: str = None) -> str:
+        """
+        Get per-turn context for the admin agent.
+
+        Args:
+            conversation_id: Conversation ID
+
+        Returns:
+            Context block ready for LLM
+        """
+        return self.inject_variables(
+            self._load_context_template("admin_context.txt"),
             conversation_id=conversation_id or "N/A",
         )
 
@@ -297,13 +559,25 @@ class TenantPromptService:
         Returns:
             Complete admin prompt ready for LLM
         """
+        cache_key = self._get_rendered_key(tenant_id, "admin_prompt", conversation_id or "N/A")
+
+        # Repeated turns of the same conversation reuse the rendered prompt
+        if cache_key in self.rendered_cache:
+            cached_content, timestamp = self.rendered_cache[cache_key]
+            if self._is_cache_valid(timestamp, self.rendered_ttl):
+                logger.debug(f"Rendered prompt cache hit: {cache_key}")
+                return cached_content
+
         template = await self.get_prompt(db, tenant_id, PromptType.ADMIN_AGENT)
 
-        return self.inject_variables(
+        content = self.inject_variables(
             template,
             conversation_id=conversation_id or "N/A",
         )
 
+        self._put_rendered(cache_key, content)
+        return content
+
     async def get_analyst_prompt(
         self,
         db: AsyncSession,
@@ -335,22 +609,18 @@ class TenantPromptService:
             self.prompt_cache.pop(cache_key, None)
             logger.info(f"Invalidated prompt cache: {cache_key}")
         else:
-            # Invalidate all for tenant
-            keys_to_remove = [
-                k for k in self.prompt_cache
-                if k.startswith(f"{tenant_id}:")
-            ]
-            for key in keys_to_remove:
-                self.prompt_cache.pop(key, None)
+            # Invalidate all for tenant (one key per prompt type)
+            for each_type in PromptType:
+                self.prompt_cache.pop(self._get_cache_key(tenant_id, "prompt", each_type.value), None)
             logger.info(f"Invalidated all prompt cache for tenant {tenant_id}")
 
-        # Also invalidate knowledge cache
-        knowledge_keys = [
-            k for k in self.knowledge_cache
-            if k.startswith(f"{tenant_id}:")
-        ]
-        for key in knowledge_keys:
+        self.tenant_cache.pop(tenant_id, None)
+        self.plans_cache.pop(tenant_id, None)
+
+        # Also invalidate knowledge and rendered prompt caches
+        for key in [k for k in self.knowledge_cache if k.startswith(f"{tenant_id}:")]:
             self.knowledge_cache.pop(key, None)
+        self._invalidate_rendered(tenant_id)
 
 
 # Singleton instance
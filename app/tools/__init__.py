@@ -10,6 +10,7 @@ from app.tools.lead_tools import create_lead_tools
 from app.tools.plan_tools import create_plan_tools
 from app.tools.analytics_tools import create_analytics_tools
 from app.tools.handoff_tools import create_handoff_tools
+from app.tools.batch_tools import create_batch_tool
 from app.models.user import User
 from app.utils.logger import logger
 
@@ -87,6 +88,7 @@ def create_analyst_tools(db: AsyncSession, user: Optional[User] = None) -> List[
     tools = []
     tools.extend(create_analytics_tools(db, user))
     tools.extend(create_conversation_tools(db))
+    tools.append(create_batch_tool(tools))
     
     return tools
 
@@ -116,6 +118,9 @@ def create_admin_tools(db: AsyncSession, user: Optional[User] = None) -> List[Ba
     # Message tools for viewing messages
     tools.extend(create_message_tools(db))
     
+    # Batch adapter for independent queries
+    tools.append(create_batch_tool(tools))
+    
     logger.info(f"Admin tools created: {len(tools)}")
     return tools
 
@@ -124,4 +129,5 @@ __all__ = [
     "create_sales_tools",
     "create_analyst_tools",
     "create_admin_tools",
+    "create_batch_tool",
 ]
@@ -0,0 +1,71 @@
+"""Batch tool for running several independent tool calls in one agent step"""
+from typing import Any, Dict, List
+from langchain.tools import BaseTool, StructuredTool
+from pydantic import BaseModel, Field
+
+from app.utils.logger import logger
+
+BATCH_TOOL_NAME = "batch_tools"
+MAX_BATCH_INVOCATIONS = 10
+
+
+class ToolInvocation(BaseModel):
+    """A single tool call inside a batch"""
+    tool_name: str = Field(..., description="Name of the tool to call")
+    arguments: Dict[str, Any] = Field(default_factory=dict, description="Arguments for the tool")
+
+
+class BatchToolsInput(BaseModel):
+    """Input schema for batch_tools tool"""
+    invocations: List[ToolInvocation] = Field(
+        ...,
+        description=f"Independent tool calls to run (max {MAX_BATCH_INVOCATIONS})",
+    )
+
+
+def create_batch_tool(tools: List[BaseTool]) -> BaseTool:
+    """
+    Create a tool that runs several independent tool calls in one agent step
+
+    The functions agent emits one tool call per LLM turn; batching independent
+    queries saves the extra LLM round-trips. Calls run one after another since
+    the tools share the request's database session.
+
+    Args:
+        tools: Tools that may be invoked through the batch
+
+    Returns:
+        LangChain tool
+    """
+    registry = {tool.name: tool for tool in tools if tool.name != BATCH_TOOL_NAME}
+
+    async def _run_batch(invocations: List[ToolInvocation]) -> dict:
+        if len(invocations) > MAX_BATCH_INVOCATIONS:
+            return {"error": f"Maximum of {MAX_BATCH_INVOCATIONS} invocations per batch"}
+
+        results = []
+        for invocation in invocations:
+            if isinstance(invocation, dict):
+                invocation = ToolInvocation(**invocation)
+            tool = registry.get(invocation.tool_name)
+            if tool is None:
+                results.append({"tool_name": invocation.tool_name, "error": "Unknown tool"})
+                continue
+            try:
+                result = await tool.ainvoke(invocation.arguments)
+                results.append({"tool_name": invocation.tool_name, "result": result})
+            except Exception as e:
+                logger.error(f"Error running {invocation.tool_name} in batch: {e}")
+                results.append({"tool_name": invocation.tool_name, "error": str(e)})
+
+        return {"results": results, "total": len(results)}
+
+    return StructuredTool.from_function(
+        coroutine=_run_batch,
+        name=BATCH_TOOL_NAME,
+        description=(
+            "Run several independent tool calls in a single step and get all results together. "
+            "Prefer this over sequential calls when the calls don't depend on each other's results."
+        ),
+        args_schema=BatchToolsInput,
+    )
@@ -4,6 +4,7 @@ Tenant-aware tools wrapper for multi-tenant support.
 This module wraps existing tools with tenant_id injection to ensure data isolation.
 All database queries are automatically scoped to the tenant.
 """
+from datetime import datetime
 from typing import Optional, Callable, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,7 +12,11 @@ from sqlalchemy import select, update as sql_update
 from langchain.tools import StructuredTool
 from pydantic import BaseModel
 
-from app.models import User, Conversation, Message, Lead, Plan
+from app.models import (
+    User, Conversation, Message, Lead, Plan,
+    ConversationStatus, FunnelStage, LeadStage,
+)
+from app.services.auth_service import invalidate_admin_user_cache
 from app.utils.logger import logger
 
 # Import original tool schemas
@@ -50,6 +55,7 @@ class TenantToolRegistry:
         """
         self.db = db
         self.tenant_id = tenant_id
+        self._tools: Optional[list] = None
 
     def _create_tenant_tool(
         self,
@@ -158,6 +164,10 @@ class TenantToolRegistry:
             await db.commit()
             await db.refresh(user)
 
+            if name is not None:
+                # Admin access is derived from the name
+                invalidate_admin_user_cache(tenant_id, user_key)
+
             return {
                 "success": True,
                 "message": "User updated successfully",
@@ -184,9 +194,7 @@ class TenantToolRegistry:
     ) -> dict:
         """Get conversation history (tenant-scoped)"""
         try:
-            import uuid as uuid_mod
-
-            conv_uuid = uuid_mod.UUID(conversation_id)
+            conv_uuid = UUID(conversation_id)
             limit = limit or 10
             limit = min(max(1, limit), 100)
 
@@ -228,10 +236,7 @@ class TenantToolRegistry:
     ) -> dict:
         """Update conversation status (tenant-scoped)"""
         try:
-            import uuid as uuid_mod
-            from app.models import ConversationStatus, FunnelStage
-
-            conv_uuid = uuid_mod.UUID(conversation_id)
+            conv_uuid = UUID(conversation_id)
 
             result = await db.execute(
                 select(Conversation).where(
@@ -323,11 +328,8 @@ class TenantToolRegistry:
     ) -> dict:
         """Create or update lead (tenant-scoped)"""
         try:
-            import uuid as uuid_mod
-            from app.models import LeadStage
-
-            conv_uuid = uuid_mod.UUID(conversation_id)
-            user_uuid = uuid_mod.UUID(user_id)
+            conv_uuid = UUID(conversation_id)
+            user_uuid = UUID(user_id)
 
             # Check if lead exists
             result = await db.execute(
@@ -343,7 +345,7 @@ class TenantToolRegistry:
                 lead.stage = LeadStage(stage.lower())
                 lead.score = score
                 if preferred_plan_id:
-                    lead.preferred_plan_id = uuid_mod.UUID(preferred_plan_id)
+                    lead.preferred_plan_id = UUID(preferred_plan_id)
             else:
                 # Create new
                 lead = Lead(
@@ -352,7 +354,7 @@ class TenantToolRegistry:
                     user_id=user_uuid,
                     stage=LeadStage(stage.lower()),
                     score=score,
-                    preferred_plan_id=uuid_mod.UUID(preferred_plan_id) if preferred_plan_id else None
+                    preferred_plan_id=UUID(preferred_plan_id) if preferred_plan_id else None
                 )
                 db.add(lead)
 
@@ -384,11 +386,7 @@ class TenantToolRegistry:
     ) -> dict:
         """Request handoff to human (tenant-scoped)"""
         try:
-            import uuid as uuid_mod
-            from datetime import datetime
-            from app.models import ConversationStatus
-
-            conv_uuid = uuid_mod.UUID(conversation_id)
+            conv_uuid = UUID(conversation_id)
 
             result = await db.execute(
                 select(Conversation).where(
@@ -428,9 +426,15 @@ class TenantToolRegistry:
         """
         Get all tenant-scoped tools.
 
+        Tools are built once per registry. They close over this registry's
+        session, so they are not shared with other registries/requests.
+
         Returns:
             List of StructuredTool instances with tenant context
         """
+        if self._tools is not None:
+            return self._tools
+
         tools = []
 
         # User tools
@@ -488,4 +492,5 @@ class TenantToolRegistry:
         ))
 
         logger.info(f"[Tenant: {self.tenant_id}] Created {len(tools)} tenant-scoped tools")
+        self._tools = tools
         return tools
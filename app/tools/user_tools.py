@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 import uuid
 
 from app.models.user import User, WorkType
+from app.services.auth_service import invalidate_admin_user_cache
 from app.utils.logger import logger
 
 
@@ -230,6 +231,11 @@ async def update_user_info(
         await db.commit()
         await db.refresh(user)
         
+        if name is not None:
+            # Admin access is derived from the name
+            # Legacy (no tenant) tools pair with requests without tenant context
+            invalidate_admin_user_cache(None, user_key)
+        
         logger.info(f"Updated user info: {user_key}")
         
         return {
@@ -159,7 +159,8 @@ async function sendMessage() {
     showTypingIndicator();
     
     try {
-        const response = await fetch(`${API_BASE_URL}/chat`, {
+        // Usar o endpoint de streaming para mostrar a resposta enquanto é gerada
+        const response = await fetch(`${API_BASE_URL}/chat/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -176,15 +177,38 @@ async function sendMessage() {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
-        const data = await response.json();
+        let streamingMessage = null;
+        let data = null;
+        
+        await readEventStream(response, (eventType, eventData) => {
+            if (eventType === 'token') {
+                if (!streamingMessage) {
+                    hideTypingIndicator();
+                    streamingMessage = createStreamingMessage();
+                }
+                streamingMessage.text.textContent += eventData.content;
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            } else if (eventType === 'done') {
+                data = eventData;
+            } else if (eventType === 'error') {
+                throw new Error(eventData.detail);
+            }
+        });
+        
+        if (!data) {
+            throw new Error('Resposta incompleta do servidor');
+        }
         
         // Atualizar conversation_id
         if (data.conversation_id) {
             conversationId = data.conversation_id;
         }
         
-        // Adicionar resposta do agente
+        // Substituir o texto parcial pela resposta final renderizada
         hideTypingIndicator();
+        if (streamingMessage) {
+            streamingMessage.element.remove();
+        }
         addMessage('assistant', data.response);
         
         // Atualizar status
@@ -203,6 +227,59 @@ async function sendMessage() {
     }
 }
 
+// Ler eventos Server-Sent Events de uma resposta fetch
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Eventos são separados por uma linha em branco
+        let separatorIndex;
+        while ((separatorIndex = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, separatorIndex);
+            buffer = buffer.slice(separatorIndex + 2);
+            
+            let eventType = 'message';
+            let eventData = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    eventType = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    eventData += line.slice(6);
+                }
+            });
+            
+            onEvent(eventType, eventData ? JSON.parse(eventData) : {});
+        }
+    }
+}
+
+// Criar mensagem do assistente que recebe o texto aos poucos
+function createStreamingMessage() {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message assistant';
+    
+    const contentDiv = document.createElement('div');
+    contentDiv.className = 'message-content';
+    
+    const textParagraph = document.createElement('p');
+    contentDiv.appendChild(textParagraph);
+    
+    messageDiv.appendChild(contentDiv);
+    messagesContainer.appendChild(messageDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    return { element: messageDiv, text: textParagraph };
+}
+
 // Adicionar mensagem ao chat
 function addMessage(role, content) {
     const messageDiv = document.createElement('div');
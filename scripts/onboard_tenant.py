@@ -12,6 +12,7 @@ Usage:
 import asyncio
 import argparse
 import json
+import secrets
 import sys
 from pathlib import Path
 
@@ -19,10 +20,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import select
-import bcrypt
 import uuid
 
 from app.core.database import AsyncSessionLocal
+from app.core.security import hash_api_key
 from app.models import (
     Tenant, TenantStatus, PromptTemplate, PromptType,
     KnowledgeDocument, DocumentType, Plan, BillingCycle
@@ -79,8 +80,8 @@ class TenantOnboarder:
             raise ValueError(f"Tenant '{slug}' already exists")
 
         # Generate API key
-        self.api_key = f"{slug[:2]}_{uuid.uuid4().hex[:32]}"
-        api_key_hash = bcrypt.hashpw(self.api_key.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.api_key = f"{slug[:2]}_{secrets.token_urlsafe(24)}"
+        api_key_hash = hash_api_key(self.api_key)
         api_key_prefix = self.api_key[:8]
 
         # Default config if not provided
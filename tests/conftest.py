@@ -9,7 +9,10 @@ from httpx import AsyncClient
 
 from app.core.database import Base
 from app.main import app
-from app.api.deps import get_db
+from app.api.deps import get_db, get_db_readonly
+from app.api.v1.plans import invalidate_plans_cache
+from app.middleware.tenant import invalidate_tenant_cache
+from app.services.auth_service import clear_admin_user_cache
 from app.models import User, Plan, Conversation, Message, Lead, AnalysisReport
 
 # Test database URL
@@ -64,6 +67,10 @@ async def client(test_db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield test_db
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_readonly] = override_get_db
+    invalidate_plans_cache()
+    invalidate_tenant_cache()
+    clear_admin_user_cache()
     
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
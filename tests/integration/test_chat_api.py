@@ -80,6 +80,21 @@ async def test_get_plan_by_slug(client: AsyncClient, test_plans):
     assert data["name"] == "Flex"
 
 
+@pytest.mark.asyncio
+async def test_get_plans_endpoint_serves_cached_response(client: AsyncClient, test_db, test_plans):
+    """Test plans are served from the response cache until it expires"""
+    first = await client.get("/api/v1/plans")
+    
+    for plan in test_plans:
+        await test_db.delete(plan)
+    await test_db.commit()
+    
+    second = await client.get("/api/v1/plans")
+    
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+
 @pytest.mark.asyncio
 async def test_create_user_endpoint(client: AsyncClient):
     """Test create user endpoint"""
@@ -111,3 +126,11 @@ async def test_get_user_endpoint(client: AsyncClient, test_user):
     assert data["user_key"] == test_user.user_key
     assert data["name"] == test_user.name
 
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_endpoint_rejects_empty_batch(client: AsyncClient):
+    """Test chat batch endpoint requires at least one request"""
+    response = await client.post("/api/v1/chat/batch", json={"requests": []})
+    
+    assert response.status_code == 422
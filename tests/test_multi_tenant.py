@@ -7,12 +7,12 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import bcrypt
 import uuid
 
 from app.main import app
 from app.models import Tenant, TenantStatus, User, Conversation, Plan, BillingCycle
 from app.core.database import AsyncSessionLocal
+from app.core.security import hash_api_key
 
 
 # ========================================
@@ -30,7 +30,7 @@ async def db_session():
 async def test_tenant_a(db_session: AsyncSession):
     """Create test tenant A"""
     api_key = f"ta_{uuid.uuid4().hex[:32]}"
-    api_key_hash = bcrypt.hashpw(api_key.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    api_key_hash = hash_api_key(api_key)
 
     tenant = Tenant(
         id=uuid.uuid4(),
@@ -53,7 +53,7 @@ async def test_tenant_a(db_session: AsyncSession):
 async def test_tenant_b(db_session: AsyncSession):
     """Create test tenant B"""
     api_key = f"tb_{uuid.uuid4().hex[:32]}"
-    api_key_hash = bcrypt.hashpw(api_key.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    api_key_hash = hash_api_key(api_key)
 
     tenant = Tenant(
         id=uuid.uuid4(),
@@ -0,0 +1,134 @@
+"""Unit tests for shared agent helpers"""
+import asyncio
+
+import pytest
+from langchain.tools import StructuredTool
+from langchain_core.messages import AIMessage, HumanMessage
+
+from langchain_core.exceptions import OutputParserException
+
+from app.agents.base import (
+    AGENT_ERROR_RESPONSES,
+    UNEXPECTED_ERROR_MESSAGE,
+    agent_error_response,
+    build_agent_prompt,
+    parse_json_output,
+    serialize_session_tools,
+    trim_history,
+)
+
+
+def test_trim_history_keeps_everything_within_budget():
+    """History under the budget is returned unchanged"""
+    history = [HumanMessage(content="Oi"), AIMessage(content="Olá! Como posso ajudar?")]
+
+    assert trim_history(history, max_tokens=1000) == history
+
+
+def test_trim_history_drops_oldest_messages_first():
+    """The most recent messages are kept, oldest dropped"""
+    history = []
+    for i in range(10):
+        history.append(HumanMessage(content=f"pergunta {i} " * 20))
+        history.append(AIMessage(content=f"resposta {i} " * 20))
+
+    trimmed = trim_history(history, max_tokens=200)
+
+    assert 0 < len(trimmed) < len(history)
+    assert trimmed == history[-len(trimmed):]
+
+
+def test_trim_history_starts_with_user_message():
+    """An orphaned assistant reply is never left at the start"""
+    history = [
+        HumanMessage(content="a " * 200),
+        AIMessage(content="b " * 10),
+        HumanMessage(content="c"),
+        AIMessage(content="d"),
+    ]
+
+    trimmed = trim_history(history, max_tokens=30)
+
+    assert isinstance(trimmed[0], HumanMessage)
+
+
+def test_trim_history_handles_empty_history():
+    """None or empty history yields an empty list"""
+    assert trim_history(None) == []
+    assert trim_history([]) == []
+
+
+def test_parse_json_output_plain_and_fenced():
+    """JSON answers parse with or without markdown fences"""
+    assert parse_json_output('{"priority": "high"}') == {"priority": "high"}
+    assert parse_json_output('```json\n{"priority": "high"}\n```') == {"priority": "high"}
+
+
+def test_parse_json_output_with_surrounding_text():
+    """A JSON object embedded in prose is extracted"""
+    assert parse_json_output('Análise:\n{"score": 80}\nFim.') == {"score": 80}
+
+
+def test_parse_json_output_invalid():
+    """Non-JSON output yields None"""
+    assert parse_json_output("Agent stopped due to iteration limit or time limit.") is None
+    assert parse_json_output("") is None
+
+
+def test_agent_error_response_registered_error():
+    """Registered exceptions map to their user-facing message"""
+    response = agent_error_response(OutputParserException("bad output"), "sales agent")
+
+    assert response["output"] == AGENT_ERROR_RESPONSES[OutputParserException][0]
+    assert response["error"] == "OutputParserException: bad output"
+
+
+def test_agent_error_response_builtin_and_unexpected_errors():
+    """Built-in errors keep their message; unregistered errors get the generic reply"""
+    responses = {**AGENT_ERROR_RESPONSES, PermissionError: ("Acesso negado.", "Permission error")}
+
+    denied = agent_error_response(PermissionError("not admin"), "admin agent", responses)
+    unexpected = agent_error_response(ValueError("boom"), "admin agent", responses)
+
+    assert denied == {"output": "Acesso negado.", "error": "not admin"}
+    assert unexpected == {"output": UNEXPECTED_ERROR_MESSAGE, "error": "boom"}
+
+
+def test_build_agent_prompt_orders_messages_by_stability():
+    """Static system prompt, then history, then per-turn context"""
+    prompt = build_agent_prompt("Você é um vendedor.")
+
+    messages = prompt.format_messages(
+        input="Quero um plano",
+        dynamic_context="Cliente: Ana",
+        chat_history=[HumanMessage(content="Oi"), AIMessage(content="Olá!")],
+        agent_scratchpad=[],
+    )
+
+    assert [m.content for m in messages] == [
+        "Você é um vendedor.", "Oi", "Olá!", "Cliente: Ana", "Quero um plano",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_serialize_session_tools_runs_session_tools_one_at_a_time():
+    """Concurrent calls to session-bound tools never overlap"""
+    active = []
+    overlaps = []
+
+    async def _query(value: str) -> str:
+        active.append(value)
+        overlaps.append(len(active) > 1)
+        await asyncio.sleep(0)
+        active.remove(value)
+        return value
+
+    tools = serialize_session_tools([
+        StructuredTool.from_function(coroutine=_query, name="query_a", description="Query A"),
+        StructuredTool.from_function(coroutine=_query, name="query_b", description="Query B"),
+    ])
+
+    results = await asyncio.gather(tools[0].ainvoke({"value": "a"}), tools[1].ainvoke({"value": "b"}))
+
+    assert results == ["a", "b"]
+    assert not any(overlaps)
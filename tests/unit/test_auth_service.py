@@ -1,7 +1,17 @@
 """Unit tests for auth service"""
+import uuid
+
 import pytest
+from app.models import Tenant, TenantStatus
 from app.models.user import User
-from app.services.auth_service import is_admin_user, require_admin
+from app.services.auth_service import (
+    _admin_user_cache,
+    clear_admin_user_cache,
+    get_admin_user_by_key,
+    invalidate_admin_user_cache,
+    is_admin_user,
+    require_admin,
+)
 
 
 @pytest.mark.asyncio
@@ -88,3 +98,68 @@ async def test_require_admin_with_none_user():
     with pytest.raises(PermissionError):
         require_admin(None)
 
+
+
+@pytest.mark.asyncio
+async def test_is_admin_user_rechecks_after_name_change():
+    """Test cached admin check is recomputed when the user's name changes"""
+    user = User(user_key="user1", name="Admin User")
+    assert is_admin_user(user) is True
+    
+    user.name = "Regular User"
+    assert is_admin_user(user) is False
+
+
+@pytest.mark.asyncio
+async def test_get_admin_user_by_key_caches_decision_not_user(test_db):
+    """Test get_admin_user_by_key caches the admin decision but loads the user per call"""
+    admin = User(user_key="admin_cached", name="Admin User")
+    test_db.add(admin)
+    await test_db.commit()
+
+    clear_admin_user_cache()
+    user = await get_admin_user_by_key(test_db, admin.user_key)
+    assert user.id == admin.id
+    assert _admin_user_cache[(None, admin.user_key)][:2] == (admin.id, True)
+
+    cached = await get_admin_user_by_key(test_db, admin.user_key)
+    assert cached.id == admin.id
+
+
+@pytest.mark.asyncio
+async def test_get_admin_user_by_key_rechecks_after_invalidation(test_db):
+    """Test a renamed admin loses access once the cache entry is invalidated"""
+    admin = User(user_key="admin_renamed", name="Admin User")
+    test_db.add(admin)
+    await test_db.commit()
+
+    clear_admin_user_cache()
+    await get_admin_user_by_key(test_db, admin.user_key)
+
+    admin.name = "Regular User"
+    await test_db.commit()
+    invalidate_admin_user_cache(None, admin.user_key)
+
+    with pytest.raises(PermissionError):
+        await get_admin_user_by_key(test_db, admin.user_key)
+
+
+@pytest.mark.asyncio
+async def test_get_admin_user_by_key_is_scoped_to_tenant(test_db):
+    """Test an admin in one tenant doesn't grant access to the same user_key in another"""
+    tenant_a = Tenant(id=uuid.uuid4(), slug="admin-cache-a", name="Tenant A", config={}, status=TenantStatus.ACTIVE)
+    tenant_b = Tenant(id=uuid.uuid4(), slug="admin-cache-b", name="Tenant B", config={}, status=TenantStatus.ACTIVE)
+    test_db.add_all([tenant_a, tenant_b])
+    await test_db.commit()
+
+    admin = User(user_key="shared_key", name="Admin User", tenant_id=tenant_a.id)
+    regular = User(user_key="shared_key", name="Regular User", tenant_id=tenant_b.id)
+    test_db.add_all([admin, regular])
+    await test_db.commit()
+
+    clear_admin_user_cache()
+    user = await get_admin_user_by_key(test_db, "shared_key", tenant_a.id)
+    assert user.id == admin.id
+
+    with pytest.raises(PermissionError):
+        await get_admin_user_by_key(test_db, "shared_key", tenant_b.id)
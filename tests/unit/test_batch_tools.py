@@ -0,0 +1,52 @@
+"""Unit tests for batch tool adapter"""
+import pytest
+from langchain.tools import StructuredTool
+
+from app.tools.batch_tools import create_batch_tool
+
+
+def _make_tools(calls):
+    async def _echo(value: str) -> dict:
+        calls.append(value)
+        return {"value": value}
+
+    async def _fail() -> dict:
+        raise RuntimeError("boom")
+
+    return [
+        StructuredTool.from_function(coroutine=_echo, name="echo", description="Echo a value"),
+        StructuredTool.from_function(coroutine=_fail, name="fail", description="Always fails"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_tools_runs_all_invocations():
+    """Each invocation result is returned in order"""
+    calls = []
+    batch = create_batch_tool(_make_tools(calls))
+
+    result = await batch.ainvoke({"invocations": [
+        {"tool_name": "echo", "arguments": {"value": "a"}},
+        {"tool_name": "echo", "arguments": {"value": "b"}},
+    ]})
+
+    assert result["total"] == 2
+    assert [r["result"]["value"] for r in result["results"]] == ["a", "b"]
+    assert calls == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_batch_tools_reports_errors_per_invocation():
+    """A failing or unknown tool doesn't abort the rest of the batch"""
+    calls = []
+    batch = create_batch_tool(_make_tools(calls))
+
+    result = await batch.ainvoke({"invocations": [
+        {"tool_name": "fail", "arguments": {}},
+        {"tool_name": "missing", "arguments": {}},
+        {"tool_name": "echo", "arguments": {"value": "ok"}},
+    ]})
+
+    assert "error" in result["results"][0]
+    assert result["results"][1]["error"] == "Unknown tool"
+    assert result["results"][2]["result"] == {"value": "ok"}
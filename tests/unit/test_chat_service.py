@@ -170,3 +170,22 @@ async def test_get_or_create_conversation_with_new_id(test_db, test_user, chat_s
     assert conversation.id == new_id
     assert conversation.user_id == test_user.id
 
+
+
+def test_serialize_intermediate_steps_keeps_json_payloads():
+    """Test JSON-safe tool inputs/outputs are kept and others stringified"""
+    from uuid import uuid4
+    from langchain_core.agents import AgentAction
+
+    service = ChatService(db=None)
+    plan_id = uuid4()
+    steps = [
+        (AgentAction(tool="get_available_plans", tool_input={}, log=""), {"plans": [{"slug": "flex", "price": 497.0}]}),
+        (AgentAction(tool="get_plan_details", tool_input={"plan_slug": "flex"}, log=""), {"id": plan_id}),
+    ]
+
+    serialized = service._serialize_intermediate_steps(steps)
+
+    assert serialized[0]["observation"] == {"plans": [{"slug": "flex", "price": 497.0}]}
+    assert serialized[1]["action"]["tool_input"] == {"plan_slug": "flex"}
+    assert serialized[1]["observation"] == {"raw": str({"id": plan_id})}
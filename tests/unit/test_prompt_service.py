@@ -86,10 +86,10 @@ async def test_inject_variables_missing_variable(prompt_service):
 
 @pytest.mark.asyncio
 async def test_get_sales_prompt_complete(prompt_service):
-    """Test get_sales_prompt generates complete prompt"""
+    """Test get_sales_prompt includes plans but no per-turn values"""
     prompt = prompt_service.get_sales_prompt(
-        user_name="João",
-        work_type="freelancer",
+        user_name="Marcela",
+        work_type="fotógrafo",
         conversation_summary="Primeira conversa",
         funnel_stage="interest",
         available_plans="Day Pass, Flex",
@@ -97,19 +97,23 @@ async def test_get_sales_prompt_complete(prompt_service):
     )
     
     assert isinstance(prompt, str)
-    assert len(prompt) > 0
-    assert "João" in prompt or "Cliente" in prompt
-    assert "freelancer" in prompt.lower() or "Não informado" in prompt
+    assert "Day Pass, Flex" in prompt
+    assert "Marcela" not in prompt
+    assert "fotógrafo" not in prompt
+    assert "Primeira conversa" not in prompt
+    assert "123e4567-e89b-12d3-a456-426614174000" not in prompt
 
 
 @pytest.mark.asyncio
 async def test_get_sales_prompt_with_defaults(prompt_service):
-    """Test get_sales_prompt with default values"""
+    """Test get_sales_prompt defaults leave out the per-turn context block"""
     prompt = prompt_service.get_sales_prompt()
     
     assert isinstance(prompt, str)
     assert len(prompt) > 0
-    assert "Cliente" in prompt  # Default user_name
+    assert "Não informado" not in prompt  # Default work_type
+    assert "Primeira interação" not in prompt  # Default conversation_summary
+    assert "ID DA CONVERSA" not in prompt
 
 
 @pytest.mark.asyncio
@@ -121,23 +125,64 @@ async def test_get_analyst_prompt(prompt_service):
     assert len(prompt) > 0
 
 
+@pytest.mark.asyncio
+async def test_get_sales_prompt_is_static_across_turns(prompt_service):
+    """Test get_sales_prompt keeps per-turn data out of the system prompt"""
+    first = prompt_service.get_sales_prompt(user_name="João", funnel_stage="interest", conversation_id="conv-1")
+    second = prompt_service.get_sales_prompt(user_name="Maria", funnel_stage="negotiation", conversation_id="conv-2")
+    
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_get_sales_context(prompt_service):
+    """Test get_sales_context injects per-turn data"""
+    context = prompt_service.get_sales_context(
+        user_name="João",
+        work_type="freelancer",
+        funnel_stage="interest",
+        conversation_id="123e4567-e89b-12d3-a456-426614174000"
+    )
+    
+    assert "João" in context
+    assert "freelancer" in context
+    assert "interest" in context
+    assert "123e4567-e89b-12d3-a456-426614174000" in context
+
+
+@pytest.mark.asyncio
+async def test_get_sales_context_with_defaults(prompt_service):
+    """Test get_sales_context with default values"""
+    context = prompt_service.get_sales_context()
+    
+    assert "Cliente" in context  # Default user_name
+    assert "Não informado" in context  # Default work_type
+    assert "Primeira interação" in context  # Default conversation_summary
+    assert "N/A" in context  # Default conversation_id
+
+
 @pytest.mark.asyncio
 async def test_get_admin_prompt(prompt_service):
-    """Test get_admin_prompt with conversation_id"""
-    conversation_id = "123e4567-e89b-12d3-a456-426614174000"
-    prompt = prompt_service.get_admin_prompt(conversation_id=conversation_id)
+    """Test get_admin_prompt is the same for every conversation"""
+    prompt = prompt_service.get_admin_prompt(conversation_id="123e4567-e89b-12d3-a456-426614174000")
     
     assert isinstance(prompt, str)
     assert len(prompt) > 0
-    assert conversation_id in prompt
+    assert prompt == prompt_service.get_admin_prompt()
 
 
 @pytest.mark.asyncio
-async def test_get_admin_prompt_with_default(prompt_service):
-    """Test get_admin_prompt with default conversation_id"""
-    prompt = prompt_service.get_admin_prompt()
+async def test_get_admin_context(prompt_service):
+    """Test get_admin_context with conversation_id"""
+    conversation_id = "123e4567-e89b-12d3-a456-426614174000"
+    context = prompt_service.get_admin_context(conversation_id=conversation_id)
     
-    assert isinstance(prompt, str)
-    assert len(prompt) > 0
-    assert "N/A" in prompt  # Default conversation_id
+    assert conversation_id in context
 
+
+@pytest.mark.asyncio
+async def test_get_admin_context_with_default(prompt_service):
+    """Test get_admin_context with default conversation_id"""
+    context = prompt_service.get_admin_context()
+    
+    assert "N/A" in context  # Default conversation_id
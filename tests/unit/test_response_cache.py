@@ -0,0 +1,74 @@
+"""Unit tests for the tenant list response cache"""
+import uuid
+
+import pytest
+
+from app.core import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_caches_until_bump():
+    """Test values are reused until the domain revision is bumped"""
+    tenant_id = uuid.uuid4()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return f"body-{len(calls)}"
+
+    assert await cache.get_or_set(tenant_id, "plans", loader) == "body-1"
+    assert await cache.get_or_set(tenant_id, "plans", loader) == "body-1"
+    assert len(calls) == 1
+
+    cache.bump(tenant_id, "plans")
+
+    assert await cache.get_or_set(tenant_id, "plans", loader) == "body-2"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_is_scoped_by_tenant_and_domain():
+    """Test a bump only affects its own tenant and domain"""
+    tenant_a, tenant_b = uuid.uuid4(), uuid.uuid4()
+
+    async def load_a():
+        return "a"
+
+    async def load_b():
+        return "b"
+
+    await cache.get_or_set(tenant_a, "plans", load_a)
+    await cache.get_or_set(tenant_b, "plans", load_b)
+    await cache.get_or_set(tenant_a, "knowledge", load_a)
+
+    cache.bump(tenant_a, "plans")
+
+    async def fail():
+        raise AssertionError("should be served from cache")
+
+    assert await cache.get_or_set(tenant_b, "plans", fail) == "b"
+    assert await cache.get_or_set(tenant_a, "knowledge", fail) == "a"
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_skips_store_when_bumped_during_load():
+    """Test a value loaded while a write happened is not cached"""
+    tenant_id = uuid.uuid4()
+
+    async def racing_loader():
+        cache.bump(tenant_id, "prompts")
+        return "stale"
+
+    async def fresh_loader():
+        return "fresh"
+
+    assert await cache.get_or_set(tenant_id, "prompts", racing_loader) == "stale"
+    assert await cache.get_or_set(tenant_id, "prompts", fresh_loader) == "fresh"
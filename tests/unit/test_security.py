@@ -0,0 +1,26 @@
+"""Unit tests for API key hashing"""
+import bcrypt
+
+from app.core.security import hash_api_key, verify_api_key_hash
+
+
+def test_hash_api_key_is_deterministic():
+    """Test the same key always hashes to the same value"""
+    assert hash_api_key("wh_key") == hash_api_key("wh_key")
+    assert hash_api_key("wh_key") != hash_api_key("wh_other")
+
+
+def test_verify_api_key_hash():
+    """Test keys verify against their HMAC hash"""
+    stored = hash_api_key("wh_key")
+
+    assert verify_api_key_hash("wh_key", stored) == (True, False)
+    assert verify_api_key_hash("wh_wrong", stored) == (False, False)
+
+
+def test_verify_api_key_hash_legacy_bcrypt():
+    """Test legacy bcrypt hashes still verify and are flagged for upgrade"""
+    stored = bcrypt.hashpw(b"wh_key", bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+    assert verify_api_key_hash("wh_key", stored) == (True, True)
+    assert verify_api_key_hash("wh_wrong", stored) == (False, False)
@@ -0,0 +1,177 @@
+"""Unit tests for tenant prompt service caching"""
+import pytest
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models import BillingCycle, PromptType
+from app.services.tenant_prompt_service import TenantPromptService
+
+
+@pytest.fixture
+def prompt_service():
+    """Create TenantPromptService instance with a stubbed template loader"""
+    service = TenantPromptService()
+    service.get_prompt = AsyncMock(return_value="Admin prompt for {conversation_id}")
+    return service
+
+
+@pytest.mark.asyncio
+async def test_get_admin_prompt_reuses_rendered_prompt(prompt_service):
+    """Test repeated turns of a conversation reuse the rendered admin prompt"""
+    tenant_id = uuid.uuid4()
+
+    first = await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-1")
+    second = await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-1")
+
+    assert first == second == "Admin prompt for conv-1"
+    prompt_service.get_prompt.assert_awaited_once_with(None, tenant_id, PromptType.ADMIN_AGENT)
+
+
+@pytest.mark.asyncio
+async def test_get_admin_prompt_keyed_by_conversation(prompt_service):
+    """Test rendered admin prompts are cached per conversation"""
+    tenant_id = uuid.uuid4()
+
+    first = await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-1")
+    second = await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-2")
+
+    assert first == "Admin prompt for conv-1"
+    assert second == "Admin prompt for conv-2"
+    assert prompt_service.get_prompt.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_cache_drops_rendered_prompts(prompt_service):
+    """Test invalidating a tenant's prompts also drops rendered prompts"""
+    tenant_id = uuid.uuid4()
+
+    await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-1")
+    prompt_service.invalidate_cache(tenant_id, PromptType.ADMIN_AGENT)
+    await prompt_service.get_admin_prompt(db=None, tenant_id=tenant_id, conversation_id="conv-1")
+
+    assert prompt_service.get_prompt.await_count == 2
+
+
+def _plans_db(rows):
+    """Stub session whose execute() returns the given plan rows"""
+    result = MagicMock()
+    result.all.return_value = rows
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_get_plans_summary_is_formatted_and_cached(prompt_service):
+    """Test plans summary rendering is deterministic and cached per tenant"""
+    tenant_id = uuid.uuid4()
+    db = _plans_db([
+        ("Day Pass", Decimal("49.00"), BillingCycle.DAILY, ["Wi-Fi 1Gbps"], None),
+        ("Flex", Decimal("497.50"), BillingCycle.MONTHLY, ["10 dias de acesso/mês"], "Profissionais híbridos"),
+    ])
+
+    first = await prompt_service.get_plans_summary(db, tenant_id)
+    second = await prompt_service.get_plans_summary(db, tenant_id)
+
+    assert first == second
+    assert "1. DAY PASS - R$ 49/dia" in first
+    assert "2. FLEX - R$ 497,50/mês" in first
+    db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_plans_summary_reloads_plans(prompt_service):
+    """Test invalidating the plans summary forces a reload"""
+    tenant_id = uuid.uuid4()
+    db = _plans_db([])
+
+    summary = await prompt_service.get_plans_summary(db, tenant_id)
+    prompt_service.invalidate_plans_summary(tenant_id)
+    await prompt_service.get_plans_summary(db, tenant_id)
+
+    assert summary == "Nenhum plano disponível no momento."
+    assert db.execute.await_count == 2
+
+
+def _stub_sales_inputs(service, template):
+    """Stub the template, knowledge and tenant lookups used by get_sales_prompt"""
+    service.get_prompt = AsyncMock(return_value=template)
+    service.get_knowledge_base = AsyncMock(return_value="Knowledge")
+    service._get_tenant_variables = AsyncMock(return_value=("Acme", "coworking"))
+
+
+@pytest.mark.asyncio
+async def test_get_sales_prompt_static_template_rendered_once(prompt_service):
+    """Test static sales templates are rendered once, whatever the turn data"""
+    tenant_id = uuid.uuid4()
+    _stub_sales_inputs(prompt_service, "{tenant_name}: {product_knowledge}\n{available_plans}")
+
+    first = await prompt_service.get_sales_prompt(None, tenant_id, user_name="Ana", available_plans="PLANOS")
+    second = await prompt_service.get_sales_prompt(None, tenant_id, user_name="Bruno", available_plans="PLANOS")
+
+    assert first == "Acme: Knowledge\nPLANOS"
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_invalidate_knowledge_drops_rendered_sales_prompt(prompt_service):
+    """Test invalidating a tenant's knowledge re-renders its sales prompt"""
+    tenant_id = uuid.uuid4()
+    other_tenant_id = uuid.uuid4()
+    _stub_sales_inputs(prompt_service, "{tenant_name}: {product_knowledge}")
+
+    first = await prompt_service.get_sales_prompt(None, tenant_id)
+    other = await prompt_service.get_sales_prompt(None, other_tenant_id)
+    prompt_service.invalidate_knowledge(tenant_id)
+    second = await prompt_service.get_sales_prompt(None, tenant_id)
+
+    assert first == second
+    assert first is not second
+    assert other is await prompt_service.get_sales_prompt(None, other_tenant_id)
+
+
+@pytest.mark.asyncio
+async def test_get_sales_prompt_legacy_template_renders_per_turn(prompt_service):
+    """Test templates that still use per-turn variables are rendered each turn"""
+    tenant_id = uuid.uuid4()
+    _stub_sales_inputs(prompt_service, "Olá {user_name}")
+
+    first = await prompt_service.get_sales_prompt(None, tenant_id, user_name="Ana")
+    second = await prompt_service.get_sales_prompt(None, tenant_id, user_name="Bruno")
+
+    assert first == "Olá Ana"
+    assert second == "Olá Bruno"
+
+
+@pytest.mark.asyncio
+async def test_get_prompt_revalidates_unchanged_version():
+    """Test expired prompts are kept when the active version is unchanged"""
+    service = TenantPromptService()
+    tenant_id = uuid.uuid4()
+    service._load_prompt = AsyncMock(return_value=("Prompt v1", 1))
+    service._get_active_prompt_version = AsyncMock(return_value=1)
+
+    first = await service.get_prompt(None, tenant_id, PromptType.SALES_AGENT)
+    service.prompt_ttl = 0  # Force revalidation
+    second = await service.get_prompt(None, tenant_id, PromptType.SALES_AGENT)
+
+    assert first == second == "Prompt v1"
+    service._load_prompt.assert_awaited_once()
+    service._get_active_prompt_version.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_prompt_reloads_new_version():
+    """Test a new active version (e.g. updated by another worker) is reloaded"""
+    service = TenantPromptService()
+    tenant_id = uuid.uuid4()
+    service._load_prompt = AsyncMock(side_effect=[("Prompt v1", 1), ("Prompt v2", 2)])
+    service._get_active_prompt_version = AsyncMock(return_value=2)
+
+    await service.get_prompt(None, tenant_id, PromptType.SALES_AGENT)
+    service.prompt_ttl = 0
+    content = await service.get_prompt(None, tenant_id, PromptType.SALES_AGENT)
+
+    assert content == "Prompt v2"
+    assert service._load_prompt.await_count == 2